@@ -0,0 +1,52 @@
+"""Keyset pagination indexes
+
+Revision ID: 14459da4fb20
+Revises: 67d6f173231b
+Create Date: 2026-10-18 12:20:00.000000
+
+The users without creation date get the date of the upgrade, as
+`created_at` becomes a key of the pages of users and is never NULL.
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '14459da4fb20'
+down_revision: Union[str, Sequence[str], None] = '67d6f173231b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+users = sa.table('users', sa.column('created_at', sa.DateTime))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.update(users)
+        .where(users.c.created_at.is_(None))
+        .values(created_at=datetime.now()))
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(),
+                              nullable=False)
+    op.create_index('ix_users_created_at_id', 'users',
+                    ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_is_active_created_at_id', 'users',
+                    ['is_active', 'created_at', 'id'], unique=False)
+    op.create_index('ix_users_is_staff_created_at_id', 'users',
+                    ['is_staff', 'created_at', 'id'], unique=False)
+    op.create_index('ix_permissions_name_id', 'permissions',
+                    ['name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_permissions_name_id', table_name='permissions')
+    op.drop_index('ix_users_is_staff_created_at_id', table_name='users')
+    op.drop_index('ix_users_is_active_created_at_id', table_name='users')
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(),
+                              nullable=True)
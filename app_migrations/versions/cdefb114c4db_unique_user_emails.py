@@ -0,0 +1,74 @@
+"""Unique user emails
+
+Revision ID: cdefb114c4db
+Revises: 7bf95c06f2f7
+Create Date: 2026-10-18 12:00:00.000000
+
+The existing duplicate emails are reported and the upgrade stops, unless
+it is run with `alembic -x dedupe_emails=true upgrade head`: the email
+is then kept by the user with the lowest ID and cleared on the others.
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op, context
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cdefb114c4db'
+down_revision: Union[str, Sequence[str], None] = '7bf95c06f2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOGGER = logging.getLogger('alembic.runtime.migration')
+
+users = sa.table('users', sa.column('id', sa.Integer),
+                 sa.column('email', sa.String))
+
+
+def duplicate_emails(connection) -> dict:
+    """Returns the IDs of the users of each duplicate email, oldest first."""
+    duplicates = (sa.select(users.c.email)
+        .where(users.c.email.is_not(None))
+        .group_by(users.c.email)
+        .having(sa.func.count() > 1))
+    rows = connection.execute(
+        sa.select(users.c.email, users.c.id)
+        .where(users.c.email.in_(duplicates))
+        .order_by(users.c.email, users.c.id))
+    user_ids = {}
+    for email, user_id in rows:
+        user_ids.setdefault(email, []).append(user_id)
+    return user_ids
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    duplicates = duplicate_emails(connection)
+    if duplicates:
+        report = "\n".join(f"  {email}: users {ids}"
+                           for email, ids in duplicates.items())
+        dedupe = context.get_x_argument(as_dictionary=True).get(
+            'dedupe_emails', '').lower() in ('1', 'true', 'yes')
+        if not dedupe:
+            raise RuntimeError(
+                "Duplicate user emails, resolve them or run the upgrade "
+                "with `-x dedupe_emails=true` to clear the emails of the "
+                "newest users:\n" + report)
+        LOGGER.warning("Clearing the emails of the newest users of:\n"
+                       + report)
+        cleared = [user_id for ids in duplicates.values()
+                   for user_id in ids[1:]]
+        connection.execute(sa.update(users)
+            .where(users.c.id.in_(cleared)).values(email=None))
+
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=False)
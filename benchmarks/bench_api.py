@@ -0,0 +1,176 @@
+"""
+Load test of the auth API: registers then logs in a number of users at a
+given concurrency, and writes the latency and throughput of each route
+as JSON.
+
+The server is driven either in-process through the httpx ASGI transport
+(`--mode asgi`), or over HTTP against uvicorn started in a subprocess
+(`--mode uvicorn`). A temporary SQLite database is used unless the
+DATABASE_URL environment variable is defined.
+
+Usage:
+    python benchmarks/bench_api.py --users 200 --concurrency 16
+    python benchmarks/bench_api.py --mode uvicorn --workers 2 -o api.json
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import typing as t
+
+import httpx
+
+from common import latency_summary, write_results, Stopwatch
+
+PASSWORD = "aX6/9p6XoY]o4$#"
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    path: str,
+    payloads: t.List[dict],
+    concurrency: int
+) -> dict:
+    """
+    Send a POST request per payload with `concurrency` requests
+    in flight, and returns the summary of their latencies.
+    """
+    queue = iter(payloads)
+    samples = []
+    errors = 0
+    statuses = {}
+
+    async def worker():
+        nonlocal errors
+        for payload in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, json=payload)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 'error'
+            samples.append(time.perf_counter() - start)
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+            if status != 200:
+                errors += 1
+
+    with Stopwatch() as stopwatch:
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+    summary = latency_summary(samples, stopwatch.elapsed, errors)
+    summary["statuses"] = statuses
+    return summary
+
+
+async def run_benchmark(
+    client: httpx.AsyncClient,
+    prefix: str,
+    users: int,
+    concurrency: int
+) -> dict:
+    run_id = str(int(time.time()))
+    usernames = [f"bench_{run_id}_{i}" for i in range(users)]
+    registrations = [
+        {"username": name, "password": PASSWORD,
+         "email": name + "@bench.local"}
+        for name in usernames
+    ]
+    logins = [{"username": name, "password": PASSWORD}
+              for name in usernames]
+    results = {
+        "register": await run_scenario(
+            client, prefix + "/auth/register", registrations, concurrency),
+        "login": await run_scenario(
+            client, prefix + "/auth/login", logins, concurrency),
+    }
+    return results
+
+
+async def run_asgi(args) -> dict:
+    from percefons.core import settings
+    from percefons.main import app
+    from percefons.interfaces.api.routes import auth
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport,
+                                     base_url="http://bench") as client:
+            return await run_benchmark(client, settings.API_V1_PREFIX,
+                                       args.users, args.concurrency)
+    finally:
+        auth.shutdown()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get("/openapi.json")
+                return
+            except httpx.HTTPError:
+                await asyncio.sleep(0.2)
+    raise TimeoutError("The server did not start in time.")
+
+
+async def run_uvicorn(args) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "percefons.main:app",
+         "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        env=os.environ.copy(),
+    )
+    try:
+        await wait_until_ready(base_url)
+        limits = httpx.Limits(max_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits,
+                                     timeout=60) as client:
+            from percefons.core import settings
+            return await run_benchmark(client, settings.API_V1_PREFIX,
+                                       args.users, args.concurrency)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def parse_args(argv: t.List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--mode', choices=['asgi', 'uvicorn'], default='asgi')
+    parser.add_argument('--users', type=int, default=100,
+                        help="Number of users registered then logged in.")
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help="Number of requests in flight.")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Number of uvicorn workers (uvicorn mode).")
+    parser.add_argument('-o', '--output', default=None,
+                        help="JSON file in which the results are written.")
+    return parser.parse_args(argv)
+
+
+def main(argv: t.List[str] = None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ.setdefault(
+            'DATABASE_URL', "sqlite:///" + os.path.join(tmp_dir, "bench.db"))
+        # All the logins come from the same client:
+        os.environ.setdefault('LOGIN_RATE_LIMIT_ENABLED', "False")
+        runner = run_asgi if args.mode == 'asgi' else run_uvicorn
+        results = asyncio.run(runner(args))
+    params = {"mode": args.mode, "users": args.users,
+              "concurrency": args.concurrency, "workers": args.workers}
+    write_results("api", results, params, args.output)
+
+
+if __name__ == '__main__':
+    main()
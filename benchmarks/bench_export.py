@@ -0,0 +1,155 @@
+"""
+Throughput and memory benchmark of the NDJSON export of the users and
+their permissions: the streamed export (server-side cursor, batches of
+rows) against the export of the users loaded as `UserModel` objects.
+For each number of users, the duration and the peak of the memory
+allocated (measured by tracemalloc, in a separate run after a warm-up)
+are written as JSON: the peak of the streamed export does not grow with
+the users.
+
+A temporary SQLite database is used unless a database URL is given.
+
+Usage:
+    python benchmarks/bench_export.py --users 10000 100000
+    python benchmarks/bench_export.py --url postgresql://... -o export.json
+"""
+import os
+import argparse
+import tempfile
+import tracemalloc
+import typing as t
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, delete, select
+from sqlalchemy.orm import sessionmaker, selectinload
+
+from common import write_results, Stopwatch
+
+PERMISSIONS = ("VIEW_USER", "CREATE_USER", "CHANGE_USER", "DELETE_USER")
+SEED_CHUNK_SIZE = 5000
+
+
+def seed(engine, users: int):
+    """Replaces the users with `users` users, having 0 to 2 permissions."""
+    from percefons.infrastructure.db.models import (
+        BaseModel, UserModel, PermissionModel)
+    from percefons.infrastructure.db.models.user_perms import (
+        user_permission_association as association)
+    BaseModel.metadata.create_all(bind=engine)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as connection:
+        for table in (association, UserModel.__table__,
+                      PermissionModel.__table__):
+            connection.execute(delete(table))
+        connection.execute(insert(PermissionModel), [
+            {"id": i + 1, "name": code.title(), "code_name": code}
+            for i, code in enumerate(PERMISSIONS)
+        ])
+        for first in range(0, users, SEED_CHUNK_SIZE):
+            ids = range(first + 1, min(users, first + SEED_CHUNK_SIZE) + 1)
+            connection.execute(insert(UserModel), [
+                {"id": i, "username": f"user{i}", "hashed_password": "x",
+                 "email": f"user{i}@bench.local", "is_active": i % 3 > 0,
+                 "is_staff": i % 50 == 0, "is_superuser": False,
+                 "created_at": start + timedelta(seconds=i)}
+                for i in ids
+            ])
+            grants = [{"user_id": i, "perm_id": perm_id}
+                      for i in ids for perm_id in range(1, i % 3 + 1)]
+            connection.execute(insert(association), grants)
+
+
+def streamed_export(session_factory, batch_size: int) -> t.Tuple[int, int]:
+    from percefons.infrastructure.repositories.user_export import (
+        iter_user_batches)
+    from percefons.interfaces.api.responses import dumps_lines
+    count = size = 0
+    with session_factory() as db:
+        for batch in iter_user_batches(db, batch_size):
+            size += len(dumps_lines(batch))
+            count += len(batch)
+    return count, size
+
+
+def materialized_export(session_factory, _batch_size: int
+                        ) -> t.Tuple[int, int]:
+    # The export built from the UserModel objects of the session:
+    from percefons.infrastructure.db.models import UserModel
+    from percefons.infrastructure.repositories.user_export import (
+        EXPORT_COLUMNS)
+    from percefons.interfaces.api.responses import dumps_lines
+    with session_factory() as db:
+        users = db.scalars(select(UserModel).order_by(UserModel.id)
+            .options(selectinload(UserModel.permissions))).all()
+        records = []
+        for user in users:
+            record = {name: getattr(user, name) for name in EXPORT_COLUMNS}
+            record['permissions'] = sorted(
+                perm.code_name for perm in user.permissions)
+            records.append(record)
+        return len(records), len(dumps_lines(records))
+
+
+EXPORTS = {
+    "streamed": streamed_export,
+    "materialized": materialized_export,
+}
+
+
+def measure(export: t.Callable, session_factory, batch_size: int) -> dict:
+    # A first run warms up the imports and the compiled statements:
+    export(session_factory, batch_size)
+    tracemalloc.start()
+    try:
+        export(session_factory, batch_size)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    with Stopwatch() as stopwatch:
+        count, size = export(session_factory, batch_size)
+    duration = stopwatch.elapsed
+    return {
+        "users": count,
+        "bytes": size,
+        "duration_s": duration,
+        "rows_per_s": count / duration if duration else 0.0,
+        "mb_per_s": size / duration / 1e6 if duration else 0.0,
+        "peak_memory_mb": peak / 1e6,
+    }
+
+
+def parse_args(argv: t.List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--users', type=int, nargs='+',
+                        default=[10000, 100000])
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--only', choices=list(EXPORTS), nargs='+',
+                        default=list(EXPORTS), help="Exports to run.")
+    parser.add_argument('--url', default=None,
+                        help="Database URL (its users are replaced).")
+    parser.add_argument('-o', '--output', default=None,
+                        help="JSON file in which the results are written.")
+    return parser.parse_args(argv)
+
+
+def main(argv: t.List[str] = None):
+    args = parse_args(argv)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        url = args.url or "sqlite:///" + os.path.join(tmp_dir, "export.db")
+        engine = create_engine(url)
+        session_factory = sessionmaker(bind=engine)
+        try:
+            for users in args.users:
+                seed(engine, users)
+                for name in args.only:
+                    results[f"export_{name}_{users}"] = measure(
+                        EXPORTS[name], session_factory, args.batch_size)
+        finally:
+            engine.dispose()
+    params = {"users": args.users, "batch_size": args.batch_size}
+    write_results("export", results, params, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""
+Micro-benchmarks of the hot functions of the auth path: the password
+policy validator, the JWT services and the repository converters, of
+the batch validation against the scalar validators, and of the
+serialization of the auth responses by FastAPI and by FastJSONResponse.
+The results (time per call and calls per second) are written as JSON.
+
+Usage:
+    python benchmarks/bench_micro.py -o micro.json
+    python benchmarks/bench_micro.py --only jwt
+"""
+import timeit
+import argparse
+import typing as t
+from datetime import datetime
+
+from common import write_results
+
+SECRET = "a-benchmark-secret-which-is-long-enough-for-hs256"
+BATCH_SIZE = 10000
+
+
+def validator_cases() -> t.Dict[str, t.Callable]:
+    from percefons.domain import validators
+    return {
+        "validate_user_password": lambda: validators.validate_user_password(
+            "aX6/9p6XoY]o4$#"),
+        "validate_email": lambda: validators.validate_email(
+            "alice@email.com"),
+        "validate_username": lambda: validators.validate_username("alice"),
+    }
+
+
+def batch_records(size: int) -> t.List[dict]:
+    """Records of which one out of four has invalid values."""
+    records = []
+    for i in range(size):
+        if i % 4:
+            records.append({"username": f"user{i}",
+                            "email": f"user{i}@email.com",
+                            "password": "aX6/9p6XoY]o4$#"})
+        else:
+            records.append({"username": f"user {i}", "email": f"user{i}",
+                            "password": "password"})
+    return records
+
+
+def batch_cases() -> t.Dict[str, t.Callable]:
+    from percefons.domain import validators
+    from percefons.domain.exceptions import InvalidFieldError
+    records = batch_records(BATCH_SIZE)
+    columns = {name: [record[name] for record in records]
+               for name in ("username", "email", "password")}
+
+    def scalar():
+        # The scalar validators, as the import used them:
+        errors = {}
+        for row, record in enumerate(records):
+            try:
+                validators.validate_username(record["username"])
+                validators.validate_email(record["email"])
+                validators.validate_user_password(record["password"])
+            except InvalidFieldError as e:
+                errors[row] = e.code
+        return errors
+
+    return {
+        f"validate_scalar_{BATCH_SIZE}_records": scalar,
+        f"validate_batch_{BATCH_SIZE}_records": (
+            lambda: validators.validate_batch(records)),
+        f"validate_batch_{BATCH_SIZE}_columns": (
+            lambda: validators.validate_batch(columns)),
+    }
+
+
+def jwt_cases() -> t.Dict[str, t.Callable]:
+    from percefons.infrastructure.services.jwt_auth import (
+        JWTAuthImpl,
+        CachedJWTAuthImpl
+    )
+    auth = JWTAuthImpl(SECRET, SECRET)
+    cached_auth = CachedJWTAuthImpl(SECRET, SECRET)
+    token = auth.get_auth("12")["access_token"]
+    cached_auth.verify_auth(token)
+    return {
+        "jwt_get_auth": lambda: auth.get_auth("12"),
+        "jwt_verify_auth": lambda: auth.verify_auth(token),
+        "jwt_verify_auth_cached": lambda: cached_auth.verify_auth(token),
+    }
+
+
+def converter_cases() -> t.Dict[str, t.Callable]:
+    from percefons.domain.entities import User, Permission
+    from percefons.infrastructure.repositories.user_repository import (
+        UserRepositoryImpl as Ur
+    )
+    from percefons.infrastructure.repositories.permission_repository import (
+        PermissionRepositoryImpl as Pr
+    )
+    user = User(username="alice", hashed_password="x" * 60,
+                email="alice@email.com", created_at=datetime.now(), id=12)
+    permission = Permission("Can view user", "VIEW_USER", id=1)
+    user_model = Ur.convert_to_user_model(user)
+    perm_model = Pr.convert_to_permission_model(permission)
+    return {
+        "convert_to_user_model": lambda: Ur.convert_to_user_model(user),
+        "convert_to_user_entity": lambda: Ur.convert_to_user_entity(
+            user_model),
+        "convert_to_permission_model": lambda: Pr.convert_to_permission_model(
+            permission),
+        "convert_to_permission_entity": lambda: (
+            Pr.convert_to_permission_entity(perm_model)),
+    }
+
+
+def run_coroutine(coroutine):
+    """Runs a coroutine which never suspends, without an event loop."""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("The coroutine was suspended.")
+
+
+def response_cases() -> t.Dict[str, t.Callable]:
+    from fastapi.responses import JSONResponse, Response
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from percefons.interfaces.api.responses import FastJSONResponse
+    from percefons.interfaces.api.schemas import (
+        UserRegistrationResponse,
+        LoginResponse
+    )
+    contents = {
+        "register": UserRegistrationResponse(
+            userid=12, username="alice", created_at=datetime.now()),
+        "login": LoginResponse(access_token="a" * 180,
+                               refresh_token="r" * 220),
+    }
+    cases = {}
+    for name, content in contents.items():
+        field = create_model_field(name="Response", type_=type(content),
+                                   mode="serialization")
+
+        def fastapi_generic(field=field, content=content):
+            # Validation, then a dict encoded by the response class:
+            value = run_coroutine(serialize_response(
+                field=field, response_content=content))
+            return JSONResponse(value)
+
+        def fastapi_dump_json(field=field, content=content):
+            # FastAPI path without a custom response class:
+            body = run_coroutine(serialize_response(
+                field=field, response_content=content, dump_json=True))
+            return Response(body, media_type="application/json")
+
+        cases[f"response_{name}_fastapi_generic"] = fastapi_generic
+        cases[f"response_{name}_fastapi_dump_json"] = fastapi_dump_json
+        cases[f"response_{name}_fast_json"] = (
+            lambda content=content: FastJSONResponse(content))
+    return cases
+
+
+GROUPS = {
+    "validators": validator_cases,
+    "batch": batch_cases,
+    "jwt": jwt_cases,
+    "converters": converter_cases,
+    "responses": response_cases,
+}
+
+
+def measure(func: t.Callable, repeat: int) -> dict:
+    """
+    Time a function with `timeit`: the number of calls per run is
+    calibrated to last at least 0.2 s, and the best of `repeat` runs
+    is kept.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return {"us_per_call": best * 1e6, "calls_per_s": 1.0 / best,
+            "number": number}
+
+
+def parse_args(argv: t.List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--only', choices=list(GROUPS), nargs='+',
+                        default=list(GROUPS), help="Groups to run.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('-o', '--output', default=None,
+                        help="JSON file in which the results are written.")
+    return parser.parse_args(argv)
+
+
+def main(argv: t.List[str] = None):
+    args = parse_args(argv)
+    results = {}
+    for group in args.only:
+        for name, func in GROUPS[group]().items():
+            results[name] = measure(func, args.repeat)
+    write_results("micro", results, {"repeat": args.repeat}, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import json
+import time
+import platform
+import statistics
+import typing as t
+from datetime import datetime
+
+
+def percentile(sorted_samples: t.List[float], ratio: float) -> float:
+    """Returns the percentile of sorted samples (nearest rank)."""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1,
+                max(0, round(ratio * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def latency_summary(
+    samples: t.List[float],
+    duration: float,
+    errors: int = 0
+) -> dict:
+    """
+    Summarize the latencies of a scenario.
+
+    :param samples: The latencies of the requests, in seconds.
+    :param duration: The wall time of the whole scenario, in seconds.
+    :param errors: The number of failed requests.
+    """
+    samples = sorted(samples)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "duration_s": duration,
+        "throughput_rps": len(samples) / duration if duration else 0.0,
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p90_ms": percentile(samples, 0.90) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "max_ms": samples[-1] * 1000 if samples else 0.0,
+    }
+
+
+def environment() -> dict:
+    """Returns the description of the machine running the benchmark."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "timestamp": datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def write_results(name: str, results: dict, params: dict, path: str = None):
+    """
+    Write the results of a benchmark as JSON, into a file when a path
+    is given, otherwise on the standard output.
+    """
+    document = {
+        "benchmark": name,
+        "environment": environment(),
+        "params": params,
+        "results": results,
+    }
+    content = json.dumps(document, indent=2, sort_keys=True)
+    if path:
+        with open(path, 'w') as file:
+            file.write(content + "\n")
+    else:
+        print(content)
+
+
+class Stopwatch:
+    """Context manager which measures the wall time of a block."""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+        return self
+
+    def __exit__(self, *_exc):
+        self.elapsed = time.perf_counter() - self.start
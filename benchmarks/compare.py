@@ -0,0 +1,69 @@
+"""
+Compare two JSON results of the same benchmark, e.g. the results of the
+previous release and of the current one, and report the regressions.
+The exit code is 1 when a metric regressed by more than the threshold.
+
+Usage:
+    python benchmarks/compare.py baseline.json current.json --threshold 10
+"""
+import sys
+import json
+import argparse
+import typing as t
+
+# Metrics compared for each result, and whether higher is better:
+METRICS = {
+    "us_per_call": False,
+    "calls_per_s": True,
+    "throughput_rps": True,
+    "rows_per_s": True,
+    "peak_memory_mb": False,
+    "p50_ms": False,
+    "p99_ms": False,
+}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> t.List[str]:
+    """
+    Returns the report lines, the lines of the regressions being prefixed
+    with `REGRESSION`.
+    """
+    lines = []
+    for name, result in sorted(current["results"].items()):
+        previous = baseline["results"].get(name)
+        if previous is None:
+            lines.append(f"  new        {name}")
+            continue
+        for metric, higher_is_better in METRICS.items():
+            if metric not in result or not previous.get(metric):
+                continue
+            change = (result[metric] - previous[metric]) / previous[metric]
+            worse = -change if higher_is_better else change
+            flag = "REGRESSION" if worse * 100 > threshold else "  ok      "
+            lines.append(
+                f"{flag} {name}.{metric}: {previous[metric]:.3f} -> "
+                f"{result[metric]:.3f} ({change * 100:+.1f}%)"
+            )
+    return lines
+
+
+def main(argv: t.List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Tolerated regression, in percent.")
+    args = parser.parse_args(argv)
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+
+    lines = compare(baseline, current, args.threshold)
+    print("\n".join(lines))
+    if any(line.startswith("REGRESSION") for line in lines):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -24,3 +24,33 @@ class AuthenticationError(RuntimeError):
 
     def __init__(self, message: str = None):
         self.message = message if message else self.default_message
+
+
+class ServiceBusyError(RuntimeError):
+    default_message: str = "The server is busy, please retry later."
+    default_code: str = "service_busy"
+
+    def __init__(
+        self,
+        message: str = None,
+        code: str = None,
+        retry_after: int = None
+    ):
+        self.message = message if message else self.default_message
+        self.code = code if code else self.default_code
+        self.retry_after = retry_after
+
+
+class RateLimitExceededError(RuntimeError):
+    default_message: str = "Too many attempts, please retry later."
+    default_code: str = "rate_limited"
+
+    def __init__(
+        self,
+        message: str = None,
+        code: str = None,
+        retry_after: int = None
+    ):
+        self.message = message if message else self.default_message
+        self.code = code if code else self.default_code
+        self.retry_after = retry_after
@@ -16,6 +16,36 @@ class PasswordHandler(ABC):
     ) -> bool:
         ...
 
+    @abstractmethod
+    def needs_update(self, hashed_password: str) -> bool:
+        """
+        Tells whether the hash must be computed again with the current
+        scheme and cost.
+        """
+        ...
+
+
+class AsyncPasswordHandler(ABC):
+    @abstractmethod
+    async def get_password_hash(self, password: str) -> str:
+        ...
+
+    @abstractmethod
+    async def verify_password(
+        self,
+        plain_password: str,
+        hashed_password: str
+    ) -> bool:
+        ...
+
+    @abstractmethod
+    def needs_update(self, hashed_password: str) -> bool:
+        """
+        Tells whether the hash must be computed again with the current
+        scheme and cost. It is cheap, so it is not awaited.
+        """
+        ...
+
 
 class JWTAuth(ABC):
     SUCCESS: str = 'S'
@@ -34,7 +64,7 @@ class JWTAuth(ABC):
             self.payload = payload
 
     @abstractmethod
-    def get_auth(self, subject: str) -> dict:
+    def get_auth(self, subject: str, family: str = None) -> dict:
         ...
 
     @abstractmethod
@@ -44,3 +74,34 @@ class JWTAuth(ABC):
     @abstractmethod
     def verify_auth(self, token: str) -> Result:
         ...
+
+    @abstractmethod
+    def verify_refresh_token(self, token: str) -> Result:
+        ...
+
+
+class TokenRevocationStore(ABC):
+    @abstractmethod
+    def revoke(self, token_id: str, expires_at: float) -> bool:
+        """
+        Revoke a token until its expiration date (POSIX timestamp).
+
+        :returns: False if the token was already revoked.
+        """
+        ...
+
+    @abstractmethod
+    def is_revoked(self, token_id: str) -> bool:
+        ...
+
+
+class RateLimiter(ABC):
+    @abstractmethod
+    async def acquire(self, key: str) -> float:
+        """
+        Consume one attempt for this key.
+
+        :returns: 0 when the attempt is allowed, otherwise the number
+          of seconds to wait before the next attempt is allowed.
+        """
+        ...
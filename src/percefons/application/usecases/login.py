@@ -1,9 +1,21 @@
+import logging
 from typing import Literal
 from dataclasses import dataclass
 
 from percefons.application.exceptions import AuthenticationError
 from percefons.domain.repositories import UserRepository
-from percefons.application.services import JWTAuth, PasswordHandler
+from percefons.application.services import (
+    JWTAuth,
+    PasswordHandler,
+    AsyncPasswordHandler
+)
+from percefons.application.utils import await_call
+
+LOGGER = logging.getLogger(__name__)
+
+# Password verified when the user does not exist, so that an unknown
+# username costs the same time as a wrong password:
+DUMMY_PASSWORD = "percefons-dummy-password"
 
 
 class Login:
@@ -12,6 +24,9 @@ class Login:
         status: Literal['F', 'S']
         tokens: dict = None
 
+    # Hash of the dummy password, computed on the first unknown username:
+    dummy_hash: str = None
+
     def __init__(
         self,
         user_repository: UserRepository,
@@ -25,14 +40,74 @@ class Login:
     def execute(self, username: str, password: str) -> Result:
         user = self.user_repository.get_by_username(username)
         if not user:
+            if Login.dummy_hash is None:
+                Login.dummy_hash = self.ph.get_password_hash(DUMMY_PASSWORD)
+            self.ph.verify_password(password, Login.dummy_hash)
             raise AuthenticationError("Username/password is incorrect.")
         pw_verif = self.ph.verify_password(password, user.hashed_password)
         if not pw_verif:
             raise AuthenticationError("Username/password is incorrect.")
+        if self.ph.needs_update(user.hashed_password):
+            self.rehash(user.id, password)
 
         tokens = self.jwt_service.get_auth(str(user.id))
         return self.Result(status='S', tokens=tokens)
 
+    def rehash(self, user_id: int, password: str):
+        """
+        Replaces the hash of the password, computed with another scheme
+        or cost than the current ones. The login succeeds even if it fails.
+        """
+        try:
+            hashed_password = self.ph.get_password_hash(password)
+            self.user_repository.update_password(user_id, hashed_password)
+        except Exception as e:
+            LOGGER.warning(f"Rehash of the password of the user {user_id} "
+                           f"failed: {e}")
+
+
+class AsyncLogin(Login):
+    """
+    Login use case which awaits the password verification, so that
+    the expensive hashing work is done outside of the event loop.
+    """
+
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        password_handler: AsyncPasswordHandler,
+        jwt_service: JWTAuth
+    ):
+        super().__init__(user_repository, password_handler, jwt_service)
+
+    async def execute(self, username: str, password: str) -> Login.Result:
+        user = await await_call(self.user_repository.get_by_username,
+                                username)
+        if not user:
+            if Login.dummy_hash is None:
+                Login.dummy_hash = await self.ph.get_password_hash(
+                    DUMMY_PASSWORD)
+            await self.ph.verify_password(password, Login.dummy_hash)
+            raise AuthenticationError("Username/password is incorrect.")
+        pw_verif = await self.ph.verify_password(password,
+                                                 user.hashed_password)
+        if not pw_verif:
+            raise AuthenticationError("Username/password is incorrect.")
+        if self.ph.needs_update(user.hashed_password):
+            await self.rehash(user.id, password)
+
+        tokens = self.jwt_service.get_auth(str(user.id))
+        return self.Result(status='S', tokens=tokens)
+
+    async def rehash(self, user_id: int, password: str):
+        try:
+            hashed_password = await self.ph.get_password_hash(password)
+            await await_call(self.user_repository.update_password,
+                             user_id, hashed_password)
+        except Exception as e:
+            LOGGER.warning(f"Rehash of the password of the user {user_id} "
+                           f"failed: {e}")
+
 
 class LoginCommand:
     def __init__(self, ops: Login):
@@ -47,3 +122,12 @@ class LoginCommand:
     def execute(self) -> Login.Result:
         result = self.operation.execute(self.username, self.password)
         return result
+
+
+class AsyncLoginCommand(LoginCommand):
+    def __init__(self, ops: AsyncLogin):
+        super().__init__(ops)
+
+    async def execute(self) -> Login.Result:
+        result = await self.operation.execute(self.username, self.password)
+        return result
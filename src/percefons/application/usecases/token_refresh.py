@@ -0,0 +1,104 @@
+import time
+import logging
+from dataclasses import dataclass
+
+from percefons.application.exceptions import AuthenticationError
+from percefons.application.services import JWTAuth, TokenRevocationStore
+from percefons.application.utils import await_call
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TokenRefresh:
+    """
+    Exchange of a refresh token against new tokens. The refresh token is
+    revoked when it is used (rotation); when a revoked refresh token is
+    used again, it was stolen or replayed, so its whole family is revoked.
+
+    :param family_ttl: The maximum lifetime of a refresh token, during
+      which a revoked family must be remembered, in seconds.
+    """
+
+    @dataclass
+    class Result:
+        tokens: dict
+
+    def __init__(
+        self,
+        jwt_service: JWTAuth,
+        revocation_store: TokenRevocationStore,
+        family_ttl: float
+    ):
+        self.jwt_service = jwt_service
+        self.revocation_store = revocation_store
+        self.family_ttl = family_ttl
+
+    def verify(self, refresh_token: str) -> dict:
+        result = self.jwt_service.verify_refresh_token(refresh_token)
+        if result.status != JWTAuth.SUCCESS:
+            raise AuthenticationError("The refresh token is invalid.")
+        payload = result.payload
+        if not payload.get("jti") or not payload.get("fam"):
+            raise AuthenticationError("The refresh token is invalid.")
+        return payload
+
+    def reuse_detected(self, payload: dict) -> AuthenticationError:
+        LOGGER.warning("Reuse of the refresh token " + payload["jti"]
+                       + " of the user " + str(payload["sub"]) + ".")
+        return AuthenticationError("The refresh token is revoked.")
+
+    def execute(self, refresh_token: str) -> Result:
+        payload = self.verify(refresh_token)
+        store = self.revocation_store
+        if store.is_revoked(payload["fam"]):
+            raise AuthenticationError("The refresh token is revoked.")
+        if not store.revoke(payload["jti"], payload["exp"]):
+            store.revoke(payload["fam"], time.time() + self.family_ttl)
+            raise self.reuse_detected(payload)
+
+        tokens = self.jwt_service.get_auth(payload["sub"], payload["fam"])
+        return self.Result(tokens=tokens)
+
+
+class AsyncTokenRefresh(TokenRefresh):
+    """
+    Token refresh use case which runs the blocking calls of the
+    revocation store outside of the event loop.
+    """
+
+    async def execute(self, refresh_token: str) -> TokenRefresh.Result:
+        payload = self.verify(refresh_token)
+        store = self.revocation_store
+        if await await_call(store.is_revoked, payload["fam"]):
+            raise AuthenticationError("The refresh token is revoked.")
+        if not await await_call(store.revoke, payload["jti"],
+                                payload["exp"]):
+            await await_call(store.revoke, payload["fam"],
+                             time.time() + self.family_ttl)
+            raise self.reuse_detected(payload)
+
+        tokens = self.jwt_service.get_auth(payload["sub"], payload["fam"])
+        return self.Result(tokens=tokens)
+
+
+class TokenRefreshCommand:
+    def __init__(self, ops: TokenRefresh):
+        self.operation = ops
+        self.refresh_token = None
+
+    def validate(self):
+        if not self.refresh_token:
+            raise AuthenticationError("The refresh token is invalid.")
+
+    def execute(self) -> TokenRefresh.Result:
+        result = self.operation.execute(self.refresh_token)
+        return result
+
+
+class AsyncTokenRefreshCommand(TokenRefreshCommand):
+    def __init__(self, ops: AsyncTokenRefresh):
+        super().__init__(ops)
+
+    async def execute(self) -> TokenRefresh.Result:
+        result = await self.operation.execute(self.refresh_token)
+        return result
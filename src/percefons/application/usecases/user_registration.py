@@ -14,7 +14,11 @@ from dataclasses import dataclass
 
 from percefons.domain.entities.user import User
 from percefons.domain.repositories import UserRepository
-from percefons.application.services import PasswordHandler
+from percefons.application.services import (
+    PasswordHandler,
+    AsyncPasswordHandler
+)
+from percefons.application.utils import await_call
 from percefons.application.exceptions import (
     UserIsAlreadyExists,
     InvalidCommandError
@@ -41,11 +45,12 @@ class UserRegistration:
     def execute(self, username: str, password: str, email: str = None):
         """
         :raises UserIsAlreadyExists: When the user with this username
-          is already exists.
+          or this email is already exists.
         """
-        # Verify if the new user is already exists in database:
-        existing_user = self.user_repository.get_by_username(username)
-        if existing_user is not None:
+        # Verify if the new user is already exists in database, before
+        # hashing its password:
+        if self.user_repository.exists_by_username_or_email(username,
+                                                            email):
             raise UserIsAlreadyExists(code="user_registration_error")
 
         password_hashed = self.password_handler.get_password_hash(password)
@@ -57,7 +62,63 @@ class UserRegistration:
             created_at=datetime.now(),
         )
         user_instance.activate()
-        user_instance = self.user_repository.create(user_instance)
+        try:
+            user_instance = self.user_repository.create(user_instance)
+        except UserIsAlreadyExists as e:
+            # Registered concurrently, after the verification:
+            raise UserIsAlreadyExists(code="user_registration_error") from e
+        LOGGER.info("A new user account with " + username + " is created.")
+        LOGGER.debug("User ID: " + str(user_instance.id))
+
+        result = self.Result(
+            userid=user_instance.id,
+            username=username,
+            created_at=user_instance.created_at
+        )
+        return result
+
+
+class AsyncUserRegistration(UserRegistration):
+    """
+    User registration use case which awaits the password hashing, so that
+    the expensive hashing work is done outside of the event loop.
+    """
+
+    def __init__(
+        self,
+        user_repository: UserRepository,
+        password_handler: AsyncPasswordHandler
+    ):
+        super().__init__(user_repository, password_handler)
+
+    async def execute(self, username: str, password: str, email: str = None):
+        """
+        :raises UserIsAlreadyExists: When the user with this username
+          or this email is already exists.
+        """
+        # Verify if the new user is already exists in database, before
+        # hashing its password:
+        if await await_call(self.user_repository.exists_by_username_or_email,
+                            username, email):
+            raise UserIsAlreadyExists(code="user_registration_error")
+
+        password_hashed = await self.password_handler.get_password_hash(
+            password
+        )
+
+        user_instance = User(
+            username=username,
+            hashed_password=password_hashed,
+            email=email,
+            created_at=datetime.now(),
+        )
+        user_instance.activate()
+        try:
+            user_instance = await await_call(self.user_repository.create,
+                                             user_instance)
+        except UserIsAlreadyExists as e:
+            # Registered concurrently, after the verification:
+            raise UserIsAlreadyExists(code="user_registration_error") from e
         LOGGER.info("A new user account with " + username + " is created.")
         LOGGER.debug("User ID: " + str(user_instance.id))
 
@@ -104,3 +165,20 @@ class UserRegistrationCommand:
             email=self.email
         )
         return result
+
+
+class AsyncUserRegistrationCommand(UserRegistrationCommand):
+    def __init__(self, ops: AsyncUserRegistration):
+        super().__init__(ops)
+
+    async def execute(self) -> UserRegistration.Result:
+        """
+        :raises UserIsAlreadyExists: When the user with this username
+          is already exists.
+        """
+        result = await self.operation.execute(
+            username=self.username,
+            password=self.password,
+            email=self.email
+        )
+        return result
@@ -0,0 +1,17 @@
+import asyncio
+import inspect
+
+
+async def await_call(func, *args, **kwargs):
+    """
+    Call a function from a coroutine. If the function is a coroutine
+    function it is awaited, otherwise it is executed in a worker thread
+    so that a blocking call (e.g. a synchronous repository method)
+    never blocks the event loop.
+
+    :param func: The function or coroutine function to call.
+    :returns: The value returned by the function.
+    """
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await asyncio.to_thread(func, *args, **kwargs)
@@ -0,0 +1,261 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import typing as t
+from dataclasses import dataclass
+
+from percefons.core import settings
+
+# Module whose import starts the application:
+APP_MODULE = 'percefons.main'
+
+# Script run in a fresh interpreter, which prints the durations of the
+# import of the application and of its bootstrap, in seconds:
+_STARTUP_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter() - start
+from percefons.infrastructure.bootstrap import bootstrap
+steps = bootstrap(create_tables=False)
+print(json.dumps({{"import": imported, "bootstrap": steps}}))
+'''
+
+
+@dataclass
+class ImportTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+@dataclass
+class StartupReport:
+    import_duration: float
+    bootstrap: t.Dict[str, float]
+    imports: t.List[ImportTime]
+
+    def slowest(self, count: int, depth: int = 1) -> t.List[ImportTime]:
+        """Returns the slowest imports down to this depth."""
+        imports = [imp for imp in self.imports if imp.depth <= depth]
+        imports.sort(key=lambda imp: imp.cumulative_us, reverse=True)
+        return imports[:count]
+
+
+def parse_import_times(output: str) -> t.List[ImportTime]:
+    """Parses the output of `python -X importtime`."""
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        module = name.lstrip()
+        depth = (len(name) - len(module) - 1) // 2
+        imports.append(ImportTime(module, int(fields[0]), int(fields[1]),
+                                  depth))
+    return imports
+
+
+def imported_by(imports: t.List[ImportTime], module: str
+                ) -> t.List[ImportTime]:
+    """
+    Returns the imports of the top-level import of `module`, which come
+    before it in the output of `python -X importtime`.
+    """
+    end = start = next(i for i, imp in enumerate(imports)
+                       if imp.depth == 0 and imp.module == module)
+    while start > 0 and imports[start - 1].depth > 0:
+        start -= 1
+    return imports[start:end + 1]
+
+
+def check_startup(module: str = APP_MODULE) -> StartupReport:
+    """
+    Imports the application in a fresh interpreter and measures the
+    duration of the import of each module and of the bootstrap steps.
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c',
+         _STARTUP_SCRIPT.format(module=module)],
+        capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"The import of {module} failed:\n"
+                           + process.stderr)
+    durations = json.loads(process.stdout.strip().splitlines()[-1])
+    return StartupReport(
+        import_duration=durations["import"],
+        bootstrap=durations["bootstrap"],
+        imports=imported_by(parse_import_times(process.stderr), module),
+    )
+
+
+def print_report(report: StartupReport, top: int = 15):
+    print(f"Import of {APP_MODULE}: {report.import_duration * 1000:.1f} ms")
+    print("\nSlowest imports (cumulative, self):")
+    for imp in report.slowest(top, depth=2):
+        print(f"  {imp.cumulative_us / 1000:8.1f} ms"
+              f" {imp.self_us / 1000:8.1f} ms  {'  ' * imp.depth}{imp.module}")
+    print("\nBootstrap:")
+    for step, duration in report.bootstrap.items():
+        print(f"  {duration * 1000:8.1f} ms  {step}")
+
+
+def update_env_file(path: str, values: t.Dict[str, t.Any]):
+    """
+    Writes the settings in an environment file, replacing their current
+    definitions and keeping the other lines.
+    """
+    lines = []
+    if os.path.isfile(path):
+        with open(path) as file:
+            lines = file.read().splitlines()
+    remaining = dict(values)
+    for i, line in enumerate(lines):
+        name = line.split('=', 1)[0].strip()
+        if '=' in line and name in remaining:
+            lines[i] = f"{name}={remaining.pop(name)}"
+    lines.extend(f"{name}={value}" for name, value in remaining.items())
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+
+def calibrate_hashing(args: argparse.Namespace):
+    from percefons.infrastructure.services.password_handler import calibrate
+    try:
+        calibrated, duration = calibrate(args.scheme, args.target_ms)
+    except RuntimeError as e:
+        sys.exit(str(e))
+    print(f"Verification in {duration * 1000:.1f} ms "
+          f"(target: {args.target_ms:g} ms):")
+    for name, value in calibrated.items():
+        print(f"{name}={value}")
+    if args.write:
+        update_env_file(args.write, calibrated)
+        print(f"Written in {args.write}.")
+
+
+def export_users(output: t.BinaryIO, batch_size: int) -> int:
+    """
+    Writes all the users and their permissions in NDJSON, one batch at
+    a time, and returns the number of users written.
+    """
+    from percefons.infrastructure.db.session import new_session
+    from percefons.infrastructure.repositories.user_export import (
+        iter_user_batches
+    )
+    from percefons.interfaces.api.responses import dumps_lines
+    count = 0
+    with new_session() as db:
+        for batch in iter_user_batches(db, batch_size):
+            output.write(dumps_lines(batch))
+            count += len(batch)
+    return count
+
+
+def export_users_command(args: argparse.Namespace):
+    start = time.perf_counter()
+    if args.output == '-':
+        count = export_users(sys.stdout.buffer, args.batch_size)
+        sys.stdout.flush()
+    else:
+        with open(args.output, 'wb') as file:
+            count = export_users(file, args.batch_size)
+    duration = time.perf_counter() - start
+    # The summary goes to stderr, out of the exported lines:
+    print(f"Exported {count} users in {duration:.2f} s "
+          f"({count / duration if duration else 0:.0f} users/s).",
+          file=sys.stderr)
+
+
+def parse_args(argv: t.List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='percefons', description="Percefon's server tools."
+    )
+    parser.add_argument(
+        '--check-startup', action='store_true',
+        help="Report the import times of the application."
+    )
+    parser.add_argument(
+        '--top', type=int, default=15,
+        help="The number of slowest imports reported."
+    )
+    parser.add_argument(
+        '--budget', type=float, default=None,
+        help="Fail if the import of the application takes longer, "
+             "in seconds."
+    )
+    commands = parser.add_subparsers(dest='command')
+    serve_parser = commands.add_parser(
+        'serve', help="Run the production server (SERVER_* settings)."
+    )
+    serve_parser.add_argument('--host', default=None)
+    serve_parser.add_argument('--port', type=int, default=None)
+    serve_parser.add_argument(
+        '--workers', type=int, default=None,
+        help="The number of worker processes (default: one per CPU)."
+    )
+    calibrate_parser = commands.add_parser(
+        'calibrate-hashing',
+        help="Select the password hashing cost of this host."
+    )
+    calibrate_parser.add_argument(
+        '--scheme', choices=['bcrypt', 'argon2'],
+        default=settings.PASSWORD_HASH_SCHEME
+    )
+    calibrate_parser.add_argument(
+        '--target-ms', type=float, default=settings.PASSWORD_VERIFY_TARGET_MS,
+        help="The longest duration of a password verification."
+    )
+    calibrate_parser.add_argument(
+        '--write', default=None, metavar='ENV_FILE',
+        help="Write the settings in this environment file, e.g. .env."
+    )
+    export_parser = commands.add_parser(
+        'export-users',
+        help="Export the users and their permissions in NDJSON."
+    )
+    export_parser.add_argument(
+        '--output', '-o', default='-',
+        help="The file written, by default the standard output."
+    )
+    export_parser.add_argument(
+        '--batch-size', type=int, default=settings.EXPORT_BATCH_SIZE,
+        help="The number of rows fetched at a time."
+    )
+    args = parser.parse_args(argv)
+    if not args.check_startup and args.command is None:
+        parser.error("No command given, use serve, calibrate-hashing, "
+                     "export-users or --check-startup.")
+    return args
+
+
+def main(argv: t.List[str] = None):
+    """Main function of the `percefons` command."""
+    args = parse_args(argv)
+    if args.command == 'serve':
+        from percefons.server import serve
+        serve(host=args.host, port=args.port, workers=args.workers)
+        return
+    if args.command == 'calibrate-hashing':
+        calibrate_hashing(args)
+        return
+    if args.command == 'export-users':
+        export_users_command(args)
+        return
+    report = check_startup()
+    print_report(report, args.top)
+    if args.budget is not None and report.import_duration > args.budget:
+        print(f"\nThe import exceeds the budget of {args.budget} s.")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,59 @@
 import os
-import logging
-import logging.config
 
-LOGGING_CONFIG = "logging.conf"
-
-if os.path.isfile(LOGGING_CONFIG):
-    logging.config.fileConfig(LOGGING_CONFIG)
+# Applied at startup, by the application lifespan and the commands:
+LOGGING_CONFIG: str = os.getenv('LOGGING_CONFIG', "logging.conf")
 
 APP_NAME: str = os.getenv('APP_NAME', "PERCEFON'S SERVER" )
 VERSION: str = os.getenv('VERSION', '0.1.0')
 API_V1_PREFIX: str = os.getenv('API_PREFIX', "/api/v1")
-DEBUG: bool = bool(os.getenv('DEBUG', 'True'))
+# `start` runs a single reloading process in debug mode, otherwise the
+# production server:
+DEBUG: bool = os.getenv('DEBUG', 'False').lower() in ('1', 'true', 'yes')
 
 DATABASE_URL: str = os.getenv('DATABASE_URL', "sqlite:///./rag.db")
+# Create the missing tables at startup (disable it in production, where
+# the schema is managed by `init-db` and the migrations):
+DATABASE_CREATE_TABLES: bool = (
+    os.getenv('DATABASE_CREATE_TABLES', 'True').lower()
+    in ('1', 'true', 'yes'))
+# Use the asyncio engine (aiosqlite/asyncpg) and the async repositories:
+DATABASE_ASYNC: bool = (
+    os.getenv('DATABASE_ASYNC', 'False').lower() in ('1', 'true', 'yes'))
+# Async driver URL, derived from DATABASE_URL when it is not defined:
+ASYNC_DATABASE_URL: str = os.getenv('ASYNC_DATABASE_URL', "")
+
+# Connection pool (per worker process)
+DATABASE_POOL_SIZE: int = int(os.getenv('DATABASE_POOL_SIZE', 5))
+DATABASE_MAX_OVERFLOW: int = int(os.getenv('DATABASE_MAX_OVERFLOW', 10))
+DATABASE_POOL_TIMEOUT: float = float(os.getenv('DATABASE_POOL_TIMEOUT', 30))
+# Seconds after which a connection is replaced (-1 to never recycle):
+DATABASE_POOL_RECYCLE: int = int(os.getenv('DATABASE_POOL_RECYCLE', 1800))
+# Liveness check on checkout: "always" pings on every checkout, "idle"
+# only pings connections idle for more than DATABASE_POOL_PING_IDLE
+# seconds and "never" disables the check.
+DATABASE_POOL_PRE_PING: str = os.getenv('DATABASE_POOL_PRE_PING', "idle")
+DATABASE_POOL_PING_IDLE: float = float(
+    os.getenv('DATABASE_POOL_PING_IDLE', 30))
+
+# Read replicas (comma-separated URLs): the SELECT statements of the
+# sessions which have not written are run on them in turn. A replica is
+# skipped while it is down or lags by more than DATABASE_REPLICA_MAX_LAG
+# seconds, as measured every DATABASE_REPLICA_CHECK_INTERVAL seconds by
+# DATABASE_REPLICA_LAG_QUERY (by default, the query of the dialect).
+DATABASE_REPLICA_URLS: str = os.getenv('DATABASE_REPLICA_URLS', "")
+DATABASE_REPLICA_MAX_LAG: float = float(
+    os.getenv('DATABASE_REPLICA_MAX_LAG', 5))
+DATABASE_REPLICA_CHECK_INTERVAL: float = float(
+    os.getenv('DATABASE_REPLICA_CHECK_INTERVAL', 10))
+DATABASE_REPLICA_LAG_QUERY: str = os.getenv('DATABASE_REPLICA_LAG_QUERY', "")
+
+# Listings (/users, /permissions): default and highest page sizes.
+LIST_PAGE_SIZE: int = int(os.getenv('LIST_PAGE_SIZE', 50))
+LIST_MAX_PAGE_SIZE: int = int(os.getenv('LIST_MAX_PAGE_SIZE', 500))
+
+# Rows fetched at a time from the server-side cursor of the streamed
+# user exports (/users/export and `percefons export-users`):
+EXPORT_BATCH_SIZE: int = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
 
 JWT_ACCESS_SECRET: str = os.getenv('JWT_ACCESS_SECRET', "change-me")
 JWT_REFRESH_SECRET: str = os.getenv('JWT_REFRESH_SECRET', "change-me2")
@@ -20,6 +61,110 @@ ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 1  # 60 min x 1 -> 1h;
 REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 48  # 60 min x 48h -> 2 days;
 JWT_ALG: str = os.getenv('JWT_ALG', "HS256")
 
+# Signing keys of the access tokens when JWT_ALG is RS256 or EdDSA (the
+# refresh tokens stay signed with JWT_REFRESH_SECRET). The public keys
+# are published on /.well-known/jwks.json, cached JWKS_MAX_AGE seconds.
+# JWT_KEYS_DIR must be shared storage (e.g. a shared volume) mounted by
+# all the workers and hosts: a server whose directory is not shared
+# cannot verify the tokens signed by the others.
+JWT_KEYS_DIR: str = os.getenv('JWT_KEYS_DIR', "./jwt_keys")
+JWT_KEY_ROTATION_DAYS: float = float(os.getenv('JWT_KEY_ROTATION_DAYS', 30))
+JWKS_MAX_AGE: int = int(os.getenv('JWKS_MAX_AGE', 3600))
+
+# Revoked refresh tokens: "memory" (per process) or "database" (shared
+# by the workers); the expired entries are deleted every
+# TOKEN_REVOCATION_COMPACT_INTERVAL seconds.
+TOKEN_REVOCATION_STORE: str = os.getenv('TOKEN_REVOCATION_STORE', "database")
+TOKEN_REVOCATION_COMPACT_INTERVAL: float = float(
+    os.getenv('TOKEN_REVOCATION_COMPACT_INTERVAL', 300))
+
+# Verified access token cache (size 0 disables the cache)
+JWT_CACHE_SIZE: int = int(os.getenv('JWT_CACHE_SIZE', 10000))
+JWT_CACHE_TTL: int = int(os.getenv('JWT_CACHE_TTL', 60 * 5))
+
+# Permission codes cache, per user (size 0 disables the cache)
+PERMISSION_CACHE_SIZE: int = int(os.getenv('PERMISSION_CACHE_SIZE', 10000))
+PERMISSION_CACHE_TTL: int = int(os.getenv('PERMISSION_CACHE_TTL', 60))
+
+# In-memory filter of the existing usernames. Each process keeps its own
+# filter, which loads the users created by the other processes every
+# USERNAME_FILTER_REFRESH seconds. A username missing from the filter is
+# trusted to not exist while the last load started less than
+# USERNAME_FILTER_MAX_STALENESS seconds ago; a staler filter is first
+# refreshed, by one load shared by the concurrent lookups.
+USERNAME_FILTER_ENABLED: bool = (
+    os.getenv('USERNAME_FILTER_ENABLED', 'False').lower()
+    in ('1', 'true', 'yes'))
+USERNAME_FILTER_CAPACITY: int = int(
+    os.getenv('USERNAME_FILTER_CAPACITY', 1000000))
+USERNAME_FILTER_ERROR_RATE: float = float(
+    os.getenv('USERNAME_FILTER_ERROR_RATE', 0.01))
+USERNAME_FILTER_REFRESH: float = float(
+    os.getenv('USERNAME_FILTER_REFRESH', 5))
+USERNAME_FILTER_MAX_STALENESS: float = float(
+    os.getenv('USERNAME_FILTER_MAX_STALENESS', 10))
+# The loads select the users created from USERNAME_FILTER_OVERLAP seconds
+# before the newest one seen (transactions committed late, clock skew):
+USERNAME_FILTER_OVERLAP: float = float(
+    os.getenv('USERNAME_FILTER_OVERLAP', 60))
+
+# Password hashing process pool
+PASSWORD_HASH_WORKERS: int = int(
+    os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE_SIZE: int = int(
+    os.getenv('PASSWORD_HASH_QUEUE_SIZE', 64))
+# When the pool and its queue are full: "reject" answers 429 immediately,
+# "wait" waits up to PASSWORD_HASH_WAIT_TIMEOUT seconds for a free slot.
+PASSWORD_HASH_BACKPRESSURE: str = os.getenv(
+    'PASSWORD_HASH_BACKPRESSURE', "reject")
+PASSWORD_HASH_WAIT_TIMEOUT: float = float(
+    os.getenv('PASSWORD_HASH_WAIT_TIMEOUT', 2.0))
+PASSWORD_HASH_RETRY_AFTER: int = int(
+    os.getenv('PASSWORD_HASH_RETRY_AFTER', 1))
+
+# Password hashing scheme ("bcrypt" or "argon2", which requires
+# argon2-cffi) and its cost, tuned to the host by
+# `percefons calibrate-hashing`. The hashes of the other scheme or cost
+# are still verified, and replaced on the next successful login.
+PASSWORD_HASH_SCHEME: str = os.getenv('PASSWORD_HASH_SCHEME', "bcrypt")
+PASSWORD_BCRYPT_ROUNDS: int = int(os.getenv('PASSWORD_BCRYPT_ROUNDS', 12))
+PASSWORD_ARGON2_TIME_COST: int = int(
+    os.getenv('PASSWORD_ARGON2_TIME_COST', 2))
+# Memory used by a hash, in KiB:
+PASSWORD_ARGON2_MEMORY_COST: int = int(
+    os.getenv('PASSWORD_ARGON2_MEMORY_COST', 65536))
+PASSWORD_ARGON2_PARALLELISM: int = int(
+    os.getenv('PASSWORD_ARGON2_PARALLELISM', 2))
+# Duration of a password verification aimed at by the calibration:
+PASSWORD_VERIFY_TARGET_MS: float = float(
+    os.getenv('PASSWORD_VERIFY_TARGET_MS', 250))
+
+# Login throttling (token buckets per client IP and per username and
+# client IP). The store is "memory" (per process) or "sqlite" (shared by
+# the workers of a host through the LOGIN_RATE_LIMIT_STORE_PATH file).
+# The bursts must be at least 1 and the rates per minute positive.
+# Behind a reverse proxy, the client IP is the one of the proxy unless
+# SERVER_PROXY_HEADERS is enabled and SERVER_FORWARDED_ALLOW_IPS lists
+# the proxy addresses.
+LOGIN_RATE_LIMIT_ENABLED: bool = (
+    os.getenv('LOGIN_RATE_LIMIT_ENABLED', 'True').lower()
+    in ('1', 'true', 'yes'))
+LOGIN_RATE_LIMIT_STORE: str = os.getenv('LOGIN_RATE_LIMIT_STORE', "memory")
+LOGIN_RATE_LIMIT_STORE_PATH: str = os.getenv(
+    'LOGIN_RATE_LIMIT_STORE_PATH', "./rate_limits.db")
+LOGIN_RATE_LIMIT_IP_BURST: int = int(
+    os.getenv('LOGIN_RATE_LIMIT_IP_BURST', 30))
+LOGIN_RATE_LIMIT_IP_PER_MINUTE: float = float(
+    os.getenv('LOGIN_RATE_LIMIT_IP_PER_MINUTE', 60))
+LOGIN_RATE_LIMIT_USER_BURST: int = int(
+    os.getenv('LOGIN_RATE_LIMIT_USER_BURST', 10))
+LOGIN_RATE_LIMIT_USER_PER_MINUTE: float = float(
+    os.getenv('LOGIN_RATE_LIMIT_USER_PER_MINUTE', 5))
+
+# Request and stage latency metrics, exposed on /metrics
+METRICS_ENABLED: bool = (
+    os.getenv('METRICS_ENABLED', 'False').lower() in ('1', 'true', 'yes'))
+
 # CORS
 CORS_ORIGINS: str = os.getenv('CORS_ORIGINS', "*")
 
@@ -33,3 +178,25 @@ CORS_ORIGINS: str = os.getenv('CORS_ORIGINS', "*")
 # OPENAI_API_KEY: Optional[str] = None
 # OPENAI_MODEL: str = "gpt-4o-mini"
 # HF_MODEL: str = "gpt2"  # Fallback tiny model
+
+# Production server (`percefons serve`). SERVER_WORKERS=0 starts one
+# worker per available CPU; "auto" selects uvloop and httptools when they
+# are installed:
+SERVER_HOST: str = os.getenv('SERVER_HOST', "0.0.0.0")
+SERVER_PORT: int = int(os.getenv('SERVER_PORT', 8080))
+SERVER_WORKERS: int = int(os.getenv('SERVER_WORKERS', 0))
+SERVER_LOOP: str = os.getenv('SERVER_LOOP', "auto")
+SERVER_HTTP: str = os.getenv('SERVER_HTTP', "auto")
+SERVER_KEEP_ALIVE: int = int(os.getenv('SERVER_KEEP_ALIVE', 5))
+SERVER_BACKLOG: int = int(os.getenv('SERVER_BACKLOG', 2048))
+# Seconds given to the requests in progress on shutdown:
+SERVER_GRACEFUL_TIMEOUT: int = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30))
+# Maximum number of connections per worker (0 for no limit):
+SERVER_LIMIT_CONCURRENCY: int = int(os.getenv('SERVER_LIMIT_CONCURRENCY', 0))
+# Read the client IP from the X-Forwarded-For header of the proxies of
+# SERVER_FORWARDED_ALLOW_IPS (comma separated IPs or networks, "*" for
+# all; never expose the server directly when it is "*"):
+SERVER_PROXY_HEADERS: bool = (
+    os.getenv('SERVER_PROXY_HEADERS', 'False').lower() in ('1', 'true', 'yes'))
+SERVER_FORWARDED_ALLOW_IPS: str = os.getenv(
+    'SERVER_FORWARDED_ALLOW_IPS', "127.0.0.1")
@@ -22,4 +22,12 @@ class InvalidNameError(InvalidFieldError):
 
 
 class InvalidUserPasswordError(InvalidFieldError):
-    ...
+    def __init__(
+        self,
+        message: str,
+        code: str,
+        field: str,
+        errors: list = None
+    ):
+        super().__init__(message, code, field)
+        self.errors = errors if errors is not None else []
@@ -1,5 +1,6 @@
 import typing as t
 from abc import ABC, abstractmethod
+from datetime import datetime
 
 from .entities.user import User
 from .entities.permission import Permission
@@ -14,8 +15,53 @@ class UserRepository(ABC):
     def get_by_email(self, email: str) -> t.Optional[User]:
         ...
 
+    @abstractmethod
+    def exists_by_username_or_email(
+        self,
+        username: str,
+        email: str = None
+    ) -> bool:
+        ...
+
     @abstractmethod
     def create(self, user: User) -> User:
+        """
+        :raises UserIsAlreadyExists: When the username or the email
+          is already used.
+        """
+        ...
+
+    @abstractmethod
+    def create_many(self, users: t.List[User]) -> t.List[User]:
+        ...
+
+    @abstractmethod
+    def update_password(self, user_id: int, hashed_password: str):
+        ...
+
+    @abstractmethod
+    def get_with_permissions(self, user_id: int) -> t.Optional[User]:
+        ...
+
+    @abstractmethod
+    def list_with_permissions(
+        self,
+        user_ids: t.Iterable[int]
+    ) -> t.List[User]:
+        ...
+
+    @abstractmethod
+    def list_page(
+        self,
+        limit: int,
+        after: t.Optional[t.Tuple[datetime, int]] = None,
+        is_active: t.Optional[bool] = None,
+        is_staff: t.Optional[bool] = None
+    ) -> t.List[User]:
+        """
+        Returns at most `limit` users, from the newest to the oldest by
+        (`created_at`, `id`), which come after the key `after`.
+        """
         ...
 
 
@@ -39,6 +85,18 @@ class PermissionRepository(ABC):
     def all(self) -> t.Iterator[Permission] | None:
         ...
 
+    @abstractmethod
+    def list_page(
+        self,
+        limit: int,
+        after: t.Optional[t.Tuple[str, int]] = None
+    ) -> t.List[Permission]:
+        """
+        Returns at most `limit` permissions, ordered by (`name`, `id`),
+        which come after the key `after`.
+        """
+        ...
+
 
 class UserPermissionRepository(ABC):
     @abstractmethod
@@ -48,3 +106,130 @@ class UserPermissionRepository(ABC):
     @abstractmethod
     def revoke(self, permission: Permission, user: User) -> User:
         ...
+
+    @abstractmethod
+    def get_permission_codes(self, user_id: int) -> t.FrozenSet[str]:
+        ...
+
+    @abstractmethod
+    def grant_many(self, pairs: t.Iterable[t.Tuple[int, int]]) -> int:
+        ...
+
+    @abstractmethod
+    def revoke_many(self, pairs: t.Iterable[t.Tuple[int, int]]) -> int:
+        ...
+
+
+class AsyncUserRepository(ABC):
+    @abstractmethod
+    async def get_by_username(self, username: str) -> t.Optional[User]:
+        ...
+
+    @abstractmethod
+    async def get_by_email(self, email: str) -> t.Optional[User]:
+        ...
+
+    @abstractmethod
+    async def exists_by_username_or_email(
+        self,
+        username: str,
+        email: str = None
+    ) -> bool:
+        ...
+
+    @abstractmethod
+    async def create(self, user: User) -> User:
+        """
+        :raises UserIsAlreadyExists: When the username or the email
+          is already used.
+        """
+        ...
+
+    @abstractmethod
+    async def create_many(self, users: t.List[User]) -> t.List[User]:
+        ...
+
+    @abstractmethod
+    async def update_password(self, user_id: int, hashed_password: str):
+        ...
+
+    @abstractmethod
+    async def get_with_permissions(self, user_id: int) -> t.Optional[User]:
+        ...
+
+    @abstractmethod
+    async def list_with_permissions(
+        self,
+        user_ids: t.Iterable[int]
+    ) -> t.List[User]:
+        ...
+
+    @abstractmethod
+    async def list_page(
+        self,
+        limit: int,
+        after: t.Optional[t.Tuple[datetime, int]] = None,
+        is_active: t.Optional[bool] = None,
+        is_staff: t.Optional[bool] = None
+    ) -> t.List[User]:
+        ...
+
+
+class AsyncPermissionRepository(ABC):
+    @abstractmethod
+    async def get_by_code_name(
+        self,
+        code_name: str
+    ) -> t.Optional[Permission]:
+        ...
+
+    @abstractmethod
+    async def create(self, permission: Permission) -> Permission:
+        ...
+
+    @abstractmethod
+    async def create_all(
+        self,
+        permissions: t.List[Permission]
+    ) -> t.List[Permission] | None:
+        ...
+
+    @abstractmethod
+    async def all(self) -> t.Iterator[Permission] | None:
+        ...
+
+    @abstractmethod
+    async def list_page(
+        self,
+        limit: int,
+        after: t.Optional[t.Tuple[str, int]] = None
+    ) -> t.List[Permission]:
+        ...
+
+
+class AsyncUserPermissionRepository(ABC):
+    @abstractmethod
+    async def grant(self, permission: Permission, user: User) -> User:
+        ...
+
+    @abstractmethod
+    async def revoke(self, permission: Permission, user: User) -> User:
+        ...
+
+    @abstractmethod
+    async def get_permission_codes(self, user_id: int) -> t.FrozenSet[str]:
+        ...
+
+    @abstractmethod
+    async def grant_many(
+        self,
+        pairs: t.Iterable[t.Tuple[int, int]]
+    ) -> int:
+        ...
+
+    @abstractmethod
+    async def revoke_many(
+        self,
+        pairs: t.Iterable[t.Tuple[int, int]]
+    ) -> int:
+        ...
@@ -1,4 +1,10 @@
 import re
+import os
+import typing as t
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .wordlist import SortedWordList
 from .exceptions import (
     InvalidEmailError,
     InvalidUsernameError,
@@ -10,6 +16,63 @@ email_pattern = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 username_pattern = re.compile(r"[a-z_0-9]")
 name_pattern = re.compile(r"[A-Za-z '-]")
 
+# Password policy:
+PASSWORD_MIN_LENGTH = 12
+PASSWORD_MAX_LENGTH = 128
+SPECIAL_CHARS = "!@#$%^&*()_+-=[]{}|;:,.<>?"
+LOWERCASE_CHARS = "abcdefghijklmnopqrstuvwxyz"
+DIGIT_CHARS = "0123456789"
+
+# Translation of each character into the code of its class:
+char_classes = str.maketrans({
+    **{char: 'U' for char in LOWERCASE_CHARS.upper()},
+    **{char: 'L' for char in LOWERCASE_CHARS},
+    **{char: 'D' for char in DIGIT_CHARS},
+    **{char: 'S' for char in SPECIAL_CHARS},
+})
+repeated_chars_pattern = re.compile(r'(.)\1{2,}')
+
+
+def _sequence_pattern(*alphabets: str) -> re.Pattern:
+    """
+    Compiles the pattern of the runs of 3 successive characters of the
+    alphabets, in both directions. The runs are grouped by their first
+    character, which makes the search faster than a flat alternation.
+    """
+    runs = {}
+    for chars in alphabets:
+        for i in range(len(chars) - 2):
+            for run in (chars[i:i + 3], chars[i:i + 3][::-1]):
+                runs.setdefault(run[0], []).append(run[1:])
+    return re.compile('|'.join(
+        f"{first}(?:{'|'.join(ends)})" for first, ends in runs.items()))
+
+
+# Searched in the lowercased password:
+sequence_pattern = _sequence_pattern(LOWERCASE_CHARS, DIGIT_CHARS)
+
+# Common passwords, lowercase; a password matches when it is in the list
+# or when it is still in it once the trailing digits and special
+# characters are stripped and the usual substitutions (p@ssw0rd) are
+# reversed:
+COMMON_PASSWORDS_PATH = os.path.join(
+    os.path.dirname(__file__), 'data', 'common_passwords.txt')
+common_passwords = SortedWordList(COMMON_PASSWORDS_PATH)
+leet_substitutions = str.maketrans('@4310$5!7', 'aaeiossit')
+trailing_symbols_pattern = re.compile(r'[^a-z]+$')
+
+
+def is_common_password(lowered: str) -> bool:
+    """
+    Returns True if the password, lowercased, is derived from a common
+    password.
+    """
+    if lowered in common_passwords:
+        return True
+    stripped = trailing_symbols_pattern.sub('', lowered)
+    decoded = stripped.translate(leet_substitutions)
+    return decoded != lowered and decoded in common_passwords
+
 
 def validate_email(value: str):
     """
@@ -62,6 +125,54 @@ def validate_name(value: str, field_name: str='name'):
         )
 
 
+def password_violations(value: str) -> t.List[t.Tuple[str, str]]:
+    """
+    Function which checks a password against the password policy (see
+    `validate_user_password`). The characters are classified in one pass
+    with `str.translate`, and the other checks use precompiled patterns.
+
+    :returns: The list of the violations, as (code, message) pairs.
+    """
+    violations = []
+    if len(value) < PASSWORD_MIN_LENGTH:
+        violations.append((
+            'too_short',
+            "Password must be at least 12 characters long."))
+    if len(value) > PASSWORD_MAX_LENGTH:
+        violations.append((
+            'too_long',
+            "Password must not exceed 128 characters."))
+        # The following checks are not worth running on a long input:
+        return violations
+
+    classes = value.translate(char_classes)
+    for class_code, class_name in (('U', "uppercase letters"),
+                                   ('L', "lowercase letters"),
+                                   ('D', "digits"),
+                                   ('S', "special characters")):
+        if classes.count(class_code) < 2:
+            violations.append((
+                'missing_' + class_name.replace(' ', '_'),
+                f"Password must contain at least 2 {class_name}."))
+
+    if repeated_chars_pattern.search(value):
+        violations.append((
+            'repeated_characters',
+            "Password cannot contain more than 2 consecutive identical "
+            "characters."))
+    lowered = value.lower()
+    if sequence_pattern.search(lowered):
+        violations.append((
+            'sequential_characters',
+            "Password cannot contain sequential characters "
+            "(abc, 123, etc.)."))
+    if is_common_password(lowered):
+        violations.append((
+            'common_password',
+            "Password is too common."))
+    return violations
+
+
 def validate_user_password(value: str):
     """
     Validation function implemented to validate a user password.
@@ -76,61 +187,133 @@ def validate_user_password(value: str):
       - No sequential characters (abc, 123, etc.);
       - Not in common password list.
 
-    :raises InvalidUserPasswordError:
+    :raises InvalidUserPasswordError: With all the violations of the
+      policy in its `errors`.
     """
-    # Check length constraints
-    if len(value) < 12:
-        raise InvalidUserPasswordError(
-            "Password must be at least 12 characters long.",
-            code='input_error',
-            field='password'
-        )
-    if len(value) > 128:
+    violations = password_violations(value)
+    if violations:
         raise InvalidUserPasswordError(
-            "Password must not exceed 128 characters.",
+            " ".join(message for _, message in violations),
             code='input_error',
-            field='password'
-        )
-    # Check for uppercase letters (minimum 2):
-    uppercase_count = len(re.findall(r'[A-Z]', value))
-    if uppercase_count < 2:
-        raise InvalidUserPasswordError(
-            "Password must contain at least 2 uppercase letters.",
-            code='input_error',
-            field='password'
-        )
-    # Check for lowercase letters (minimum 2):
-    lowercase_count = len(re.findall(r'[a-z]', value))
-    if lowercase_count < 2:
-        raise InvalidUserPasswordError(
-            "Password must contain at least 2 lowercase letters.",
-            code='input_error',
-            field='password'
-        )
-    # Check for digits (minimum 2):
-    digit_count = len(re.findall(r'[0-9]', value))
-    if digit_count < 2:
-        raise InvalidUserPasswordError(
-            "Password must contain at least 2 digits.",
-            code='input_error',
-            field='password'
-        )
-    # Check for special characters (minimum 2):
-    special_chars = "!@#$%^&*()_+-=[]{}|;:,.<>?"
-    special_count = len(
-        re.findall(f'[{re.escape(special_chars)}]', value)
-    )
-    if special_count < 2:
-        raise InvalidUserPasswordError(
-            "Password must contain at least 2 special characters.",
-            code='input_error',
-            field='password'
-        )
-    # Check for consecutive repeated characters (no more than 2):
-    if re.search(r'(.)\1{2,}', value):
-        raise InvalidUserPasswordError(
-            "Password cannot contain more than 2 consecutive identical "
-            "characters.",
-            code='input_error',
-            field='password'
+            field='password',
+            errors=[{'code': code, 'message': message}
+                    for code, message in violations]
         )
+
+
+# Batch validation. Each check takes a column of values and returns the
+# (row index, error codes) pairs of its invalid values; the empty values
+# are not checked, the caller deciding which fields are required.
+
+def check_emails(values: t.Sequence) -> t.List[t.Tuple[int, tuple]]:
+    match = email_pattern.match
+    return [(row, ('invalid_email',)) for row, value in enumerate(values)
+            if value and not match(value)]
+
+
+def check_usernames(values: t.Sequence) -> t.List[t.Tuple[int, tuple]]:
+    match = username_pattern.match
+    return [(row, ('username_with_space',) if ' ' in value
+             else ('invalid_username',))
+            for row, value in enumerate(values)
+            if value and (' ' in value or not match(value))]
+
+
+def check_names(values: t.Sequence) -> t.List[t.Tuple[int, tuple]]:
+    match = name_pattern.match
+    return [(row, ('invalid_name',)) for row, value in enumerate(values)
+            if value and not match(value)]
+
+
+def check_passwords(values: t.Sequence) -> t.List[t.Tuple[int, tuple]]:
+    errors = []
+    for row, value in enumerate(values):
+        if value:
+            violations = password_violations(value)
+            if violations:
+                errors.append((row, tuple(code for code, _ in violations)))
+    return errors
+
+
+COLUMN_CHECKS = {
+    'email': check_emails,
+    'username': check_usernames,
+    'name': check_names,
+    'password': check_passwords,
+}
+# Kind of value of the fields validated by default:
+DEFAULT_BATCH_FIELDS = {
+    'username': 'username',
+    'email': 'email',
+    'password': 'password',
+    'first_name': 'name',
+    'last_name': 'name',
+}
+
+
+@dataclass
+class BatchValidationReport:
+    """
+    Errors of a batch of records: `errors` maps the index of each invalid
+    row to its (field, error code) pairs; the valid rows are not listed.
+    """
+    size: int
+    errors: t.Dict[int, t.List[t.Tuple[str, str]]] = field(
+        default_factory=dict)
+
+    @property
+    def valid_count(self) -> int:
+        return self.size - len(self.errors)
+
+    def is_valid(self, row: int) -> bool:
+        return row not in self.errors
+
+    def counts(self) -> t.Counter:
+        """Returns the number of errors of each (field, error code)."""
+        return Counter(error for row_errors in self.errors.values()
+                       for error in row_errors)
+
+
+def validate_batch(
+    records: t.Union[t.Iterable[t.Mapping], t.Mapping[str, t.Sequence]],
+    fields: t.Mapping[str, str] = None
+) -> BatchValidationReport:
+    """
+    Validation function implemented to validate a batch of records at
+    once, without raising an exception per invalid record. Each field is
+    checked on its whole column, with the patterns bound once.
+
+    :param records: The records, either as an iterable of mappings, or as
+      a mapping of columns (field name -> sequence of values).
+    :param fields: The fields to validate, mapped to the kind of their
+      values ('email', 'username', 'name' or 'password'). By default,
+      `DEFAULT_BATCH_FIELDS`; the fields absent from the records
+      are ignored.
+    :returns: The report of the errors, by row index.
+    """
+    fields = DEFAULT_BATCH_FIELDS if fields is None else fields
+    if isinstance(records, t.Mapping):
+        columns = {name: records[name] for name in fields if name in records}
+        size = max((len(column) for column in columns.values()), default=0)
+    else:
+        if not isinstance(records, t.Sequence):
+            records = list(records)
+        size = len(records)
+        columns = {name: [record.get(name) for record in records]
+                   for name in fields}
+
+    report = BatchValidationReport(size=size)
+    for name, column in columns.items():
+        not_strings = [row for row, value in enumerate(column)
+                       if value and not isinstance(value, str)]
+        if not_strings:
+            column = list(column)
+            for row in not_strings:
+                column[row] = None
+                report.errors.setdefault(row, []).append(
+                    (name, 'not_a_string'))
+        check = COLUMN_CHECKS[fields[name]]
+        for row, codes in check(column):
+            row_errors = report.errors.setdefault(row, [])
+            row_errors.extend((name, code) for code in codes)
+    return report
@@ -0,0 +1,61 @@
+import os
+import mmap
+
+
+class SortedWordList:
+    """
+    Read-only list of words stored in a file, one word per line, sorted
+    bytewise. A small file is loaded into a set; a larger one is
+    memory-mapped and searched by bisection, so that it costs no memory
+    and no load time. The offsets of the first word of each initial byte
+    are indexed when the list is opened, to shorten the bisections.
+
+    :param path: The path to the file of the words.
+    :param max_loaded_size: The size, in bytes, up to which the file is
+      loaded into memory.
+    """
+
+    def __init__(self, path: str, max_loaded_size: int = 1 << 20):
+        self.path = path
+        self._map = None
+        self._words = None
+        size = os.path.getsize(path)
+        if size <= max_loaded_size:
+            with open(path, encoding='utf-8') as file:
+                self._words = frozenset(file.read().split('\n')) - {''}
+            return
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index = [self._lower_bound(bytes([byte]), 0, size)
+                       for byte in range(256)] + [size]
+
+    def _lower_bound(self, target: bytes, low: int, high: int) -> int:
+        """
+        Returns the offset of the first line, between the line starting
+        at `low` and the offset `high`, which is not lower than `target`.
+        """
+        data = self._map
+        while low < high:
+            middle = (low + high) // 2
+            start = data.rfind(b'\n', low, middle) + 1 or low
+            end = data.find(b'\n', start, high)
+            if end == -1:
+                end = high
+            if data[start:end] < target:
+                low = end + 1
+            else:
+                high = start
+        return low
+
+    def __contains__(self, word: str) -> bool:
+        if self._words is not None:
+            return word in self._words
+        if not word:
+            return False
+        target = word.encode('utf-8')
+        first = target[0]
+        low, high = self._index[first], self._index[first + 1]
+        offset = self._lower_bound(target, low, high)
+        end = offset + len(target)
+        return (self._map[offset:end] == target
+                and (end == len(self._map) or self._map[end] == 10))
@@ -0,0 +1,48 @@
+import math
+import hashlib
+import threading
+
+
+class BloomFilter:
+    """
+    Thread-safe Bloom filter of strings. A negative answer is certain,
+    a positive answer is wrong with a probability of about `error_rate`
+    while the number of items stays below `capacity`.
+
+    :param capacity: The expected number of items.
+    :param error_rate: The accepted rate of false positives.
+    """
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.num_bits = max(8, math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(
+            self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def _positions(self, item: str):
+        # Double hashing: the k positions are derived from two hashes.
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16)
+        digest = digest.digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        positions = list(self._positions(item))
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
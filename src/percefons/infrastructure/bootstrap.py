@@ -0,0 +1,45 @@
+import os
+import time
+import logging
+import logging.config
+import typing as t
+
+from percefons.core import settings
+from percefons.infrastructure.db import session
+
+_logging_configured = False
+
+
+def configure_logging(path: str = settings.LOGGING_CONFIG) -> bool:
+    """
+    Configures the logging from the file of the settings, once.
+
+    :returns: True if the logging was configured by this call.
+    """
+    global _logging_configured
+    if _logging_configured or not os.path.isfile(path):
+        return False
+    logging.config.fileConfig(path, disable_existing_loggers=False)
+    _logging_configured = True
+    return True
+
+
+def bootstrap(
+    create_tables: bool = settings.DATABASE_CREATE_TABLES
+) -> t.Dict[str, float]:
+    """
+    Runs the startup work deferred out of the imports: the logging
+    configuration, the creation of the database engine and, in
+    development, of the missing tables.
+
+    :returns: The duration of each step, in seconds.
+    """
+    steps = [('logging', configure_logging), ('engine', session.get_engine)]
+    if create_tables:
+        steps.append(('tables', session.create_tables))
+    durations = {}
+    for name, step in steps:
+        start = time.perf_counter()
+        step()
+        durations[name] = time.perf_counter() - start
+    return durations
@@ -0,0 +1,92 @@
+import time
+import threading
+import typing as t
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe, bounded LRU cache whose entries expire after a time
+    to live. Each entry can also be given its own expiration date,
+    in which case the earliest of the two dates is used.
+
+    :param maxsize: The maximum number of entries kept in the cache.
+    :param ttl: The time to live of an entry, in seconds.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: t.Hashable, default: t.Any = None) -> t.Any:
+        """
+        Returns the value cached for this key, or `default` if there is
+        no entry or if the entry is expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: t.Hashable,
+        value: t.Any,
+        expires_at: float = None
+    ):
+        """
+        Put a value into the cache.
+
+        :param key: The key of the entry.
+        :param value: The value to cache.
+        :param expires_at: Optional timestamp after which the entry must
+          not be returned anymore, even if its TTL is not elapsed.
+        """
+        if self.maxsize <= 0:
+            return
+        deadline = time.time() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            self._data[key] = (value, deadline)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: t.Hashable) -> bool:
+        """Remove an entry. Returns True if the entry was cached."""
+        with self._lock:
+            return self._data.pop(key, None) is not None
+
+    def clear(self):
+        """Remove all the entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """Returns the counters of the cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
@@ -0,0 +1,114 @@
+import importlib
+import typing as t
+from itertools import islice
+
+from sqlalchemy import Table
+
+# Number of rows sent in one statement. It keeps the number of bound
+# parameters of a statement under the limits of SQLite and PostgreSQL.
+BULK_CHUNK_SIZE = 2000
+
+# The dialects are imported on first use, the PostgreSQL one being slow
+# to import:
+_DIALECT_INSERTS = {
+    'postgresql': 'sqlalchemy.dialects.postgresql',
+    'sqlite': 'sqlalchemy.dialects.sqlite',
+}
+
+
+def chunked(iterable: t.Iterable, size: int = BULK_CHUNK_SIZE):
+    """
+    Split an iterable into lists of at most `size` items, without
+    loading the whole iterable into memory.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def supports_on_conflict(dialect_name: str) -> bool:
+    """Tells whether the INSERT of the dialect has `ON CONFLICT` clauses."""
+    return dialect_name in _DIALECT_INSERTS
+
+
+def new_rows(
+    rows: t.Iterable[dict],
+    taken: t.Dict[t.Tuple[str, ...], t.Iterable[tuple]]
+) -> t.List[dict]:
+    """
+    Returns the rows which an `INSERT ... ON CONFLICT DO NOTHING` would
+    insert, for the dialects without `ON CONFLICT`: the rows whose
+    unique keys are not taken yet, the first row of a key being kept.
+
+    :param rows: The rows to insert, as dictionaries.
+    :param taken: The existing values of each unique key, as tuples,
+      indexed by the tuple of the columns of the key. A key with a NULL
+      value never conflicts.
+    """
+    taken = {columns: set(map(tuple, values))
+             for columns, values in taken.items()}
+    kept = []
+    for row in rows:
+        keys = [(columns, tuple(row[column] for column in columns))
+                for columns in taken]
+        keys = [(columns, key) for columns, key in keys if None not in key]
+        if any(key in taken[columns] for columns, key in keys):
+            continue
+        for columns, key in keys:
+            taken[columns].add(key)
+        kept.append(row)
+    return kept
+
+
+def dialect_insert(table: Table, dialect_name: str):
+    """
+    Returns the INSERT construct of the dialect, which supports
+    the `ON CONFLICT` clauses.
+
+    :raises NotImplementedError: If the dialect is not supported.
+    """
+    if not supports_on_conflict(dialect_name):
+        raise NotImplementedError(
+            "The bulk insertions are not supported on the "
+            f"\"{dialect_name}\" database."
+        )
+    module = importlib.import_module(_DIALECT_INSERTS[dialect_name])
+    return module.insert(table)
+
+
+def insert_ignore(table: Table, dialect_name: str):
+    """
+    Builds an `INSERT ... ON CONFLICT DO NOTHING` statement.
+
+    :param table: The table, or the ORM model, in which to insert.
+    :param dialect_name: The name of the database dialect.
+    """
+    return dialect_insert(table, dialect_name).on_conflict_do_nothing()
+
+
+def upsert(
+    table: Table,
+    dialect_name: str,
+    values: t.List[dict],
+    index_elements: t.List[str],
+    update_columns: t.List[str]
+):
+    """
+    Builds an `INSERT ... ON CONFLICT (index_elements) DO UPDATE`
+    statement, which updates the `update_columns` of the existing rows.
+
+    :param table: The table, or the ORM model, in which to insert.
+    :param dialect_name: The name of the database dialect.
+    :param values: The rows to insert, as dictionaries.
+    :param index_elements: The columns of the unique constraint.
+    :param update_columns: The columns updated on conflict.
+    """
+    stmt = dialect_insert(table, dialect_name).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: stmt.excluded[column] for column in update_columns}
+    )
+    return stmt
@@ -2,3 +2,4 @@ from .base import BaseModel
 from .user_perms import user_permission_association
 from .user import UserModel
 from .permission import PermissionModel
+from .revoked_token import RevokedTokenModel
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, Index
 from sqlalchemy.orm import relationship
 
 from .base import BaseModel
@@ -7,6 +7,10 @@ from .user_perms import user_permission_association
 
 class PermissionModel(BaseModel):
     __tablename__ = 'permissions'
+    __table_args__ = (
+        # Keyset pagination:
+        Index('ix_permissions_name_id', 'name', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), nullable=False)
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, String, Float
+
+from .base import BaseModel
+
+
+class RevokedTokenModel(BaseModel):
+    __tablename__ = 'revoked_tokens'
+
+    # ID of a token (jti) or of a refresh token family:
+    token_id = Column(String(64), primary_key=True)
+    # POSIX timestamp after which the row can be deleted:
+    expires_at = Column(Float, nullable=False, index=True)
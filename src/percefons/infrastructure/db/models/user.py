@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 
 # from sqlalchemy.dialects.postgresql import JSONB
@@ -10,15 +10,25 @@ from .user_perms import user_permission_association
 
 class UserModel(BaseModel):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination, without filter and with the is_active or
+        # is_staff filter:
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+        Index('ix_users_is_active_created_at_id',
+              'is_active', 'created_at', 'id'),
+        Index('ix_users_is_staff_created_at_id',
+              'is_staff', 'created_at', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, nullable=False, index=True)
     hashed_password = Column(String(255), nullable=False)
-    email = Column(String(255), nullable=True, index=True)
+    email = Column(String(255), nullable=True, unique=True, index=True)
     is_active = Column(Boolean, default=False)
     is_staff = Column(Boolean, default=False)
     is_superuser = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.now)
+    # Never NULL, as it is a key of the pages of users:
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
 
     permissions = relationship(
         argument="PermissionModel",
@@ -0,0 +1,138 @@
+import time
+import logging
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from percefons.core import settings
+from percefons.infrastructure.metrics import Histogram
+
+LOGGER = logging.getLogger(__name__)
+PRE_PING_STRATEGIES = ('always', 'idle', 'never')
+
+
+class TimedPoolMixin:
+    """
+    Mixin for the queue pools which records in a histogram the time
+    spent waiting for a connection at checkout.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_time = Histogram()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_time.observe(time.perf_counter() - start)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_time = self.wait_time
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    ...
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    ...
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """
+    This function builds the keyword arguments of `create_engine` or
+    `create_async_engine` from the connection pool settings.
+
+    :param url: The database URL.
+    :param is_async: Set to True for an asyncio engine.
+    :returns: A dictionary of engine options.
+    """
+    if settings.DATABASE_POOL_PRE_PING not in PRE_PING_STRATEGIES:
+        raise ValueError(
+            "The DATABASE_POOL_PRE_PING setting must be one of "
+            f"{PRE_PING_STRATEGIES}, not "
+            f"\"{settings.DATABASE_POOL_PRE_PING}\"."
+        )
+    options = {
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING == 'always',
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+    }
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database in (
+            None, '', ':memory:'):
+        # In memory databases use a single connection per thread:
+        return options
+    options.update(
+        poolclass=TimedAsyncQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+    )
+    return options
+
+
+def install_idle_ping(engine: Engine, idle_time: float = None):
+    """
+    Ping a connection at checkout only when it has been idle in the
+    pool for more than `idle_time` seconds, instead of on every checkout.
+    A connection which fails the ping is replaced by a new one.
+
+    :param engine: The synchronous engine (`AsyncEngine.sync_engine`
+      for an asyncio engine).
+    :param idle_time: The idle time in seconds, by default
+      the DATABASE_POOL_PING_IDLE setting.
+    """
+    if idle_time is None:
+        idle_time = settings.DATABASE_POOL_PING_IDLE
+
+    @event.listens_for(engine, 'checkin')
+    def _on_checkin(_dbapi_connection, connection_record):
+        connection_record.info['checkin_time'] = time.monotonic()
+
+    @event.listens_for(engine, 'checkout')
+    def _on_checkout(dbapi_connection, connection_record, _proxy):
+        checkin_time = connection_record.info.get('checkin_time')
+        if checkin_time is None:
+            return
+        if time.monotonic() - checkin_time < idle_time:
+            return
+        try:
+            alive = engine.dialect.do_ping(dbapi_connection)
+        except Exception as e:
+            LOGGER.warning("Database connection ping failed: " + str(e))
+            alive = False
+        if not alive:
+            # The pool retries the checkout with a new connection:
+            raise exc.DisconnectionError()
+
+
+def configure_engine(engine: Engine):
+    """Install the event listeners of the configured pre-ping strategy."""
+    if settings.DATABASE_POOL_PRE_PING == 'idle':
+        install_idle_ping(engine)
+
+
+def pool_statistics(engine: Engine) -> dict:
+    """
+    Returns the live statistics of the connection pool of an engine.
+
+    :param engine: The synchronous engine (`AsyncEngine.sync_engine`
+      for an asyncio engine).
+    """
+    pool = engine.pool
+    stats = {"pool": pool.__class__.__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    wait_time = getattr(pool, 'wait_time', None)
+    if wait_time is not None:
+        stats["wait_time"] = wait_time.snapshot()
+    return stats
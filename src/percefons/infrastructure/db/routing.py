@@ -0,0 +1,150 @@
+import logging
+import itertools
+import typing as t
+from dataclasses import dataclass
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+LOGGER = logging.getLogger(__name__)
+
+# Queries which return the replication lag of a replica, in seconds:
+LAG_QUERIES = {
+    'postgresql': (
+        "SELECT COALESCE(EXTRACT(EPOCH FROM now() "
+        "- pg_last_xact_replay_timestamp()), 0)"
+    ),
+}
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: Engine
+    healthy: bool = True
+    lag: float = 0.0
+
+
+class ReplicaSet:
+    """
+    The read replicas of the primary database, used in turn. A replica
+    is left out when a connection to it fails, until a check succeeds,
+    and when its replication lag exceeds `max_lag` seconds.
+
+    :param engines: The engines of the replicas.
+    :param max_lag: The highest replication lag of a used replica.
+    :param lag_query: The query returning the lag of a replica, in
+      seconds; by default the one of its dialect, if any.
+    """
+
+    def __init__(
+        self,
+        engines: t.List[Engine],
+        max_lag: float,
+        lag_query: str = None
+    ):
+        self.replicas = [
+            Replica(engine.url.render_as_string(hide_password=True), engine)
+            for engine in engines
+        ]
+        self.max_lag = max_lag
+        self.lag_query = lag_query
+        self._counter = itertools.count()
+        for replica in self.replicas:
+            self._watch_errors(replica)
+
+    def _watch_errors(self, replica: Replica):
+        @event.listens_for(replica.engine, 'handle_error')
+        def _on_error(context):
+            # Connection failures, not the errors of the statements:
+            if context.is_disconnect or context.connection is None:
+                self.mark_failed(replica)
+
+    @property
+    def engines(self) -> t.List[Engine]:
+        return [replica.engine for replica in self.replicas]
+
+    def mark_failed(self, replica: Replica):
+        if replica.healthy:
+            LOGGER.warning(f"Database replica {replica.name} is down.")
+        replica.healthy = False
+
+    def choose(self) -> t.Optional[Engine]:
+        """
+        Returns the engine of the next usable replica, or None when the
+        reads must go to the primary.
+        """
+        count = len(self.replicas)
+        start = next(self._counter)
+        for i in range(count):
+            replica = self.replicas[(start + i) % count]
+            if replica.healthy and replica.lag <= self.max_lag:
+                return replica.engine
+        return None
+
+    def check(self):
+        """Pings the replicas and measures their replication lag."""
+        for replica in self.replicas:
+            lag_query = self.lag_query
+            if lag_query is None:
+                lag_query = LAG_QUERIES.get(replica.engine.dialect.name)
+            try:
+                with replica.engine.connect() as connection:
+                    if lag_query:
+                        replica.lag = float(
+                            connection.scalar(text(lag_query)) or 0)
+                    else:
+                        connection.scalar(text("SELECT 1"))
+            except DBAPIError as e:
+                self.mark_failed(replica)
+                LOGGER.debug(f"Check of the replica {replica.name}: {e}")
+                continue
+            if not replica.healthy:
+                LOGGER.info(f"Database replica {replica.name} is up.")
+            replica.healthy = True
+            if replica.lag > self.max_lag:
+                LOGGER.warning(f"Database replica {replica.name} lags by "
+                               f"{replica.lag:.1f} s.")
+
+    def statistics(self) -> t.List[dict]:
+        return [{"name": replica.name, "healthy": replica.healthy,
+                 "lag": replica.lag} for replica in self.replicas]
+
+
+class RoutingSession(Session):
+    """
+    Session which runs the SELECT statements on a replica, and the
+    writes and the flushes on the primary. Once it has written, the
+    session only uses the primary, so that it reads its own writes.
+
+    :param primary: The engine of the primary database.
+    :param replicas: The replicas; the session uses one of them.
+    """
+
+    def __init__(
+        self,
+        primary: Engine = None,
+        replicas: ReplicaSet = None,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replicas = replicas
+        self.uses_primary = replicas is None
+        self._replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if not self.uses_primary and not self._flushing \
+                and isinstance(clause, Select) \
+                and clause._for_update_arg is None:
+            if self._replica is None:
+                self._replica = self.replicas.choose()
+            if self._replica is not None:
+                return self._replica
+            return self.primary
+        if clause is not None or self._flushing:
+            self.uses_primary = True
+        return self.primary
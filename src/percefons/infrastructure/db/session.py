@@ -1,17 +1,236 @@
+import os
+import threading
+import typing as t
+
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine, create_async_engine, async_sessionmaker
+)
 from percefons.core import settings
 from .models import BaseModel
+from .pool import engine_options, configure_engine
+from .routing import ReplicaSet, RoutingSession
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    This function allows to convert a database URL into the URL
+    of the asyncio driver of the same database.
+
+    :param url: The database URL, e.g. `sqlite:///./rag.db`.
+    :returns: The async database URL, e.g. `sqlite+aiosqlite:///./rag.db`.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(
+            f"No asyncio driver is configured for the \"{backend}\" "
+            "database. Define the ASYNC_DATABASE_URL setting."
+        )
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url.render_as_string(hide_password=False)
+
+
+_engine = None
+_local_session = None
+_primary_session = None
+_replicas = None
+_async_engine = None
+_async_local_session = None
+_async_replicas = None
+_async_replica_engines = []
+_lock = threading.Lock()
+
+
+def replica_urls() -> t.List[str]:
+    """Returns the URLs of the read replicas of the settings."""
+    return [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(',')
+            if url.strip()]
+
+
+def _replica_set(engines: t.List[Engine]) -> ReplicaSet:
+    for engine in engines:
+        configure_engine(engine)
+    return ReplicaSet(engines, settings.DATABASE_REPLICA_MAX_LAG,
+                      settings.DATABASE_REPLICA_LAG_QUERY or None)
+
+
+def get_engine() -> Engine:
+    """
+    Returns the database engine, created on the first call, so that
+    importing the application does not connect to the database.
+    """
+    global _engine, _local_session, _primary_session, _replicas
+    if _engine is None:
+        with _lock:
+            if _engine is None:
+                url = str(settings.DATABASE_URL)
+                engine = create_engine(url, **engine_options(url))
+                configure_engine(engine)
+                urls = replica_urls()
+                if urls:
+                    _replicas = _replica_set([
+                        create_engine(url, **engine_options(url))
+                        for url in urls
+                    ])
+                    _local_session = sessionmaker(
+                        class_=RoutingSession, primary=engine,
+                        replicas=_replicas, autoflush=False
+                    )
+                    _primary_session = sessionmaker(
+                        autocommit=False, autoflush=False, bind=engine
+                    )
+                else:
+                    _local_session = sessionmaker(
+                        autocommit=False, autoflush=False, bind=engine
+                    )
+                    _primary_session = _local_session
+                _engine = engine
+    return _engine
+
+
+def get_session_factory() -> sessionmaker:
+    """Returns the factory of the sessions of the database engine."""
+    get_engine()
+    return _local_session
+
+
+def get_async_engine() -> t.Optional[AsyncEngine]:
+    """
+    Returns the asyncio database engine, created on the first call,
+    or None when the asyncio driver is disabled.
+    """
+    global _async_engine, _async_local_session, _async_replicas
+    if not settings.DATABASE_ASYNC:
+        return None
+    if _async_engine is None:
+        with _lock:
+            if _async_engine is None:
+                url = (settings.ASYNC_DATABASE_URL
+                       or to_async_url(str(settings.DATABASE_URL)))
+                engine = create_async_engine(
+                    url, **engine_options(url, is_async=True)
+                )
+                configure_engine(engine.sync_engine)
+                urls = [to_async_url(url) for url in replica_urls()]
+                if urls:
+                    _async_replica_engines.extend(
+                        create_async_engine(
+                            url, **engine_options(url, is_async=True))
+                        for url in urls
+                    )
+                    _async_replicas = _replica_set([
+                        replica.sync_engine
+                        for replica in _async_replica_engines
+                    ])
+                    _async_local_session = async_sessionmaker(
+                        sync_session_class=RoutingSession,
+                        primary=engine.sync_engine, replicas=_async_replicas,
+                        autoflush=False, expire_on_commit=False
+                    )
+                else:
+                    _async_local_session = async_sessionmaker(
+                        bind=engine, autoflush=False, expire_on_commit=False
+                    )
+                _async_engine = engine
+    return _async_engine
+
+
+def get_async_session_factory() -> t.Optional[async_sessionmaker]:
+    """Returns the factory of the sessions of the asyncio engine."""
+    get_async_engine()
+    return _async_local_session
+
+
+def get_replica_sets() -> t.Tuple[t.Optional[ReplicaSet],
+                                   t.Optional[ReplicaSet]]:
+    """
+    Returns the replicas of the engine and of the asyncio engine, None
+    when they are not created or not configured.
+    """
+    return _replicas, _async_replicas
+
+
+def __getattr__(name: str):
+    # The engines and the session factories, created on first access:
+    if name == 'engine':
+        return get_engine()
+    if name == 'LocalSession':
+        return get_session_factory()
+    if name == 'async_engine':
+        return get_async_engine()
+    if name == 'AsyncLocalSession':
+        return get_async_session_factory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _dispose_inherited_engines():
+    # A forked worker must not use the connections of its parent: its
+    # engines get new pools, and the inherited connections are left open
+    # for the parent.
+    if _engine is not None:
+        _engine.dispose(close=False)
+    if _async_engine is not None:
+        _async_engine.sync_engine.dispose(close=False)
+    for replicas in (_replicas, _async_replicas):
+        if replicas is not None:
+            for engine in replicas.engines:
+                engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_inherited_engines)
+
+
+def new_session() -> Session:
+    """Returns a new session of the database engine."""
+    return get_session_factory()()
+
+
+def new_primary_session() -> Session:
+    """
+    Returns a new session which runs all its statements on the primary
+    database, for the reads which must see the latest writes of the
+    other workers (e.g. the token revocations), whatever the lag of
+    the replicas.
+    """
+    get_engine()
+    return _primary_session()
+
+
+def create_tables():
+    """Creates the tables of the models which do not exist yet."""
+    BaseModel.metadata.create_all(bind=get_engine())
+
+
+async def dispose_engines():
+    """Closes the connections of the engines which were created."""
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    for engine in _async_replica_engines:
+        await engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+    if _replicas is not None:
+        for engine in _replicas.engines:
+            engine.dispose()
 
-engine = create_engine(str(settings.DATABASE_URL), pool_pre_ping=True)
-LocalSession = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
-    db = LocalSession()
+    db = new_session()
     try:
         yield db
     finally:
         db.close()
 
 
-BaseModel.metadata.create_all(bind=engine)
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
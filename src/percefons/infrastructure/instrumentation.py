@@ -0,0 +1,73 @@
+import logging
+import inspect
+
+from percefons.application.usecases import (
+    login,
+    user_registration,
+    token_refresh
+)
+from percefons.infrastructure.metrics import timed
+from percefons.infrastructure.services import password_handler
+from percefons.infrastructure.repositories import (
+    user_repository,
+    permission_repository,
+    user_perm_repository
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# Methods timed as a stage, with the name of their stage:
+STAGES = [
+    (login.Login, 'execute', 'login'),
+    (login.AsyncLogin, 'execute', 'login'),
+    (user_registration.UserRegistration, 'execute', 'user_registration'),
+    (user_registration.AsyncUserRegistration, 'execute',
+     'user_registration'),
+    (token_refresh.TokenRefresh, 'execute', 'token_refresh'),
+    (token_refresh.AsyncTokenRefresh, 'execute', 'token_refresh'),
+    (password_handler.PasswordHandlerImpl, 'get_password_hash',
+     'password_hash'),
+    (password_handler.PasswordHandlerImpl, 'verify_password',
+     'password_verify'),
+    (password_handler.AsyncPasswordHandlerImpl, 'get_password_hash',
+     'password_hash'),
+    (password_handler.AsyncPasswordHandlerImpl, 'verify_password',
+     'password_verify'),
+]
+
+# Repositories whose public methods are all timed:
+REPOSITORIES = [
+    user_repository.UserRepositoryImpl,
+    user_repository.AsyncUserRepositoryImpl,
+    permission_repository.PermissionRepositoryImpl,
+    permission_repository.AsyncPermissionRepositoryImpl,
+    user_perm_repository.UserPermissionRepositoryImpl,
+    user_perm_repository.AsyncUserPermissionRepositoryImpl,
+]
+
+_installed = False
+
+
+def repository_stages():
+    """Returns the (class, method name, stage) of the repository methods."""
+    for cls in REPOSITORIES:
+        for name, attr in vars(cls).items():
+            if name.startswith('_') or not inspect.isfunction(attr):
+                continue
+            stage = 'repository:' + cls.__name__ + '.' + name
+            yield cls, name, stage
+
+
+def install():
+    """
+    Wrap the use cases, the password handlers and the repositories
+    with the stage timers. Nothing is wrapped, so nothing is measured,
+    until this function is called.
+    """
+    global _installed
+    if _installed:
+        return
+    for cls, name, stage in STAGES + list(repository_stages()):
+        setattr(cls, name, timed(stage)(getattr(cls, name)))
+    _installed = True
+    LOGGER.info("Stage timers are installed.")
@@ -0,0 +1,282 @@
+import re
+import csv
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+import typing as t
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from percefons.core import settings
+from percefons.domain import validators
+from percefons.domain.entities import User
+from percefons.domain.exceptions import InvalidFieldError
+from percefons.infrastructure.db.bulk import chunked
+from percefons.infrastructure.bootstrap import bootstrap
+from percefons.infrastructure.db.session import new_session
+from percefons.infrastructure.services import password_handler as ph
+from percefons.infrastructure.repositories import user_repository as ur
+
+LOGGER = logging.getLogger(__name__)
+BCRYPT_HASH_PATTERN = re.compile(r'^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$')
+TRUE_VALUES = ('1', 'true', 'yes', 'y')
+# Passwords sent to a worker process at once; a bcrypt hash is slow
+# enough for this to hide the cost of the inter-process communication:
+HASH_CHUNK_SIZE = 8
+
+
+class ImportReport:
+    def __init__(self, errors_file: t.TextIO = None):
+        self.read = 0
+        self.created = 0
+        self.failed = 0
+        self.errors_file = errors_file
+        self.start = time.perf_counter()
+
+    def error(self, line: int, username: str, message: str):
+        """Report the error of a row."""
+        self.failed += 1
+        LOGGER.warning(
+            "Line " + str(line) + " (" + str(username) + "): " + message
+        )
+        if self.errors_file is not None:
+            self.errors_file.write(json.dumps(
+                {"line": line, "username": username, "message": message}
+            ) + "\n")
+
+    @property
+    def throughput(self) -> float:
+        """Number of rows read per second."""
+        return self.read / max(time.perf_counter() - self.start, 1e-9)
+
+    def __str__(self):
+        return (
+            f"{self.read} row(s) read, {self.created} user(s) created, "
+            f"{self.failed} error(s), {self.throughput:.1f} rows/s."
+        )
+
+
+def read_records(
+    file_path: str,
+    file_format: str,
+    report: ImportReport
+) -> t.Iterator[t.Tuple[int, dict]]:
+    """
+    Read the records of a CSV (with header) or JSONL file one by one,
+    without loading the file into memory. The JSONL lines which are not
+    JSON objects are reported as errors and skipped.
+
+    :returns: An iterator of (line number, record) pairs.
+    """
+    with open(file_path, newline='') as file:
+        if file_format == 'csv':
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_num, line in enumerate(file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    report.read += 1
+                    report.error(line_num, None, "Invalid JSON: " + str(e))
+                    continue
+                if not isinstance(record, dict):
+                    report.read += 1
+                    report.error(line_num, None,
+                                 "The record is not a JSON object.")
+                    continue
+                yield line_num, record
+
+
+def parse_bool(value: t.Any, default: bool) -> bool:
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def text_value(record: dict, name: str) -> t.Optional[str]:
+    """
+    Returns a text field of a record.
+
+    :raises InvalidFieldError: When the value is not a string.
+    """
+    value = record.get(name)
+    if value is not None and not isinstance(value, str):
+        raise InvalidFieldError(f"The {name} must be a string.",
+                                code='input_error', field=name)
+    return value
+
+
+def parse_record(
+    record: dict,
+    password_policy: bool = True,
+    check_values: bool = True
+) -> t.Tuple[User, t.Optional[str]]:
+    """
+    Validate a record and build its user entity.
+
+    :param check_values: Whether the username, email and password are
+      validated; they are not when the caller validates them by batch.
+
+    :returns: The user and its plain password, which is None when the
+      record contains an already hashed bcrypt password.
+    :raises InvalidFieldError: When a value of the record is not valid.
+    """
+    username = (text_value(record, 'username') or '').strip()
+    email = (text_value(record, 'email') or '').strip() or None
+    password = text_value(record, 'password') or None
+    hashed_password = text_value(record, 'hashed_password') or None
+
+    if not username:
+        raise InvalidFieldError("The username is required.",
+                                code='input_error', field='username')
+    if check_values:
+        validators.validate_username(username)
+        if email:
+            validators.validate_email(email)
+    if hashed_password:
+        if not BCRYPT_HASH_PATTERN.match(hashed_password):
+            raise InvalidFieldError(
+                "The hashed password is not a bcrypt hash.",
+                code='input_error', field='hashed_password')
+        password = None
+    elif password:
+        if password_policy and check_values:
+            validators.validate_user_password(password)
+    else:
+        raise InvalidFieldError("The password is required.",
+                                code='input_error', field='password')
+
+    created_at = record.get('created_at')
+    user = User(
+        username=username,
+        email=email,
+        hashed_password=hashed_password,
+        created_at=(datetime.fromisoformat(created_at)
+                    if created_at else datetime.now()),
+        is_active=parse_bool(record.get('is_active'), True),
+        is_staff=parse_bool(record.get('is_staff'), False),
+        is_superuser=parse_bool(record.get('is_superuser'), False),
+    )
+    return user, password
+
+
+def import_batch(
+    batch: t.List[t.Tuple[int, dict]],
+    user_repos: ur.UserRepositoryImpl,
+    executor: ProcessPoolExecutor,
+    report: ImportReport,
+    password_policy: bool = True
+):
+    """Validate, hash and insert a batch of records in one transaction."""
+    parsed = []
+    for line, record in batch:
+        report.read += 1
+        try:
+            user, password = parse_record(record, password_policy,
+                                          check_values=False)
+        except (InvalidFieldError, ValueError, TypeError) as e:
+            report.error(line, record.get('username'), str(e))
+            continue
+        parsed.append((line, user, password))
+
+    validation = validators.validate_batch({
+        'username': [user.username for _, user, _ in parsed],
+        'email': [user.email for _, user, _ in parsed],
+        'password': [password if password_policy else None
+                     for _, _, password in parsed],
+    })
+    rows = []
+    for index, (line, user, password) in enumerate(parsed):
+        if validation.is_valid(index):
+            rows.append((line, user, password))
+            continue
+        report.error(line, user.username, "; ".join(
+            f"Invalid {field}: {code}"
+            for field, code in validation.errors[index]))
+
+    to_hash = [(user, password) for _, user, password in rows if password]
+    if to_hash:
+        hashes = executor.map(ph.hash_password,
+                              [password for _, password in to_hash],
+                              chunksize=HASH_CHUNK_SIZE)
+        for (user, _), hashed_password in zip(to_hash, hashes):
+            user.hashed_password = hashed_password
+
+    created = user_repos.create_many([user for _, user, _ in rows])
+    report.created += len(created)
+    for line, user, _ in rows:
+        if user.id is None:
+            report.error(line, user.username, "The user already exists.")
+
+
+def parse_args(argv: t.List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Import users from a CSV or JSONL file. The records "
+                    "have the username, email, password (or "
+                    "hashed_password for bcrypt hashes), and optionally "
+                    "is_active, is_staff, is_superuser and created_at "
+                    "fields."
+    )
+    parser.add_argument('file', help="The CSV or JSONL file to import.")
+    parser.add_argument(
+        '--format', choices=['csv', 'jsonl'], default=None,
+        help="The file format, guessed from the extension by default."
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=1000,
+        help="Number of users inserted per transaction."
+    )
+    parser.add_argument(
+        '--workers', type=int, default=settings.PASSWORD_HASH_WORKERS,
+        help="Number of processes used to hash the passwords."
+    )
+    parser.add_argument(
+        '--errors', default=None,
+        help="A JSONL file in which the errors of the rows are written."
+    )
+    parser.add_argument(
+        '--no-password-policy', action='store_true',
+        help="Do not check the password policy on the plain passwords."
+    )
+    args = parser.parse_args(argv)
+    if args.format is None:
+        args.format = 'csv' if args.file.lower().endswith('.csv') else 'jsonl'
+    return args
+
+
+def main(argv: t.List[str] = None):
+    """Main function to import users from a file."""
+    args = parse_args(argv)
+    bootstrap()
+    session = new_session()
+    user_repos = ur.UserRepositoryImpl(session)
+    errors_file = open(args.errors, 'w') if args.errors else None
+    report = ImportReport(errors_file)
+    executor = ProcessPoolExecutor(
+        max_workers=max(1, args.workers),
+        mp_context=multiprocessing.get_context('spawn')
+    )
+    try:
+        records = read_records(args.file, args.format, report)
+        for batch in chunked(records, max(1, args.batch_size)):
+            import_batch(batch, user_repos, executor, report,
+                         password_policy=not args.no_password_policy)
+            LOGGER.info(str(report))
+
+    except Exception as e:
+        LOGGER.error("Error: " + str(e))
+
+    finally:
+        executor.shutdown()
+        session.close()
+        if errors_file is not None:
+            errors_file.close()
+        LOGGER.info("Import finished: " + str(report))
@@ -1,7 +1,8 @@
 import logging
 
 from percefons.domain.entities import Permission
-from percefons.infrastructure.db.session import LocalSession
+from percefons.infrastructure.bootstrap import bootstrap
+from percefons.infrastructure.db.session import new_session
 from percefons.infrastructure.repositories import permission_repository as pr
 
 LOGGER = logging.getLogger(__name__)
@@ -9,7 +10,8 @@ LOGGER = logging.getLogger(__name__)
 
 def main():
     """Main function will be run to initialize the database."""
-    session = LocalSession()
+    bootstrap(create_tables=True)
+    session = new_session()
     try:
         permissions = [
             Permission("Can view user", "VIEW_USER"),
@@ -22,7 +24,7 @@ def main():
 
         permissions_created = permission_repos.create_all(permissions)
         for perm in permissions_created:
-            LOGGER.info("Permission created: " + str(perm))
+            LOGGER.info("Permission created or updated: " + str(perm))
 
     finally:
         session.close()
@@ -4,7 +4,8 @@ from getpass import getpass
 from percefons.domain.entities import User
 from percefons.domain import validators
 from percefons.infrastructure.services import password_handler as ph
-from percefons.infrastructure.db.session import LocalSession
+from percefons.infrastructure.bootstrap import bootstrap
+from percefons.infrastructure.db.session import new_session
 from percefons.infrastructure.repositories import user_repository as ur
 
 LOGGER = logging.getLogger(__name__)
@@ -12,7 +13,8 @@ LOGGER = logging.getLogger(__name__)
 
 def main():
     """Main function to create the new user as superuser."""
-    session = LocalSession()
+    bootstrap()
+    session = new_session()
     password_handler = ph.PasswordHandlerImpl()
     user_repos = ur.UserRepositoryImpl(session)
     try:
@@ -36,7 +38,7 @@ def main():
         hashed_password = password_handler.get_password_hash(password)
         user_inst = User(
             username=username,
-            email=email,
+            email=email or None,
             hashed_password=hashed_password,
             is_active=True,
             is_staff=True,
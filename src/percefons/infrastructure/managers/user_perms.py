@@ -0,0 +1,102 @@
+import csv
+import time
+import logging
+import argparse
+import itertools
+import typing as t
+
+from percefons.infrastructure.bootstrap import bootstrap
+from percefons.infrastructure.db.session import new_session
+from percefons.infrastructure.repositories import permission_repository as pr
+from percefons.infrastructure.repositories import user_perm_repository as upr
+
+LOGGER = logging.getLogger(__name__)
+
+
+def read_pairs(
+    file_path: str,
+    perm_ids: t.Dict[str, int]
+) -> t.Iterator[t.Tuple[int, int]]:
+    """
+    Read the (user_id, perm_id) pairs from a CSV file, line by line.
+    The file must have a header with the `user_id` column and either
+    the `perm_id` or the `code_name` column.
+
+    :param file_path: The path to the CSV file.
+    :param perm_ids: The permission IDs indexed by code name.
+    """
+    with open(file_path, newline='') as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            user_id = int(row['user_id'])
+            if row.get('perm_id'):
+                yield user_id, int(row['perm_id'])
+            else:
+                yield user_id, perm_ids[row['code_name']]
+
+
+def parse_args(argv: t.List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Grant or revoke permissions to many users at once."
+    )
+    parser.add_argument(
+        'action', choices=['grant', 'revoke'],
+        help="The operation to apply on the (user, permission) pairs."
+    )
+    parser.add_argument(
+        '--users', type=int, nargs='+', default=[],
+        help="The IDs of the users."
+    )
+    parser.add_argument(
+        '--codes', nargs='+', default=[],
+        help="The code names of the permissions, applied to every user."
+    )
+    parser.add_argument(
+        '--file', default=None,
+        help="A CSV file with the user_id and perm_id (or code_name) "
+             "columns."
+    )
+    args = parser.parse_args(argv)
+    if not args.file and not (args.users and args.codes):
+        parser.error("Provide --file, or both --users and --codes.")
+    return args
+
+
+def main(argv: t.List[str] = None):
+    """Main function to grant or revoke permissions in bulk."""
+    args = parse_args(argv)
+    bootstrap()
+    session = new_session()
+    try:
+        permission_repos = pr.PermissionRepositoryImpl(session)
+        user_perm_repos = upr.UserPermissionRepositoryImpl(session)
+        perm_ids = {perm.code_name: perm.id
+                    for perm in permission_repos.all() or []}
+        unknown_codes = [code for code in args.codes if code not in perm_ids]
+        if unknown_codes:
+            raise ValueError(
+                "Unknown permissions: " + ", ".join(unknown_codes)
+            )
+
+        pairs = itertools.product(args.users,
+                                  [perm_ids[code] for code in args.codes])
+        if args.file:
+            pairs = itertools.chain(pairs, read_pairs(args.file, perm_ids))
+
+        start = time.perf_counter()
+        if args.action == 'grant':
+            count = user_perm_repos.grant_many(pairs)
+        else:
+            count = user_perm_repos.revoke_many(pairs)
+        duration = time.perf_counter() - start
+        LOGGER.info(
+            str(count) + " permission(s) " + args.action + "ed in "
+            + f"{duration:.3f}s."
+        )
+
+    except Exception as e:
+        LOGGER.error("Error: " + str(e))
+
+    finally:
+        session.close()
+        LOGGER.info("Database local session is closed.")
@@ -0,0 +1,190 @@
+import time
+import bisect
+import inspect
+import functools
+import threading
+import typing as t
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Thread-safe histogram with fixed upper bounds, in the same way as
+    the Prometheus histograms: each observation is counted in the first
+    bucket whose upper bound is greater than or equal to it.
+
+    :param buckets: The sorted upper bounds of the buckets, in seconds.
+    """
+
+    def __init__(self, buckets: t.Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record an observation."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict:
+        """
+        Returns the state of the histogram, with cumulative bucket counts
+        keyed by their upper bound (`+Inf` for the last one).
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulated = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulated += count
+            label = '+Inf' if bound == float('inf') else str(bound)
+            buckets[label] = cumulated
+        return {"buckets": buckets, "count": cumulated, "sum": total}
+
+    def reset(self):
+        """Remove all the observations."""
+        with self._lock:
+            self._counts = [0] * (len(self.buckets) + 1)
+            self._sum = 0.0
+
+
+def format_labels(labels: t.Iterable[t.Tuple[str, t.Any]]) -> str:
+    """Format the labels of a sample in the Prometheus text format."""
+    labels = list(labels)
+    if not labels:
+        return ''
+    items = []
+    for name, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        items.append(f'{name}="{value}"')
+    return '{' + ','.join(items) + '}'
+
+
+def render_histogram(
+    name: str,
+    snapshot: dict,
+    labels: t.Iterable[t.Tuple[str, t.Any]] = ()
+) -> t.List[str]:
+    """Returns the sample lines of a histogram snapshot."""
+    labels = list(labels)
+    lines = []
+    for bound, count in snapshot["buckets"].items():
+        bucket_labels = format_labels(labels + [('le', bound)])
+        lines.append(f'{name}_bucket{bucket_labels} {count}')
+    lines.append(f'{name}_sum{format_labels(labels)} {snapshot["sum"]}')
+    lines.append(f'{name}_count{format_labels(labels)} {snapshot["count"]}')
+    return lines
+
+
+class MetricsRegistry:
+    """
+    Thread-safe registry of labelled counters and histograms, which can
+    be rendered in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._descriptions = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, metric_type: str, description: str):
+        """Define the type ("counter" or "histogram") and help of a metric."""
+        self._descriptions[name] = (metric_type, description)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Increment a counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record an observation in a histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+        histogram.observe(value)
+
+    def reset(self):
+        """Remove all the samples."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(),
+                                key=lambda item: item[0])
+        lines = []
+        described = set()
+
+        def header(name: str, default_type: str):
+            if name in described:
+                return
+            described.add(name)
+            metric_type, description = self._descriptions.get(
+                name, (default_type, name))
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {metric_type}')
+
+        for (name, labels), value in counters:
+            header(name, 'counter')
+            lines.append(f'{name}{format_labels(labels)} {value}')
+        for (name, labels), histogram in histograms:
+            header(name, 'histogram')
+            lines.extend(render_histogram(name, histogram.snapshot(), labels))
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe('percefons_http_requests_total', 'counter',
+                  "Number of HTTP requests, per route and status code.")
+REGISTRY.describe('percefons_http_request_duration_seconds', 'histogram',
+                  "Latency of the HTTP requests, per route.")
+REGISTRY.describe('percefons_stage_duration_seconds', 'histogram',
+                  "Latency of the use cases, password hashing and "
+                  "repository calls.")
+
+
+def timed(stage: str, registry: MetricsRegistry = REGISTRY):
+    """
+    Decorator which records the duration of each call of a function,
+    or of a coroutine function, in the stage duration histogram.
+
+    :param stage: The value of the `stage` label.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    registry.observe('percefons_stage_duration_seconds',
+                                     time.perf_counter() - start,
+                                     stage=stage)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.observe('percefons_stage_duration_seconds',
+                                 time.perf_counter() - start, stage=stage)
+        return wrapper
+
+    return decorator
@@ -1,9 +1,89 @@
 import typing as t
 
+from sqlalchemy import select, insert, update, bindparam, tuple_
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from percefons.domain.entities.user import Permission
-from percefons.domain.repositories import PermissionRepository
+from percefons.domain.repositories import (
+    PermissionRepository,
+    AsyncPermissionRepository
+)
 from percefons.infrastructure.db.models.permission import PermissionModel
+from percefons.infrastructure.db.bulk import (
+    chunked,
+    upsert,
+    supports_on_conflict
+)
+
+
+def upsert_statement(permissions: t.List[Permission], dialect):
+    """
+    Builds the statement which inserts the permissions, or updates the name
+    of those whose code name already exists. The IDs of all the rows are
+    returned when the dialect supports `INSERT ... RETURNING`.
+    """
+    # A row can not be affected twice by the same statement:
+    values = {perm.code_name: {'name': perm.name, 'code_name': perm.code_name}
+              for perm in permissions}
+    stmt = upsert(PermissionModel.__table__, dialect.name,
+                  values=list(values.values()),
+                  index_elements=['code_name'],
+                  update_columns=['name'])
+    if dialect.insert_returning:
+        stmt = stmt.returning(PermissionModel.code_name, PermissionModel.id)
+    return stmt
+
+
+def fallback_statements(
+    permissions: t.List[Permission],
+    existing: t.Container[str]
+) -> t.List[tuple]:
+    """
+    Builds the statements, with their parameters, which upsert the
+    permissions on the dialects without `ON CONFLICT`: a plain insert of
+    the new code names and an update of the names of the `existing` ones.
+    """
+    values = {perm.code_name: perm.name for perm in permissions}
+    table = PermissionModel.__table__
+    statements = []
+    new_rows = [{'name': name, 'code_name': code_name}
+                for code_name, name in values.items()
+                if code_name not in existing]
+    if new_rows:
+        statements.append((insert(table), new_rows))
+    renamed = [{'b_code_name': code_name, 'b_name': name}
+               for code_name, name in values.items() if code_name in existing]
+    if renamed:
+        stmt = (update(table)
+            .where(table.c.code_name == bindparam('b_code_name'))
+            .values(name=bindparam('b_name')))
+        statements.append((stmt, renamed))
+    return statements
+
+
+def ids_query(permissions: t.List[Permission]):
+    """Builds the query which selects the IDs of the permissions."""
+    code_names = [perm.code_name for perm in permissions]
+    query = (select(PermissionModel.code_name, PermissionModel.id)
+        .where(PermissionModel.code_name.in_(code_names)))
+    return query
+
+
+def permissions_page_query(
+    limit: int,
+    after: t.Optional[t.Tuple[str, int]] = None
+):
+    """
+    Builds the query of a page of permissions, ordered by name. The page
+    starts after the key (`name`, `id`), which the database seeks in the
+    index instead of skipping the previous rows.
+    """
+    query = select(PermissionModel)
+    if after is not None:
+        query = query.where(
+            tuple_(PermissionModel.name, PermissionModel.id) > tuple(after))
+    return (query.order_by(PermissionModel.name, PermissionModel.id)
+        .limit(limit))
 
 
 class PermissionRepositoryImpl(PermissionRepository):
@@ -64,20 +144,40 @@ class PermissionRepositoryImpl(PermissionRepository):
         self,
         permissions: t.List[Permission]
     ) -> t.List[Permission] | None:
-        """Creation of several instances of permission into database."""
+        """
+        Creation of several instances of permission into database, with
+        one upsert statement per chunk. The permissions whose code name
+        already exists are updated, so this method can be run again with
+        the same permissions. The IDs are filled on the entities. The
+        dialects without `ON CONFLICT` select the existing code names,
+        then insert the others.
+        """
         if not permissions:
             return None
-        perm_models = [self.convert_to_permission_model(p)
-                       for p in permissions]
-        self.db.add_all(perm_models)
-        self.db.commit()
+        dialect = self.db.get_bind().dialect
+        perm_ids = {}
+        try:
+            for chunk in chunked(permissions):
+                if supports_on_conflict(dialect.name):
+                    stmt = upsert_statement(chunk, dialect)
+                    result = self.db.execute(stmt)
+                    if dialect.insert_returning:
+                        perm_ids.update(result.all())
+                        continue
+                else:
+                    existing = dict(self.db.execute(ids_query(chunk)).all())
+                    for stmt, params in fallback_statements(chunk, existing):
+                        self.db.execute(stmt, params)
+                perm_ids.update(self.db.execute(ids_query(chunk)).all())
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
 
-        for perm_model, perm in zip(perm_models, permissions):
-            self.db.refresh(perm_model)
-            perm.id = perm_model.id
+        for perm in permissions:
+            perm.id = perm_ids[perm.code_name]
         return permissions
 
-
     def all(self) -> t.Iterator[Permission] | None:
         permission_query = (self.db.query(PermissionModel)
             .order_by(PermissionModel.name))
@@ -86,3 +186,94 @@ class PermissionRepositoryImpl(PermissionRepository):
             return None
         return (self.convert_to_permission_entity(perm)
                 for perm in permissions)
+
+    def list_page(
+        self,
+        limit: int,
+        after: t.Optional[t.Tuple[str, int]] = None
+    ) -> t.List[Permission]:
+        permissions = self.db.scalars(permissions_page_query(limit, after))
+        return [self.convert_to_permission_entity(perm)
+                for perm in permissions]
+
+
+class AsyncPermissionRepositoryImpl(AsyncPermissionRepository):
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.to_permission_model = (
+            PermissionRepositoryImpl.convert_to_permission_model)
+        self.to_permission_entity = (
+            PermissionRepositoryImpl.convert_to_permission_entity)
+
+    async def get_by_code_name(
+        self,
+        code_name: str
+    ) -> t.Optional[Permission]:
+        permission_query = (select(PermissionModel)
+            .where(PermissionModel.code_name == code_name))
+        first_permission = await self.db.scalar(permission_query.limit(1))
+        if not first_permission:
+            return None
+        perm_ent = self.to_permission_entity(first_permission)
+        return perm_ent
+
+    async def create(self, permission: Permission) -> Permission:
+        perm_model_instance = self.to_permission_model(permission)
+        self.db.add(perm_model_instance)
+        await self.db.commit()
+        permission.id = perm_model_instance.id
+        return permission
+
+    async def create_all(
+        self,
+        permissions: t.List[Permission]
+    ) -> t.List[Permission] | None:
+        """
+        Creation of several instances of permission into database, with
+        one upsert statement per chunk (see `PermissionRepositoryImpl`).
+        """
+        if not permissions:
+            return None
+        dialect = self.db.get_bind().dialect
+        perm_ids = {}
+        try:
+            for chunk in chunked(permissions):
+                if supports_on_conflict(dialect.name):
+                    stmt = upsert_statement(chunk, dialect)
+                    result = await self.db.execute(stmt)
+                    if dialect.insert_returning:
+                        perm_ids.update(result.all())
+                        continue
+                else:
+                    result = await self.db.execute(ids_query(chunk))
+                    existing = dict(result.all())
+                    for stmt, params in fallback_statements(chunk, existing):
+                        await self.db.execute(stmt, params)
+                result = await self.db.execute(ids_query(chunk))
+                perm_ids.update(result.all())
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        for perm in permissions:
+            perm.id = perm_ids[perm.code_name]
+        return permissions
+
+    async def all(self) -> t.Iterator[Permission] | None:
+        permission_query = (select(PermissionModel)
+            .order_by(PermissionModel.name))
+        permissions = (await self.db.scalars(permission_query)).all()
+        if not permissions:
+            return None
+        return (self.to_permission_entity(perm)
+                for perm in permissions)
+
+    async def list_page(
+        self,
+        limit: int,
+        after: t.Optional[t.Tuple[str, int]] = None
+    ) -> t.List[Permission]:
+        query = permissions_page_query(limit, after)
+        permissions = await self.db.scalars(query)
+        return [self.to_permission_entity(perm) for perm in permissions]
@@ -0,0 +1,103 @@
+import typing as t
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from percefons.infrastructure.db.models.user import UserModel
+from percefons.infrastructure.db.models.permission import PermissionModel
+from percefons.infrastructure.db.models.user_perms import (
+    user_permission_association
+)
+
+# Columns of the users written in the export records, in this order:
+EXPORT_COLUMNS = ('id', 'username', 'email', 'is_active', 'is_staff',
+                  'is_superuser', 'created_at')
+
+
+def user_export_query():
+    """
+    Builds the query of the users joined with the code names of their
+    permissions: one row per user and permission (or one row with a
+    NULL code name for a user without permission), ordered by user ID so
+    that the rows of a user follow each other. It selects columns, not
+    models, so that no `UserModel` is built nor kept by the session.
+    """
+    association = user_permission_association
+    columns = [getattr(UserModel, name) for name in EXPORT_COLUMNS]
+    query = (select(*columns, PermissionModel.code_name)
+        .outerjoin(association, association.c.user_id == UserModel.id)
+        .outerjoin(PermissionModel, PermissionModel.id == association.c.perm_id)
+        .order_by(UserModel.id, PermissionModel.code_name))
+    return query
+
+
+class _RecordBuilder:
+    """
+    Builds the export records of the users from the batches of rows of
+    `user_export_query`. The last user of a batch is kept until the next
+    batch, which can contain the rest of its permissions.
+    """
+
+    def __init__(self):
+        self.record = None
+
+    def feed(self, rows: t.Iterable[tuple]) -> t.List[dict]:
+        """Returns the records of the users completed by these rows."""
+        records = []
+        record = self.record
+        for row in rows:
+            if record is None or record['id'] != row[0]:
+                if record is not None:
+                    records.append(record)
+                record = dict(zip(EXPORT_COLUMNS, row))
+                record['permissions'] = []
+            if row[-1] is not None:
+                record['permissions'].append(row[-1])
+        self.record = record
+        return records
+
+    def close(self) -> t.List[dict]:
+        """Returns the record of the last user, if any."""
+        record, self.record = self.record, None
+        return [record] if record is not None else []
+
+
+def iter_user_batches(
+    db: Session,
+    batch_size: int
+) -> t.Iterator[t.List[dict]]:
+    """
+    Yields the export records of all the users, in batches. The rows are
+    fetched `batch_size` at a time from a server-side cursor (when the
+    driver has one), so that the memory used does not depend on the
+    number of users.
+    """
+    query = user_export_query().execution_options(yield_per=batch_size)
+    builder = _RecordBuilder()
+    for rows in db.execute(query).partitions():
+        records = builder.feed(rows)
+        if records:
+            yield records
+    records = builder.close()
+    if records:
+        yield records
+
+
+async def aiter_user_batches(
+    db: AsyncSession,
+    batch_size: int
+) -> t.AsyncIterator[t.List[dict]]:
+    """
+    Yields the export records of all the users, in batches, from a
+    server-side cursor of the asyncio driver.
+    """
+    query = user_export_query().execution_options(yield_per=batch_size)
+    builder = _RecordBuilder()
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        records = builder.feed(rows)
+        if records:
+            yield records
+    records = builder.close()
+    if records:
+        yield records
@@ -1,15 +1,93 @@
 import logging
+import typing as t
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, delete, tuple_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from percefons.domain.entities.user import Permission, User
-from percefons.domain.repositories import UserPermissionRepository
+from percefons.domain.repositories import (
+    UserPermissionRepository,
+    AsyncUserPermissionRepository
+)
 from percefons.infrastructure.db.models.user import UserModel
+from percefons.core import settings
+from percefons.infrastructure.cache import LRUCache
+from percefons.infrastructure.db.bulk import (
+    chunked,
+    insert_ignore,
+    new_rows,
+    supports_on_conflict
+)
 from percefons.infrastructure.db.models.permission import PermissionModel
+from percefons.infrastructure.db.models.user_perms import (
+    user_permission_association
+)
 from .user_repository import UserRepositoryImpl as Ur
 from .permission_repository import PermissionRepositoryImpl as Pr
 
 LOGGER = logging.getLogger(__name__)
 
+# Per-process cache of the permission code names of each user, keyed by
+# user id. The entries are removed when a permission is granted to or
+# revoked from the user:
+permission_cache = LRUCache(maxsize=settings.PERMISSION_CACHE_SIZE,
+                            ttl=settings.PERMISSION_CACHE_TTL)
+
+
+def permission_codes_query(user_id: int):
+    """
+    Builds the query which selects the code names of the permissions
+    of a user, directly from the association table.
+    """
+    query = (select(PermissionModel.code_name)
+        .join(user_permission_association,
+              user_permission_association.c.perm_id == PermissionModel.id)
+        .where(user_permission_association.c.user_id == user_id))
+    return query
+
+
+def grant_statement(
+    pairs: t.List[t.Tuple[int, int]],
+    dialect_name: str,
+    granted: t.Optional[t.List[tuple]] = None
+):
+    """
+    Builds the statement which inserts the (user_id, perm_id) pairs into
+    the association table, ignoring the pairs which already exist.
+
+    :param granted: On the dialects without `ON CONFLICT`, the pairs of
+      `granted_query`, which are left out of a plain insert. None is
+      returned when no pair is left.
+    """
+    values = [{'user_id': user_id, 'perm_id': perm_id}
+              for user_id, perm_id in pairs]
+    if granted is None:
+        stmt = insert_ignore(user_permission_association, dialect_name)
+        return stmt.values(values)
+    values = new_rows(values, {('user_id', 'perm_id'): granted})
+    if not values:
+        return None
+    return insert(user_permission_association).values(values)
+
+
+def granted_query(pairs: t.List[t.Tuple[int, int]]):
+    """Builds the query of the (user_id, perm_id) pairs already granted."""
+    table = user_permission_association
+    pair = tuple_(table.c.user_id, table.c.perm_id)
+    return select(table.c.user_id, table.c.perm_id).where(pair.in_(pairs))
+
+
+def revoke_statement(pairs: t.List[t.Tuple[int, int]]):
+    """
+    Builds the statement which deletes the (user_id, perm_id) pairs
+    from the association table.
+    """
+    table = user_permission_association
+    stmt = delete(table).where(
+        tuple_(table.c.user_id, table.c.perm_id).in_(pairs)
+    )
+    return stmt
+
 
 class UserPermissionRepositoryImpl(UserPermissionRepository):
     def __init__(self, db: Session):
@@ -20,11 +98,20 @@ class UserPermissionRepositoryImpl(UserPermissionRepository):
         self.user_repos = Ur(self.db)
         self.perm_repos = Pr(self.db)
 
+    def _get_user_model(self, user_id: int) -> UserModel | None:
+        # The permissions are loaded with the user, in one extra query,
+        # instead of being lazy loaded on first access:
+        user_model = self.db.get(
+            UserModel, user_id,
+            options=[selectinload(UserModel.permissions)]
+        )
+        return user_model
+
     def grant(self, permission: Permission, user: User) -> User:
         # perm_model = self.to_permission_model(permission)
         # user_model = self.to_user_model(user)
-        perm_model = self.db.query(PermissionModel).get(permission.id)
-        user_model = self.db.query(UserModel).get(user.id)
+        perm_model = self.db.get(PermissionModel, permission.id)
+        user_model = self._get_user_model(user.id)
 
         if not perm_model:
             perm_model = self.to_permission_model(permission)
@@ -39,11 +126,12 @@ class UserPermissionRepositoryImpl(UserPermissionRepository):
         self.db.commit()
 
         user = self.to_user_entity(user_model)
+        permission_cache.delete(user.id)
         return user
 
     def revoke(self, permission: Permission, user: User) -> User:
-        perm_model = self.db.query(PermissionModel).get(permission.id)
-        user_model = self.db.query(UserModel).get(user.id)
+        perm_model = self.db.get(PermissionModel, permission.id)
+        user_model = self._get_user_model(user.id)
 
         if not perm_model:
             LOGGER.warning(
@@ -60,4 +148,202 @@ class UserPermissionRepositoryImpl(UserPermissionRepository):
         self.db.commit()
 
         user = self.to_user_entity(user_model)
+        permission_cache.delete(user.id)
         return user
+
+    def get_permission_codes(self, user_id: int) -> t.FrozenSet[str]:
+        """
+        Returns the code names of the permissions of a user. The result
+        is served from the permission cache when it is there.
+        """
+        codes = permission_cache.get(user_id)
+        if codes is None:
+            codes = frozenset(self.db.scalars(permission_codes_query(user_id)))
+            permission_cache.set(user_id, codes)
+        return codes
+
+    def grant_many(self, pairs: t.Iterable[t.Tuple[int, int]]) -> int:
+        """
+        Grant several permissions to several users in one transaction,
+        with set-based statements. The pairs already granted are ignored.
+
+        :param pairs: The (user_id, perm_id) pairs to grant.
+        :returns: The number of pairs inserted.
+        """
+        dialect_name = self.db.get_bind().dialect.name
+        user_ids = set()
+        count = 0
+        try:
+            for chunk in chunked(pairs):
+                granted = None
+                if not supports_on_conflict(dialect_name):
+                    granted = self.db.execute(granted_query(chunk)).all()
+                stmt = grant_statement(chunk, dialect_name, granted)
+                if stmt is not None:
+                    result = self.db.execute(stmt)
+                    count += max(result.rowcount, 0)
+                user_ids.update(user_id for user_id, _ in chunk)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        for user_id in user_ids:
+            permission_cache.delete(user_id)
+        return count
+
+    def revoke_many(self, pairs: t.Iterable[t.Tuple[int, int]]) -> int:
+        """
+        Revoke several permissions from several users in one transaction,
+        with set-based statements.
+
+        :param pairs: The (user_id, perm_id) pairs to revoke.
+        :returns: The number of pairs deleted.
+        """
+        user_ids = set()
+        count = 0
+        try:
+            for chunk in chunked(pairs):
+                result = self.db.execute(revoke_statement(chunk))
+                count += max(result.rowcount, 0)
+                user_ids.update(user_id for user_id, _ in chunk)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        for user_id in user_ids:
+            permission_cache.delete(user_id)
+        return count
+
+
+class AsyncUserPermissionRepositoryImpl(AsyncUserPermissionRepository):
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.to_permission_model = Pr.convert_to_permission_model
+        self.to_user_model = Ur.convert_to_user_model
+        self.to_user_entity = Ur.convert_to_user_entity
+
+    async def _get_user_model(self, user_id: int) -> UserModel | None:
+        # The permissions are loaded eagerly because a lazy load
+        # is not allowed with an asyncio session:
+        user_model = await self.db.get(
+            UserModel, user_id,
+            options=[selectinload(UserModel.permissions)]
+        )
+        return user_model
+
+    async def grant(self, permission: Permission, user: User) -> User:
+        perm_model = user_model = None
+        if permission.id is not None:
+            perm_model = await self.db.get(PermissionModel, permission.id)
+        if user.id is not None:
+            user_model = await self._get_user_model(user.id)
+
+        if not perm_model:
+            perm_model = self.to_permission_model(permission)
+            self.db.add(perm_model)
+            await self.db.commit()
+        if not user_model:
+            user_model = self.to_user_model(user)
+            user_model.permissions = []
+            self.db.add(user_model)
+            await self.db.commit()
+
+        user_model.permissions.append(perm_model)
+        await self.db.commit()
+
+        user = self.to_user_entity(user_model)
+        permission_cache.delete(user.id)
+        return user
+
+    async def revoke(self, permission: Permission, user: User) -> User:
+        perm_model = await self.db.get(PermissionModel, permission.id)
+        user_model = await self._get_user_model(user.id)
+
+        if not perm_model:
+            LOGGER.warning(
+                "No permission named: " + permission.name + " found."
+            )
+            return user
+        if not user_model:
+            LOGGER.warning(
+                "No user named: " + user.username + " found."
+            )
+            return user
+
+        user_model.permissions.remove(perm_model)
+        await self.db.commit()
+
+        user = self.to_user_entity(user_model)
+        permission_cache.delete(user.id)
+        return user
+
+    async def get_permission_codes(self, user_id: int) -> t.FrozenSet[str]:
+        """
+        Returns the code names of the permissions of a user. The result
+        is served from the permission cache when it is there.
+        """
+        codes = permission_cache.get(user_id)
+        if codes is None:
+            result = await self.db.scalars(permission_codes_query(user_id))
+            codes = frozenset(result)
+            permission_cache.set(user_id, codes)
+        return codes
+
+    async def grant_many(
+        self,
+        pairs: t.Iterable[t.Tuple[int, int]]
+    ) -> int:
+        """
+        Grant several permissions to several users in one transaction,
+        with set-based statements. The pairs already granted are ignored.
+
+        :param pairs: The (user_id, perm_id) pairs to grant.
+        :returns: The number of pairs inserted.
+        """
+        dialect_name = self.db.get_bind().dialect.name
+        user_ids = set()
+        count = 0
+        try:
+            for chunk in chunked(pairs):
+                granted = None
+                if not supports_on_conflict(dialect_name):
+                    result = await self.db.execute(granted_query(chunk))
+                    granted = result.all()
+                stmt = grant_statement(chunk, dialect_name, granted)
+                if stmt is not None:
+                    result = await self.db.execute(stmt)
+                    count += max(result.rowcount, 0)
+                user_ids.update(user_id for user_id, _ in chunk)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        for user_id in user_ids:
+            permission_cache.delete(user_id)
+        return count
+
+    async def revoke_many(
+        self,
+        pairs: t.Iterable[t.Tuple[int, int]]
+    ) -> int:
+        """
+        Revoke several permissions from several users in one transaction,
+        with set-based statements.
+
+        :param pairs: The (user_id, perm_id) pairs to revoke.
+        :returns: The number of pairs deleted.
+        """
+        user_ids = set()
+        count = 0
+        try:
+            for chunk in chunked(pairs):
+                result = await self.db.execute(revoke_statement(chunk))
+                count += max(result.rowcount, 0)
+                user_ids.update(user_id for user_id, _ in chunk)
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        for user_id in user_ids:
+            permission_cache.delete(user_id)
+        return count
@@ -1,9 +1,259 @@
+import time
+import asyncio
 import typing as t
+import threading
+from datetime import datetime, timedelta
 
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    select, insert, update, inspect, exists, or_, tuple_
+)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from percefons.core import settings
 from percefons.domain.entities.user import User
-from percefons.domain.repositories import UserRepository
+from percefons.application.exceptions import UserIsAlreadyExists
+from percefons.domain.repositories import (
+    UserRepository,
+    AsyncUserRepository
+)
 from percefons.infrastructure.db.models.user import UserModel
+from percefons.infrastructure.db.bulk import (
+    insert_ignore,
+    new_rows,
+    supports_on_conflict
+)
+from percefons.infrastructure.bloom import BloomFilter
+from .permission_repository import PermissionRepositoryImpl as Pr
+
+
+def user_values(user: User) -> dict:
+    """Returns the column values of a user entity."""
+    return {
+        'username': user.username,
+        'email': user.email,
+        'hashed_password': user.hashed_password,
+        'is_active': user.is_active,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        'created_at': user.created_at or datetime.now(),
+    }
+
+
+def create_many_statement(
+    users: t.List[User],
+    dialect,
+    taken: t.Optional[t.List[tuple]] = None
+):
+    """
+    Builds the statement which inserts the users, skipping those whose
+    username already exists. The IDs of the new rows are returned when
+    the dialect supports `INSERT ... RETURNING`.
+
+    :param taken: On the dialects without `ON CONFLICT`, the existing
+      (username, email) of `taken_users_query`, whose users are left out
+      of a plain insert. None is returned when no user is left.
+    """
+    values = [user_values(user) for user in users]
+    if taken is None:
+        stmt = insert_ignore(UserModel.__table__, dialect.name).values(values)
+        if dialect.insert_returning:
+            stmt = stmt.returning(UserModel.username, UserModel.id)
+        return stmt
+    values = new_rows(values, {
+        ('username',): [(username,) for username, _ in taken],
+        ('email',): [(email,) for _, email in taken],
+    })
+    return insert(UserModel.__table__).values(values) if values else None
+
+
+def taken_users_query(users: t.List[User]):
+    """Builds the query of the (username, email) taken by these users."""
+    usernames = [user.username for user in users]
+    emails = [user.email for user in users if user.email]
+    return (select(UserModel.username, UserModel.email)
+        .where(or_(UserModel.username.in_(usernames),
+                   UserModel.email.in_(emails))))
+
+
+def exists_query(username: str, email: str = None):
+    """
+    Builds the `SELECT EXISTS` query which tells whether a user has this
+    username or this email.
+    """
+    condition = UserModel.username == username
+    if email:
+        condition = or_(condition, UserModel.email == email)
+    return select(exists().where(condition))
+
+
+def update_password_statement(user_id: int, hashed_password: str):
+    """Builds the statement which replaces the password hash of a user."""
+    return (update(UserModel).where(UserModel.id == user_id)
+        .values(hashed_password=hashed_password))
+
+
+def users_page_query(
+    limit: int,
+    after: t.Optional[t.Tuple[datetime, int]] = None,
+    is_active: t.Optional[bool] = None,
+    is_staff: t.Optional[bool] = None
+):
+    """
+    Builds the query of a page of users, from the newest to the oldest.
+    The page starts after the key (`created_at`, `id`), which the
+    database seeks in the index instead of skipping the previous rows.
+    """
+    query = select(UserModel)
+    if is_active is not None:
+        query = query.where(UserModel.is_active == is_active)
+    if is_staff is not None:
+        query = query.where(UserModel.is_staff == is_staff)
+    if after is not None:
+        query = query.where(
+            tuple_(UserModel.created_at, UserModel.id) < tuple(after))
+    return (query.order_by(UserModel.created_at.desc(), UserModel.id.desc())
+        .limit(limit))
+
+
+def user_ids_query(usernames: t.List[str]):
+    """Builds the query which selects the IDs of these usernames."""
+    query = (select(UserModel.username, UserModel.id)
+        .where(UserModel.username.in_(usernames)))
+    return query
+
+
+class UsernameFilter:
+    """
+    Probabilistic set of the existing usernames. Until it is loaded,
+    every username might exist. Once loaded, a username missing from the
+    filter is trusted to not exist while the last load started less than
+    `max_staleness` seconds ago: the users created by this process are
+    added at once, those of the other processes by the periodic loads.
+    A staler filter is loaded again before the lookup, one load being
+    shared by the concurrent lookups, so that the misses run at most one
+    load per `max_staleness` seconds.
+
+    The loads select the users by `created_at`, from `overlap` seconds
+    before the newest user already seen, so that the users whose
+    transactions commit late (and out of the order of their IDs) or
+    whose dates come from a late clock are still loaded.
+
+    :param capacity: The number of usernames of the bloom filter.
+    :param error_rate: The false positive rate of the bloom filter.
+    :param overlap: The overlap of two loads, in seconds.
+    :param max_staleness: The age of the last load, in seconds, beyond
+      which the filter is loaded again to confirm a missing username.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        overlap: float = settings.USERNAME_FILTER_OVERLAP,
+        max_staleness: float = settings.USERNAME_FILTER_MAX_STALENESS
+    ):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.overlap = timedelta(seconds=overlap)
+        self.max_staleness = max_staleness
+        self.loaded = False
+        self.last_created_at: t.Optional[datetime] = None
+        # Monotonic time at which the last completed load started:
+        self.load_started = float('-inf')
+        self._load_lock = threading.Lock()
+        self._async_load_lock = asyncio.Lock()
+
+    def might_exist(self, username: str) -> bool:
+        return not self.loaded or username in self.bloom
+
+    def add(self, username: str):
+        self.bloom.add(username)
+
+    def is_fresh(self) -> bool:
+        """Tells whether the last load started within `max_staleness`."""
+        return time.monotonic() - self.load_started < self.max_staleness
+
+    def load_query(self):
+        """Builds the query of the users created since the last load."""
+        query = select(UserModel.username, UserModel.created_at)
+        if self.last_created_at is not None:
+            query = query.where(
+                UserModel.created_at >= self.last_created_at - self.overlap)
+        return query
+
+    def _add_rows(self, rows: t.Iterable[tuple], started: float):
+        last_created_at = self.last_created_at
+        for username, created_at in rows:
+            self.bloom.add(username)
+            if created_at is not None and (last_created_at is None
+                                           or created_at > last_created_at):
+                last_created_at = created_at
+        self.last_created_at = last_created_at
+        self.load_started = max(self.load_started, started)
+        self.loaded = True
+
+    def _load(self, db: Session):
+        started = time.monotonic()
+        query = self.load_query().execution_options(yield_per=5000)
+        self._add_rows(db.execute(query), started)
+
+    def load(self, db: Session):
+        """Adds the usernames of the users created since the last load."""
+        with self._load_lock:
+            self._load(db)
+
+    def confirm_absent(self, username: str, db: Session) -> bool:
+        """
+        Returns True when the username is not in the filter, which is
+        loaded again first when it is stale.
+        """
+        if not self.is_fresh():
+            with self._load_lock:
+                # The concurrent lookups share the load of the first one:
+                if not self.is_fresh():
+                    self._load(db)
+        return username not in self.bloom
+
+    async def async_confirm_absent(
+        self,
+        username: str,
+        db: AsyncSession
+    ) -> bool:
+        """Same as `confirm_absent`, with an asyncio session."""
+        if not self.is_fresh():
+            async with self._async_load_lock:
+                if not self.is_fresh():
+                    started = time.monotonic()
+                    result = await db.execute(self.load_query())
+                    self._add_rows(result, started)
+        return username not in self.bloom
+
+
+username_filter: t.Optional[UsernameFilter] = None
+if settings.USERNAME_FILTER_ENABLED:
+    username_filter = UsernameFilter(settings.USERNAME_FILTER_CAPACITY,
+                                     settings.USERNAME_FILTER_ERROR_RATE)
+
+
+def certainly_absent(username: str, db: Session) -> bool:
+    """Returns True when the username filter excludes this username."""
+    return (username_filter is not None
+            and not username_filter.might_exist(username)
+            and username_filter.confirm_absent(username, db))
+
+
+async def async_certainly_absent(username: str, db: AsyncSession) -> bool:
+    """Returns True when the username filter excludes this username."""
+    return (username_filter is not None
+            and not username_filter.might_exist(username)
+            and await username_filter.async_confirm_absent(username, db))
+
+
+def remember_usernames(users: t.Iterable[User]):
+    """Adds the usernames of these new users to the username filter."""
+    if username_filter is not None:
+        for user in users:
+            username_filter.add(user.username)
 
 
 class UserRepositoryImpl(UserRepository):
@@ -35,10 +285,16 @@ class UserRepositoryImpl(UserRepository):
     def convert_to_user_entity(user: UserModel) -> User:
         """
         This function allows to convert a user model into user entity.
+        The permissions of the entity are only filled when they are
+        already loaded on the model, so that no lazy load is emitted.
 
         :param user: The instance of the user model.
         :returns: An instance of user entity.
         """
+        permissions = None
+        if 'permissions' not in inspect(user).unloaded:
+            permissions = [Pr.convert_to_permission_entity(perm)
+                           for perm in user.permissions]
         user_instance = User(
             id=user.id,
             username=user.username,
@@ -48,10 +304,13 @@ class UserRepositoryImpl(UserRepository):
             is_staff=user.is_staff,
             is_superuser=user.is_superuser,
             created_at=user.created_at,
+            permissions=permissions,
         )
         return user_instance
 
     def get_by_username(self, username: str) -> t.Optional[User]:
+        if certainly_absent(username, self.db):
+            return None
         users_query = self.db.query(UserModel)
         users = users_query.filter(UserModel.username == username)
         first_user = users.first()
@@ -69,10 +328,256 @@ class UserRepositoryImpl(UserRepository):
         user_ent = self.convert_to_user_entity(first_user)
         return user_ent
 
+    def exists_by_username_or_email(
+        self,
+        username: str,
+        email: str = None
+    ) -> bool:
+        if not email and certainly_absent(username, self.db):
+            return False
+        return bool(self.db.scalar(exists_query(username, email)))
+
     def create(self, user: User) -> User:
+        """
+        :raises UserIsAlreadyExists: When the username or the email
+          is already used.
+        """
         user_model_instance = self.convert_to_user_model(user)
         self.db.add(user_model_instance)
-        self.db.commit()
+        try:
+            self.db.commit()
+        except IntegrityError as e:
+            self.db.rollback()
+            raise UserIsAlreadyExists() from e
         self.db.refresh(user_model_instance)
         user.id = user_model_instance.id
+        remember_usernames([user])
         return user
+
+    def update_password(self, user_id: int, hashed_password: str):
+        self.db.execute(update_password_statement(user_id, hashed_password))
+        self.db.commit()
+
+    def get_with_permissions(self, user_id: int) -> t.Optional[User]:
+        """
+        Returns the user with its permissions, loaded in a constant
+        number of queries.
+        """
+        user_model = self.db.get(
+            UserModel, user_id,
+            options=[selectinload(UserModel.permissions)]
+        )
+        if not user_model:
+            return None
+        return self.convert_to_user_entity(user_model)
+
+    def list_with_permissions(
+        self,
+        user_ids: t.Iterable[int]
+    ) -> t.List[User]:
+        """
+        Returns the users with their permissions, loaded in a constant
+        number of queries whatever the number of users.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        users_query = (select(UserModel)
+            .where(UserModel.id.in_(user_ids))
+            .options(selectinload(UserModel.permissions))
+            .order_by(UserModel.id))
+        users = self.db.scalars(users_query).all()
+        return [self.convert_to_user_entity(user) for user in users]
+
+    def list_page(
+        self,
+        limit: int,
+        after: t.Optional[t.Tuple[datetime, int]] = None,
+        is_active: t.Optional[bool] = None,
+        is_staff: t.Optional[bool] = None
+    ) -> t.List[User]:
+        query = users_page_query(limit, after, is_active, is_staff)
+        users = self.db.scalars(query).all()
+        return [self.convert_to_user_entity(user) for user in users]
+
+    def create_many(self, users: t.List[User]) -> t.List[User]:
+        """
+        Creation of several users in one transaction, with one statement.
+        The users whose username already exists are skipped.
+
+        :param users: The user entities to create.
+        :returns: The users created, with their IDs filled.
+        """
+        if not users:
+            return []
+        dialect = self.db.get_bind().dialect
+        usernames = [user.username for user in users]
+        try:
+            existing, taken = set(), None
+            if not supports_on_conflict(dialect.name):
+                # The taken users are left out of a plain insert:
+                taken = self.db.execute(taken_users_query(users)).all()
+                existing = {username for username, _ in taken}
+            elif not dialect.insert_returning:
+                existing = dict(self.db.execute(
+                    user_ids_query(usernames)).all())
+            returning = taken is None and dialect.insert_returning
+            stmt = create_many_statement(users, dialect, taken)
+            if stmt is not None:
+                result = self.db.execute(stmt)
+            if not returning:
+                result = self.db.execute(user_ids_query(usernames))
+            user_ids = {username: user_id
+                        for username, user_id in result.all()
+                        if username not in existing}
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        created = []
+        for user in users:
+            user_id = user_ids.pop(user.username, None)
+            if user_id is not None:
+                user.id = user_id
+                created.append(user)
+        remember_usernames(created)
+        return created
+
+
+class AsyncUserRepositoryImpl(AsyncUserRepository):
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.to_user_model = UserRepositoryImpl.convert_to_user_model
+        self.to_user_entity = UserRepositoryImpl.convert_to_user_entity
+
+    async def get_by_username(self, username: str) -> t.Optional[User]:
+        if await async_certainly_absent(username, self.db):
+            return None
+        users_query = select(UserModel).where(UserModel.username == username)
+        first_user = await self.db.scalar(users_query.limit(1))
+        if not first_user:
+            return None
+        user_ent = self.to_user_entity(first_user)
+        return user_ent
+
+    async def get_by_email(self, email: str) -> t.Optional[User]:
+        users_query = select(UserModel).where(UserModel.email == email)
+        first_user = await self.db.scalar(users_query.limit(1))
+        if not first_user:
+            return None
+        user_ent = self.to_user_entity(first_user)
+        return user_ent
+
+    async def exists_by_username_or_email(
+        self,
+        username: str,
+        email: str = None
+    ) -> bool:
+        if not email and await async_certainly_absent(username, self.db):
+            return False
+        return bool(await self.db.scalar(exists_query(username, email)))
+
+    async def create(self, user: User) -> User:
+        """
+        :raises UserIsAlreadyExists: When the username or the email
+          is already used.
+        """
+        user_model_instance = self.to_user_model(user)
+        self.db.add(user_model_instance)
+        try:
+            await self.db.commit()
+        except IntegrityError as e:
+            await self.db.rollback()
+            raise UserIsAlreadyExists() from e
+        user.id = user_model_instance.id
+        remember_usernames([user])
+        return user
+
+    async def update_password(self, user_id: int, hashed_password: str):
+        await self.db.execute(
+            update_password_statement(user_id, hashed_password))
+        await self.db.commit()
+
+    async def get_with_permissions(self, user_id: int) -> t.Optional[User]:
+        """
+        Returns the user with its permissions, loaded in a constant
+        number of queries.
+        """
+        user_model = await self.db.get(
+            UserModel, user_id,
+            options=[selectinload(UserModel.permissions)]
+        )
+        if not user_model:
+            return None
+        return self.to_user_entity(user_model)
+
+    async def list_with_permissions(
+        self,
+        user_ids: t.Iterable[int]
+    ) -> t.List[User]:
+        """
+        Returns the users with their permissions, loaded in a constant
+        number of queries whatever the number of users.
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        users_query = (select(UserModel)
+            .where(UserModel.id.in_(user_ids))
+            .options(selectinload(UserModel.permissions))
+            .order_by(UserModel.id))
+        users = (await self.db.scalars(users_query)).all()
+        return [self.to_user_entity(user) for user in users]
+
+    async def list_page(
+        self,
+        limit: int,
+        after: t.Optional[t.Tuple[datetime, int]] = None,
+        is_active: t.Optional[bool] = None,
+        is_staff: t.Optional[bool] = None
+    ) -> t.List[User]:
+        query = users_page_query(limit, after, is_active, is_staff)
+        users = (await self.db.scalars(query)).all()
+        return [self.to_user_entity(user) for user in users]
+
+    async def create_many(self, users: t.List[User]) -> t.List[User]:
+        """
+        Creation of several users in one transaction, with one statement
+        (see `UserRepositoryImpl.create_many`).
+        """
+        if not users:
+            return []
+        dialect = self.db.get_bind().dialect
+        usernames = [user.username for user in users]
+        try:
+            existing, taken = set(), None
+            if not supports_on_conflict(dialect.name):
+                result = await self.db.execute(taken_users_query(users))
+                taken = result.all()
+                existing = {username for username, _ in taken}
+            elif not dialect.insert_returning:
+                result = await self.db.execute(user_ids_query(usernames))
+                existing = dict(result.all())
+            returning = taken is None and dialect.insert_returning
+            stmt = create_many_statement(users, dialect, taken)
+            if stmt is not None:
+                result = await self.db.execute(stmt)
+            if not returning:
+                result = await self.db.execute(user_ids_query(usernames))
+            user_ids = {username: user_id
+                        for username, user_id in result.all()
+                        if username not in existing}
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        created = []
+        for user in users:
+            user_id = user_ids.pop(user.username, None)
+            if user_id is not None:
+                user.id = user_id
+                created.append(user)
+        remember_usernames(created)
+        return created
@@ -1,4 +1,6 @@
+import uuid
 import typing as t
+import hashlib
 from datetime import datetime, timedelta
 
 import jwt
@@ -6,21 +8,48 @@ import jwt
 
 from percefons.core import  settings
 from percefons.application.services import JWTAuth
+from percefons.infrastructure.cache import LRUCache
+from percefons.infrastructure.services.jwt_keys import (
+    KeyRing,
+    get_key_ring,
+    uses_key_ring
+)
+
+# Type of the tokens (`typ` claim), so that a token of one type is never
+# accepted as the other, even when the two secrets are equal:
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
 
 
 class JWTAuthImpl(JWTAuth):
     def __init__(
         self,
         access_secret_key: str = settings.JWT_ACCESS_SECRET,
-        refresh_secret_key: str = settings.JWT_ACCESS_SECRET,
-        algorithm: str = settings.JWT_ALG
+        refresh_secret_key: str = settings.JWT_REFRESH_SECRET,
+        algorithm: str = settings.JWT_ALG,
+        key_ring: KeyRing = None
     ):
         self.access_secret_key = access_secret_key
         self.refresh_secret_key = refresh_secret_key
         self.algorithm = algorithm
+        # The access tokens are signed with the keys of the key ring when
+        # the algorithm is asymmetric; the refresh tokens, only verified
+        # by this server, stay signed with the refresh secret:
+        self._key_ring = key_ring
+        self.asymmetric = key_ring is not None or uses_key_ring(algorithm)
+        self.refresh_algorithm = 'HS256' if self.asymmetric else algorithm
         self.access_token_delay = settings.ACCESS_TOKEN_EXPIRE_MINUTES
         self.refresh_token_delay = settings.REFRESH_TOKEN_EXPIRE_MINUTES
 
+    @property
+    def key_ring(self) -> t.Optional[KeyRing]:
+        """The key ring of the access tokens, loaded on first use."""
+        if not self.asymmetric:
+            return None
+        if self._key_ring is None:
+            self._key_ring = get_key_ring()
+        return self._key_ring
+
     def verify_refresh_token(self, token: str) -> JWTAuth.Result:
         """
         Function to verify if the refresh token is valid or not.
@@ -29,8 +58,11 @@ class JWTAuthImpl(JWTAuth):
             payload = jwt.decode(
                 jwt=token,
                 key=self.refresh_secret_key,
-                algorithms=[self.algorithm]
+                algorithms=[self.refresh_algorithm]
             )
+            if payload.get("typ") != REFRESH_TOKEN_TYPE:
+                raise jwt.InvalidTokenError(
+                    "The token is not a refresh token.")
             result = self.Result(
                 status=JWTAuth.SUCCESS,  # noqa
                 message="The refresh token is verified successfully.",
@@ -45,33 +77,67 @@ class JWTAuthImpl(JWTAuth):
             )
             return result
 
-        except jwt.PyJWTError | jwt.InvalidTokenError as e:
+        except (jwt.PyJWTError, jwt.InvalidTokenError) as e:
             result = self.Result(
                 status=JWTAuth.FAILED,  # noqa
                 message=str(e),
             )
             return result
 
-    def get_auth(self, subject: str) -> dict:
+    def get_auth(self, subject: str, family: str = None) -> dict:
         """
         Build and returns the authentication data (access and refresh tokens).
+        The refresh token carries its own ID (`jti`) and the ID of its
+        family (`fam`), which is kept by the rotated refresh tokens.
 
         :param subject: Data formatted as string as subject.
+        :param family: The family of the refresh token, when it is
+          rotated. A new family is created by default.
         :returns: A dictionary that contents the access and refresh tokens.
         """
+        current_dt = datetime.now()
+        expiration = current_dt + timedelta(minutes=self.refresh_token_delay)
+        payload = {"sub": subject, "iat": current_dt, "exp": expiration,
+                   "typ": REFRESH_TOKEN_TYPE, "jti": uuid.uuid4().hex,
+                   "fam": family or uuid.uuid4().hex}
+        access_token = self.get_access_token(subject)
+        refresh_token = jwt.encode(
+            payload=payload, key=self.refresh_secret_key,
+            algorithm=self.refresh_algorithm
+        )
+        return {"access_token": access_token, "refresh_token": refresh_token}
 
+    def get_access_token(self, subject: str) -> str:
+        """Build an access token for this subject."""
         current_dt = datetime.now()
         expiration =  current_dt + timedelta(minutes=self.access_token_delay)
-        payload = {"sub": subject, "iat": current_dt, "exp": expiration}
+        payload = {"sub": subject, "iat": current_dt, "exp": expiration,
+                   "typ": ACCESS_TOKEN_TYPE}
+        if self.asymmetric:
+            key = self.key_ring.current()
+            return jwt.encode(
+                payload=payload, key=key.private_key,
+                algorithm=key.algorithm, headers={"kid": key.kid}
+            )
         access_token = jwt.encode(
             payload=payload, key=self.access_secret_key,
             algorithm=self.algorithm
         )
-        refresh_token = jwt.encode(
-            payload=payload, key=self.refresh_secret_key,
-            algorithm=self.algorithm
-        )
-        return {"access_token": access_token, "refresh_token": refresh_token}
+        return access_token
+
+    def access_verification_key(self, token: str) -> t.Tuple[t.Any, str]:
+        """
+        Returns the key and the algorithm to verify an access token with.
+
+        :raises jwt.InvalidTokenError: When the signing key is unknown.
+        """
+        if not self.asymmetric:
+            return self.access_secret_key, self.algorithm
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.key_ring.get(kid) if isinstance(kid, str) else None
+        if key is None:
+            raise jwt.InvalidTokenError("The signing key is unknown.")
+        return key.public_key, key.algorithm
 
     def refresh_auth(self, refresh_token: str) -> t.Optional[str]:
         """
@@ -80,23 +146,22 @@ class JWTAuthImpl(JWTAuth):
         result = self.verify_refresh_token(refresh_token)
         if result.status != JWTAuth.SUCCESS:
             return None
-        payload = result.payload
-        access_token = jwt.encode(
-            payload=payload, key=self.access_secret_key,
-            algorithm=self.algorithm
-        )
-        return access_token
+        return self.get_access_token(result.payload["sub"])
 
     def verify_auth(self, token: str) -> JWTAuth.Result:  # noqa
         """
         Function to verify access token for authentication.
         """
         try:
+            key, algorithm = self.access_verification_key(token)
             payload = jwt.decode(
                 jwt=token,
-                key=self.access_secret_key,
-                algorithms=[self.algorithm]
+                key=key,
+                algorithms=[algorithm]
             )
+            if payload.get("typ") != ACCESS_TOKEN_TYPE:
+                raise jwt.InvalidTokenError(
+                    "The token is not an access token.")
             result = self.Result(
                 status=JWTAuth.SUCCESS,  # noqa
                 message="The access token is verified successfully.",
@@ -112,9 +177,68 @@ class JWTAuthImpl(JWTAuth):
             )
             return result
 
-        except jwt.PyJWTError | jwt.InvalidTokenError as e:
+        except (jwt.PyJWTError, jwt.InvalidTokenError) as e:
             result = self.Result(
                 status=JWTAuth.FAILED,  # noqa
                 message=str(e),
             )
             return result
+
+
+class CachedJWTAuthImpl(JWTAuthImpl):
+    """
+    JWT authentication service which keeps the payloads of the verified
+    access tokens in a bounded LRU cache, keyed by the token digest.
+    A cached entry never outlives the expiration date of its token.
+    """
+
+    def __init__(
+        self,
+        access_secret_key: str = settings.JWT_ACCESS_SECRET,
+        refresh_secret_key: str = settings.JWT_REFRESH_SECRET,
+        algorithm: str = settings.JWT_ALG,
+        key_ring: KeyRing = None,
+        cache_size: int = settings.JWT_CACHE_SIZE,
+        cache_ttl: float = settings.JWT_CACHE_TTL
+    ):
+        super().__init__(access_secret_key, refresh_secret_key, algorithm,
+                         key_ring)
+        self.cache = LRUCache(maxsize=cache_size, ttl=cache_ttl)
+
+    @staticmethod
+    def token_digest(token: str) -> bytes:
+        """Returns the digest used as cache key for a token."""
+        return hashlib.sha256(token.encode()).digest()
+
+    def verify_auth(self, token: str) -> JWTAuth.Result:  # noqa
+        """
+        Function to verify access token for authentication. The signature
+        is only verified when the token is not found in the cache.
+        """
+        key = self.token_digest(token)
+        payload = self.cache.get(key)
+        if payload is not None:
+            result = self.Result(
+                status=JWTAuth.SUCCESS,  # noqa
+                message="The access token is verified successfully.",
+                payload=dict(payload)
+            )
+            return result
+
+        result = super().verify_auth(token)
+        if result.status == JWTAuth.SUCCESS:
+            expires_at = result.payload.get("exp")
+            self.cache.set(key, dict(result.payload), expires_at=expires_at)
+        return result
+
+    def invalidate(self, token: str) -> bool:
+        """
+        Remove a token from the cache, e.g. when it is revoked.
+
+        :returns: True if the token was cached.
+        """
+        return self.cache.delete(self.token_digest(token))
+
+    def cache_stats(self) -> dict:
+        """Returns the hit/miss counters of the token cache."""
+        return self.cache.stats()
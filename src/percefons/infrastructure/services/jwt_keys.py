@@ -0,0 +1,268 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import logging
+import tempfile
+import threading
+import typing as t
+from dataclasses import dataclass
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ed25519
+from jwt.algorithms import RSAAlgorithm, OKPAlgorithm
+
+from percefons.core import settings
+
+LOGGER = logging.getLogger(__name__)
+
+# Algorithms signed with a private key and verified with a public key:
+ASYMMETRIC_ALGORITHMS = ('RS256', 'EdDSA')
+
+
+# Members of the public JWK hashed by the thumbprint (RFC 7638):
+THUMBPRINT_MEMBERS = {'RSA': ('e', 'kty', 'n'), 'OKP': ('crv', 'kty', 'x')}
+
+
+@dataclass
+class SigningKey:
+    kid: str
+    path: str
+    algorithm: str
+    private_key: t.Any
+    public_key: t.Any
+    created_at: float
+
+    def to_jwk(self) -> dict:
+        """Returns the public key as a JSON Web Key."""
+        jwk = public_jwk(self.public_key, self.algorithm)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+def public_jwk(public_key, algorithm: str) -> dict:
+    """Returns the members of the JSON Web Key of a public key."""
+    if algorithm == 'RS256':
+        return RSAAlgorithm.to_jwk(public_key, as_dict=True)
+    return OKPAlgorithm.to_jwk(public_key, as_dict=True)
+
+
+def jwk_thumbprint(public_key, algorithm: str) -> str:
+    """Returns the JWK thumbprint (RFC 7638) of a public key."""
+    jwk = public_jwk(public_key, algorithm)
+    members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk['kty']]}
+    digest = hashlib.sha256(json.dumps(
+        members, sort_keys=True, separators=(',', ':')).encode()).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+
+
+def generate_private_key(algorithm: str):
+    """Generates a private key for this algorithm."""
+    if algorithm == 'RS256':
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == 'EdDSA':
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(
+        f"The algorithm must be one of {ASYMMETRIC_ALGORITHMS}, "
+        f"not \"{algorithm}\"."
+    )
+
+
+def algorithm_of(private_key) -> str:
+    """Returns the JWT algorithm of a private key."""
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return 'RS256'
+    if isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return 'EdDSA'
+    raise ValueError(f"Unsupported key type: {type(private_key).__name__}.")
+
+
+class KeyRing:
+    """
+    The signing keys, one PEM file per key in `directory` whose name is
+    the start of its rotation period and whose modification date is the
+    creation date of the key. The key ID (`kid`) is the period followed
+    by the JWK thumbprint of the key, so that two keys never share an ID,
+    even when generated by servers which do not share the directory.
+    The keys are parsed once, when they are loaded.
+    A new key is generated every `rotation_period` seconds; it is published
+    in the JWKS at once, but only used to sign after `activation_delay`
+    seconds, so that the verifiers can refresh their cached JWKS first.
+    The old keys are kept for `retention` more seconds, to verify the
+    tokens that they signed.
+
+    :param directory: The directory of the private keys, which must be
+      shared by all the workers and hosts which verify the tokens.
+    :param algorithm: The algorithm of the generated keys.
+    """
+
+    def __init__(
+        self,
+        directory: str = settings.JWT_KEYS_DIR,
+        algorithm: str = settings.JWT_ALG,
+        rotation_period: float = settings.JWT_KEY_ROTATION_DAYS * 86400,
+        activation_delay: float = settings.JWKS_MAX_AGE,
+        retention: float = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    ):
+        self.directory = directory
+        self.algorithm = algorithm
+        self.rotation_period = rotation_period
+        self.activation_delay = activation_delay
+        self.retention = retention
+        self.keys: t.Dict[str, SigningKey] = {}
+        self._jwks = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def periods(self) -> t.Set[str]:
+        """Returns the periods of the loaded keys (their file names)."""
+        return {os.path.basename(key.path)[:-len('.pem')]
+                for key in self.keys.values()}
+
+    def load(self):
+        """Loads the keys of the directory which are not loaded yet."""
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        self._loaded_at = time.time()
+        keys = dict(self.keys)
+        periods = self.periods()
+        for filename in os.listdir(self.directory):
+            period, extension = os.path.splitext(filename)
+            if extension != '.pem' or period in periods:
+                continue
+            path = os.path.join(self.directory, filename)
+            with open(path, 'rb') as file:
+                private_key = serialization.load_pem_private_key(
+                    file.read(), password=None)
+            created_at = os.path.getmtime(path)
+            algorithm = algorithm_of(private_key)
+            public_key = private_key.public_key()
+            kid = period + '-' + jwk_thumbprint(public_key, algorithm)
+            keys[kid] = SigningKey(
+                kid=kid,
+                path=path,
+                algorithm=algorithm,
+                private_key=private_key,
+                public_key=public_key,
+                created_at=created_at,
+            )
+        with self._lock:
+            if keys.keys() != self.keys.keys():
+                self.keys = keys
+                self._jwks = None
+
+    def rotate(self, now: float = None) -> t.Optional[SigningKey]:
+        """
+        Generates the key of the current rotation period, unless it
+        already exists, and deletes the expired keys. The workers sharing
+        the directory generate one key per period, the file of the period
+        being created by the first of them.
+
+        :returns: The key generated, if any.
+        """
+        now = time.time() if now is None else now
+        self.load()
+        self.prune(now)
+        period = str(int(now // self.rotation_period * self.rotation_period))
+        if period in self.periods():
+            return None
+
+        private_key = generate_private_key(self.algorithm)
+        pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        path = os.path.join(self.directory, period + '.pem')
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        generated = False
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(pem)
+            # The link fails if another worker created the key first:
+            os.link(tmp_path, path)
+            generated = True
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+        self.load()
+        if not generated:
+            return None
+        key = next(key for key in self.keys.values() if key.path == path)
+        LOGGER.info(f"New JWT signing key {key.kid} generated.")
+        return key
+
+    def prune(self, now: float):
+        """Deletes the keys which cannot have signed an unexpired token."""
+        ordered = sorted(self.keys.values(), key=lambda key: key.created_at)
+        expired = []
+        for key, successor in zip(ordered, ordered[1:]):
+            retired_at = successor.created_at + self.activation_delay
+            if retired_at + self.retention < now:
+                expired.append(key.kid)
+        for kid in expired:
+            try:
+                os.unlink(self.keys[kid].path)
+            except FileNotFoundError:
+                pass
+            LOGGER.info(f"JWT signing key {kid} deleted.")
+        if expired:
+            with self._lock:
+                self.keys = {kid: key for kid, key in self.keys.items()
+                             if kid not in expired}
+                self._jwks = None
+
+    def current(self, now: float = None) -> SigningKey:
+        """Returns the key used to sign the new tokens."""
+        now = time.time() if now is None else now
+        keys = self.keys
+        if not keys:
+            self.rotate(now)
+            keys = self.keys
+        active = [key for key in keys.values()
+                  if key.created_at + self.activation_delay <= now]
+        candidates = active or list(keys.values())
+        return max(candidates, key=lambda key: key.created_at)
+
+    def get(self, kid: str) -> t.Optional[SigningKey]:
+        """
+        Returns the key of this ID. The directory is read again when the
+        key is unknown, at most once per second.
+        """
+        key = self.keys.get(kid)
+        if key is None and time.time() - self._loaded_at >= 1:
+            self.load()
+            key = self.keys.get(kid)
+        return key
+
+    def jwks(self) -> t.Tuple[bytes, str]:
+        """
+        Returns the JSON Web Key Set of the public keys, serialized, and
+        its entity tag. Both are cached until the keys change.
+        """
+        jwks = self._jwks
+        if jwks is None:
+            keys = sorted(self.keys.values(), key=lambda key: key.kid)
+            body = json.dumps({"keys": [key.to_jwk() for key in keys]},
+                              separators=(',', ':')).encode()
+            etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            jwks = self._jwks = (body, etag)
+        return jwks
+
+
+_key_ring: t.Optional[KeyRing] = None
+
+
+def get_key_ring() -> KeyRing:
+    """Returns the key ring of the process, loaded on the first call."""
+    global _key_ring
+    if _key_ring is None:
+        key_ring = KeyRing()
+        key_ring.rotate()
+        _key_ring = key_ring
+    return _key_ring
+
+
+def uses_key_ring(algorithm: str = settings.JWT_ALG) -> bool:
+    return algorithm in ASYMMETRIC_ALGORITHMS
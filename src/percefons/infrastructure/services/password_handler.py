@@ -1,12 +1,156 @@
+import time
+import asyncio
+import logging
+import multiprocessing
+import typing as t
+from concurrent.futures import ProcessPoolExecutor
+
 from passlib.context import CryptContext
-from percefons.application.services import PasswordHandler
+from percefons.core import settings
+from percefons.application.services import (
+    PasswordHandler,
+    AsyncPasswordHandler
+)
+from percefons.application.exceptions import ServiceBusyError
+
+LOGGER = logging.getLogger(__name__)
+
+HASH_SCHEMES = ('bcrypt', 'argon2')
+# Lowest bcrypt cost chosen by the calibration, whatever the host:
+MIN_BCRYPT_ROUNDS = 10
+MAX_BCRYPT_ROUNDS = 16
+MAX_ARGON2_TIME_COST = 10
+
+
+def build_crypt_context(
+    scheme: str = settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = settings.PASSWORD_BCRYPT_ROUNDS,
+    argon2_time_cost: int = settings.PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_cost: int = settings.PASSWORD_ARGON2_MEMORY_COST,
+    argon2_parallelism: int = settings.PASSWORD_ARGON2_PARALLELISM
+) -> CryptContext:
+    """
+    Builds the crypt context which hashes with `scheme` at this cost.
+    The hashes of the other scheme, or of another cost, are verified but
+    reported by `needs_update`.
+    """
+    if scheme not in HASH_SCHEMES:
+        raise ValueError(
+            f"The password hash scheme must be one of {HASH_SCHEMES}, "
+            f"not \"{scheme}\"."
+        )
+    schemes = [scheme] + [other for other in HASH_SCHEMES if other != scheme]
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__default_rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = build_crypt_context()
+
+
+def hash_password(password: str) -> str:
+    """
+    Hash a password with the module crypt context. This function is defined
+    at module level so that it can be sent to a worker process.
+    """
+    return pwd_context.hash(password)
+
+
+def needs_update(hashed_password: str) -> bool:
+    """
+    Tells whether a hash was computed with another scheme or cost than
+    those of the settings. It only parses the hash.
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
+def check_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash with the module crypt context.
+    This function is defined at module level so that it can be sent
+    to a worker process.
+    """
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+DUMMY_CALIBRATION_PASSWORD = "percefons-calibration-password"
+
+
+def verify_duration(context: CryptContext, samples: int = 3) -> float:
+    """Returns the shortest duration of a verification, in seconds."""
+    hashed_password = context.hash(DUMMY_CALIBRATION_PASSWORD)
+    durations = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify(DUMMY_CALIBRATION_PASSWORD, hashed_password)
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def calibrate(
+    scheme: str = settings.PASSWORD_HASH_SCHEME,
+    target_ms: float = settings.PASSWORD_VERIFY_TARGET_MS,
+    samples: int = 3
+) -> t.Tuple[t.Dict[str, t.Any], float]:
+    """
+    Measures the verification time on this host and selects the highest
+    cost whose verification takes at most `target_ms`: the bcrypt rounds,
+    not lower than MIN_BCRYPT_ROUNDS, or the argon2 time cost at the
+    configured memory cost and parallelism.
+
+    :returns: The settings of this cost, and the duration of
+      a verification in seconds.
+    """
+    if scheme == 'bcrypt':
+        name, cost, max_cost = 'bcrypt_rounds', MIN_BCRYPT_ROUNDS, \
+            MAX_BCRYPT_ROUNDS
+    elif scheme == 'argon2':
+        if not pwd_context.handler('argon2').has_backend():
+            raise RuntimeError(
+                "The argon2 scheme requires the argon2-cffi package."
+            )
+        name, cost, max_cost = 'argon2_time_cost', 1, MAX_ARGON2_TIME_COST
+    else:
+        raise ValueError(
+            f"The password hash scheme must be one of {HASH_SCHEMES}, "
+            f"not \"{scheme}\"."
+        )
+
+    def measure(value: int) -> float:
+        context = build_crypt_context(scheme, **{name: value})
+        return verify_duration(context, samples)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    duration = measure(cost)
+    while cost < max_cost:
+        next_duration = measure(cost + 1)
+        if next_duration * 1000 > target_ms:
+            break
+        cost, duration = cost + 1, next_duration
+
+    calibrated = {"PASSWORD_HASH_SCHEME": scheme}
+    if scheme == 'bcrypt':
+        calibrated["PASSWORD_BCRYPT_ROUNDS"] = cost
+    else:
+        calibrated["PASSWORD_ARGON2_TIME_COST"] = cost
+        calibrated["PASSWORD_ARGON2_MEMORY_COST"] = \
+            settings.PASSWORD_ARGON2_MEMORY_COST
+        calibrated["PASSWORD_ARGON2_PARALLELISM"] = \
+            settings.PASSWORD_ARGON2_PARALLELISM
+    return calibrated, duration
 
 
 class PasswordHandlerImpl(PasswordHandler):
     def get_password_hash(self, password: str) -> str:
-        result = pwd_context.hash(password)
+        result = hash_password(password)
         return result
 
     def verify_password(
@@ -14,5 +158,117 @@ class PasswordHandlerImpl(PasswordHandler):
         plain_password: str,
         hashed_password: str
     ) -> bool:
-        is_verified = pwd_context.verify(plain_password, hashed_password)
+        is_verified = check_password(plain_password, hashed_password)
         return is_verified
+
+    def needs_update(self, hashed_password: str) -> bool:
+        return needs_update(hashed_password)
+
+
+class AsyncPasswordHandlerImpl(AsyncPasswordHandler):
+    """
+    Password handler which runs bcrypt in a bounded pool of worker
+    processes, so that hashing scales with the number of cores and
+    never blocks the event loop.
+
+    At most `max_workers + queue_size` operations are in flight. Beyond
+    that, the handler either raises `ServiceBusyError` immediately
+    (backpressure="reject") or waits up to `wait_timeout` seconds for
+    a free slot before raising it (backpressure="wait").
+    """
+
+    def __init__(
+        self,
+        max_workers: int = settings.PASSWORD_HASH_WORKERS,
+        queue_size: int = settings.PASSWORD_HASH_QUEUE_SIZE,
+        backpressure: str = settings.PASSWORD_HASH_BACKPRESSURE,
+        wait_timeout: float = settings.PASSWORD_HASH_WAIT_TIMEOUT,
+        retry_after: int = settings.PASSWORD_HASH_RETRY_AFTER
+    ):
+        if backpressure not in ('reject', 'wait'):
+            raise ValueError(
+                "The backpressure mode must be \"reject\" or \"wait\", "
+                f"not \"{backpressure}\"."
+            )
+        self.max_workers = max(1, max_workers)
+        self.queue_size = max(0, queue_size)
+        self.backpressure = backpressure
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+        self._executor = None
+        self._slots = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """The process pool, created on first use."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            LOGGER.info(
+                "Password hashing pool started with "
+                + str(self.max_workers) + " worker(s)."
+            )
+        return self._executor
+
+    def _busy_error(self) -> ServiceBusyError:
+        return ServiceBusyError(
+            message="Too many authentication requests in progress.",
+            code="too_many_requests",
+            retry_after=self.retry_after,
+        )
+
+    async def _acquire_slot(self):
+        """
+        :raises ServiceBusyError: When no slot is available.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.queue_size)
+        if self.backpressure == 'reject' or self.wait_timeout <= 0:
+            if self._slots.locked():
+                raise self._busy_error()
+            await self._slots.acquire()
+            return
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.wait_timeout)
+        except asyncio.TimeoutError:
+            raise self._busy_error()
+
+    async def _submit(self, func, *args):
+        await self._acquire_slot()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self._slots.release()
+
+    async def get_password_hash(self, password: str) -> str:
+        """
+        :raises ServiceBusyError: When the hashing pool is saturated.
+        """
+        result = await self._submit(hash_password, password)
+        return result
+
+    async def verify_password(
+        self,
+        plain_password: str,
+        hashed_password: str
+    ) -> bool:
+        """
+        :raises ServiceBusyError: When the hashing pool is saturated.
+        """
+        is_verified = await self._submit(
+            check_password, plain_password, hashed_password
+        )
+        return is_verified
+
+    def needs_update(self, hashed_password: str) -> bool:
+        return needs_update(hashed_password)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes of the pool, if they are started."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+            LOGGER.info("Password hashing pool is stopped.")
@@ -0,0 +1,209 @@
+import time
+import asyncio
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from percefons.core import settings
+from percefons.application.services import RateLimiter
+
+
+class RateLimitStore(ABC):
+    """
+    Storage of the token buckets. A shared backend (e.g. Redis)
+    implements this interface to enforce the limits across the workers
+    and the hosts; the consumption of a token must be atomic.
+    """
+
+    @abstractmethod
+    async def consume(
+        self,
+        key: str,
+        capacity: float,
+        refill_rate: float
+    ) -> float:
+        """
+        Take one token from the bucket of this key.
+
+        :param key: The key of the bucket.
+        :param capacity: The maximum number of tokens of the bucket.
+        :param refill_rate: The number of tokens added per second.
+        :returns: 0 if a token was taken, otherwise the number of seconds
+          until a token is available.
+        """
+        ...
+
+
+def refill(
+    tokens: float,
+    updated_at: float,
+    now: float,
+    capacity: float,
+    refill_rate: float
+) -> float:
+    """Returns the number of tokens of a bucket after its refill."""
+    return min(capacity, tokens + (now - updated_at) * refill_rate)
+
+
+def wait_time(tokens: float, refill_rate: float) -> float:
+    """Returns the time needed for a bucket to get one token."""
+    if refill_rate <= 0:
+        return float('inf')
+    return (1 - tokens) / refill_rate
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Per-process store. The number of buckets is bounded: the least
+    recently used buckets are forgotten first.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume_sync(
+        self,
+        key: str,
+        capacity: float,
+        refill_rate: float
+    ) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens = refill(tokens, updated_at, now, capacity, refill_rate)
+            if tokens >= 1:
+                tokens -= 1
+                delay = 0.0
+            else:
+                delay = wait_time(tokens, refill_rate)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return delay
+
+    async def consume(
+        self,
+        key: str,
+        capacity: float,
+        refill_rate: float
+    ) -> float:
+        return self.consume_sync(key, capacity, refill_rate)
+
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """
+    Store shared by all the processes of a host through a SQLite file.
+    It is a local stand-in for a network backend: each consumption is
+    an immediate transaction, run in a worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=5, check_same_thread=False,
+            isolation_level=None
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+
+    def consume_sync(
+        self,
+        key: str,
+        capacity: float,
+        refill_rate: float
+    ) -> float:
+        # The wall clock is shared between the processes:
+        now = time.time()
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                row = cursor.execute(
+                    "SELECT tokens, updated_at FROM rate_limit_buckets "
+                    "WHERE key = ?", (key,)
+                ).fetchone()
+                tokens, updated_at = row if row else (capacity, now)
+                tokens = refill(tokens, updated_at, now, capacity,
+                                refill_rate)
+                if tokens >= 1:
+                    tokens -= 1
+                    delay = 0.0
+                else:
+                    delay = wait_time(tokens, refill_rate)
+                cursor.execute(
+                    "INSERT OR REPLACE INTO rate_limit_buckets "
+                    "(key, tokens, updated_at) VALUES (?, ?, ?)",
+                    (key, tokens, now)
+                )
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        return delay
+
+    async def consume(
+        self,
+        key: str,
+        capacity: float,
+        refill_rate: float
+    ) -> float:
+        return await asyncio.to_thread(self.consume_sync, key, capacity,
+                                       refill_rate)
+
+
+class TokenBucketRateLimiter(RateLimiter):
+    """
+    Rate limiter which allows bursts of `burst` attempts per key, then
+    `per_minute` attempts per minute.
+
+    :param store: The store of the buckets.
+    :param burst: The capacity of the bucket of a key.
+    :param per_minute: The number of attempts regained per minute.
+    :param namespace: A prefix for the keys, to share a store between
+      several limiters.
+    :raises ValueError: When the burst is below 1 or the rate is not
+      positive (a bucket would never be refilled).
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        burst: int,
+        per_minute: float,
+        namespace: str = ''
+    ):
+        if burst < 1 or per_minute <= 0:
+            raise ValueError(
+                f"The rate limit of \"{namespace}\" needs a burst of at "
+                f"least 1 and a positive rate per minute, not {burst} "
+                f"and {per_minute}."
+            )
+        self.store = store
+        self.capacity = float(burst)
+        self.refill_rate = per_minute / 60.0
+        self.namespace = namespace
+
+    async def acquire(self, key: str) -> float:
+        delay = await self.store.consume(self.namespace + key,
+                                         self.capacity, self.refill_rate)
+        return delay
+
+
+def build_store(kind: str = settings.LOGIN_RATE_LIMIT_STORE) -> RateLimitStore:
+    """Build the rate limit store selected by the settings."""
+    if kind == 'memory':
+        return InMemoryRateLimitStore()
+    if kind == 'sqlite':
+        return SQLiteRateLimitStore(settings.LOGIN_RATE_LIMIT_STORE_PATH)
+    raise ValueError(
+        "The rate limit store must be \"memory\" or \"sqlite\", "
+        f"not \"{kind}\"."
+    )
@@ -0,0 +1,142 @@
+import time
+import threading
+import typing as t
+
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from percefons.core import settings
+from percefons.application.services import TokenRevocationStore
+from percefons.infrastructure.db.models import RevokedTokenModel
+
+
+class InMemoryTokenRevocationStore(TokenRevocationStore):
+    """
+    Per-process store of the revoked token IDs, mapped to their
+    expiration dates. The expired entries are deleted at most every
+    `compact_interval` seconds, on revocation.
+    """
+
+    def __init__(
+        self,
+        compact_interval: float = settings.TOKEN_REVOCATION_COMPACT_INTERVAL
+    ):
+        self.compact_interval = compact_interval
+        self._expirations = {}
+        self._compacted_at = time.time()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._expirations)
+
+    def revoke(self, token_id: str, expires_at: float) -> bool:
+        now = time.time()
+        with self._lock:
+            if now - self._compacted_at >= self.compact_interval:
+                self._compact(now)
+            current = self._expirations.get(token_id)
+            if current is not None and current > now:
+                self._expirations[token_id] = max(current, expires_at)
+                return False
+            self._expirations[token_id] = expires_at
+            return True
+
+    def is_revoked(self, token_id: str) -> bool:
+        expires_at = self._expirations.get(token_id)
+        return expires_at is not None and expires_at > time.time()
+
+    def _compact(self, now: float) -> int:
+        expired = [token_id for token_id, expires_at
+                   in self._expirations.items() if expires_at <= now]
+        for token_id in expired:
+            del self._expirations[token_id]
+        self._compacted_at = now
+        return len(expired)
+
+    def compact(self) -> int:
+        """
+        Delete the expired entries.
+
+        :returns: The number of entries deleted.
+        """
+        with self._lock:
+            return self._compact(time.time())
+
+
+class DatabaseTokenRevocationStore(TokenRevocationStore):
+    """
+    Store of the revoked token IDs shared by the workers through the
+    `revoked_tokens` table. The primary key makes the revocation atomic,
+    and the revoked IDs already seen are kept in memory.
+
+    :param session_factory: The factory of the database sessions.
+    """
+
+    def __init__(
+        self,
+        session_factory: t.Callable[[], Session],
+        compact_interval: float = settings.TOKEN_REVOCATION_COMPACT_INTERVAL
+    ):
+        self.session_factory = session_factory
+        self.compact_interval = compact_interval
+        self.cache = InMemoryTokenRevocationStore(compact_interval)
+        self._compacted_at = time.time()
+
+    def revoke(self, token_id: str, expires_at: float) -> bool:
+        with self.session_factory() as db:
+            db.add(RevokedTokenModel(token_id=token_id,
+                                     expires_at=expires_at))
+            try:
+                db.commit()
+                revoked = True
+            except IntegrityError:
+                db.rollback()
+                revoked = False
+        self.cache.revoke(token_id, expires_at)
+        if time.time() - self._compacted_at >= self.compact_interval:
+            self.compact()
+        return revoked
+
+    def is_revoked(self, token_id: str) -> bool:
+        if self.cache.is_revoked(token_id):
+            return True
+        with self.session_factory() as db:
+            revoked_token = db.get(RevokedTokenModel, token_id)
+            if revoked_token is None:
+                return False
+            expires_at = revoked_token.expires_at
+        self.cache.revoke(token_id, expires_at)
+        return expires_at > time.time()
+
+    def compact(self) -> int:
+        """
+        Delete the expired rows and entries.
+
+        :returns: The number of rows deleted.
+        """
+        now = time.time()
+        self._compacted_at = now
+        self.cache.compact()
+        with self.session_factory() as db:
+            result = db.execute(delete(RevokedTokenModel)
+                .where(RevokedTokenModel.expires_at <= now))
+            db.commit()
+        return result.rowcount
+
+
+def build_revocation_store(
+    kind: str = settings.TOKEN_REVOCATION_STORE
+) -> TokenRevocationStore:
+    """Build the token revocation store selected by the settings."""
+    if kind == 'memory':
+        return InMemoryTokenRevocationStore()
+    if kind == 'database':
+        # A revocation must be seen by all the workers at once, so the
+        # store never reads from a lagging replica:
+        from percefons.infrastructure.db.session import new_primary_session
+        return DatabaseTokenRevocationStore(new_primary_session)
+    raise ValueError(
+        "The token revocation store must be \"memory\" or \"database\", "
+        f"not \"{kind}\"."
+    )
@@ -0,0 +1,48 @@
+import time
+
+from percefons.infrastructure.metrics import REGISTRY, MetricsRegistry
+from percefons.interfaces.api.schemas import exception_schemas
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware which counts the HTTP requests and records their
+    latency, labelled by method and route template (not by raw path,
+    to keep the number of series bounded).
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = REGISTRY):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            # The response of this exception is made by the global
+            # exception handler, which is outside of this middleware:
+            status_code = exception_schemas.status_code_of(exc)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            route = scope.get('route')
+            path = getattr(route, 'path', None) or 'unmatched'
+            method = scope['method']
+            self.registry.inc('percefons_http_requests_total',
+                              method=method, route=path,
+                              status=status_code)
+            self.registry.observe('percefons_http_request_duration_seconds',
+                                  duration, method=method, route=path)
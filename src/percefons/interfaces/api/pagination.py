@@ -0,0 +1,47 @@
+import json
+import base64
+import binascii
+import typing as t
+from datetime import datetime
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(*key: t.Any) -> str:
+    """
+    Encodes the key of the last row of a page into an opaque cursor,
+    from which the next page starts.
+    """
+    values = [value.isoformat() if isinstance(value, datetime) else value
+              for value in key]
+    data = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(cursor: str, *types: type) -> t.Optional[tuple]:
+    """
+    Decodes a cursor made by `encode_cursor` into a key whose values
+    have these types. It returns None when there is no cursor.
+
+    :raises HTTPException: When the cursor is invalid (400).
+    """
+    if not cursor:
+        return None
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("Wrong number of values.")
+        key = []
+        for value, type_ in zip(values, types):
+            if type_ is datetime:
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, type_) or isinstance(value, bool):
+                raise ValueError(f"Expected a {type_.__name__}.")
+            key.append(value)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor."
+        )
+    return tuple(key)
@@ -0,0 +1,98 @@
+import json
+import typing as t
+import dataclasses
+from datetime import date, datetime
+
+from fastapi.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Functions converting the instances of a dataclass into dicts, built once
+# per class from its fields:
+_serializers: t.Dict[type, t.Callable[[t.Any], dict]] = {}
+
+
+def serializer_for(cls: type) -> t.Callable[[t.Any], dict]:
+    """Returns the function which converts an instance of the dataclass."""
+    serializer = _serializers.get(cls)
+    if serializer is None:
+        names = tuple(field.name for field in dataclasses.fields(cls))
+
+        def serializer(obj) -> dict:
+            return {name: getattr(obj, name) for name in names}
+
+        _serializers[cls] = serializer
+    return serializer
+
+
+def default(obj: t.Any) -> t.Any:
+    """Converts the values which the JSON encoders do not support."""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return serializer_for(type(obj))(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} "
+                    "is not JSON serializable")
+
+
+def dumps(content: t.Any) -> bytes:
+    """
+    Serializes the content in JSON, with orjson when it is installed.
+    The dataclasses and the dates are encoded without going through
+    `jsonable_encoder`.
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=default)
+    return json.dumps(content, default=default, ensure_ascii=False,
+                      separators=(',', ':')).encode('utf-8')
+
+
+def dumps_lines(records: t.Iterable[t.Any]) -> bytes:
+    """Serializes the records in NDJSON: one JSON document per line."""
+    if orjson is not None:
+        option = orjson.OPT_APPEND_NEWLINE
+        return b''.join(orjson.dumps(record, default=default, option=option)
+                        for record in records)
+    return b''.join(dumps(record) + b'\n' for record in records)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response which serializes its content, which can be a schema
+    dataclass, with `dumps`. A route which returns it directly skips the
+    validation and the encoding of its return value by FastAPI.
+    """
+
+    def render(self, content: t.Any) -> bytes:
+        return dumps(content)
+
+
+class NDJSONResponse(StreamingResponse):
+    """
+    Streamed NDJSON response, whose content is an iterator (or async
+    iterator) of batches of records. Each batch is serialized with
+    `dumps_lines` and sent as one chunk when it is produced.
+    """
+    media_type = 'application/x-ndjson'
+
+    def __init__(
+        self,
+        batches: t.Union[t.Iterator[t.List[t.Any]],
+                         t.AsyncIterator[t.List[t.Any]]],
+        **kwargs
+    ):
+        if hasattr(batches, '__aiter__'):
+            content = self._aencode(batches)
+        else:
+            content = (dumps_lines(batch) for batch in batches)
+        super().__init__(content, **kwargs)
+
+    @staticmethod
+    async def _aencode(batches):
+        async for batch in batches:
+            yield dumps_lines(batch)
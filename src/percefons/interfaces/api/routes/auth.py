@@ -1,24 +1,44 @@
+import math
 import logging
 
-from fastapi import Depends, APIRouter
-from sqlalchemy.orm import Session
+from fastapi import Depends, APIRouter, Request
 
+from percefons.core import settings
 from percefons.domain import validators
-from percefons.infrastructure.repositories import user_repository
-from percefons.infrastructure.services import password_handler, jwt_auth
-from percefons.infrastructure.db.session import get_db
+from percefons.application.exceptions import RateLimitExceededError
+from percefons.infrastructure.services import (
+    password_handler,
+    jwt_auth,
+    rate_limiter,
+    token_revocation
+)
+from percefons.interfaces.api.responses import FastJSONResponse
 from percefons.interfaces.api.schemas import (
     UserRegistrationRequest, UserRegistrationResponse,
-    LoginRequest, LoginResponse)
+    LoginRequest, LoginResponse, RefreshRequest)
 
-from percefons.interfaces.api.utils import get_current_user_id
+from percefons.interfaces.api.utils import (
+    get_current_user_id,
+    get_user_repository
+)
 from percefons.application.usecases import user_registration
 from percefons.application.usecases import login
+from percefons.application.usecases import token_refresh
 
 LOGGER = logging.getLogger(__name__)
 # _db_connection = Depends(get_db)
 # _user_repository = user_repository.UserRepositoryImpl(_db_connection)
-_password_handler = password_handler.PasswordHandlerImpl()
+_password_handler = password_handler.AsyncPasswordHandlerImpl()
+_revocation_store = token_revocation.build_revocation_store()
+_rate_limit_store = rate_limiter.build_store()
+_login_limiters = (
+    rate_limiter.TokenBucketRateLimiter(
+        _rate_limit_store, settings.LOGIN_RATE_LIMIT_IP_BURST,
+        settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE, namespace='login:ip:'),
+    rate_limiter.TokenBucketRateLimiter(
+        _rate_limit_store, settings.LOGIN_RATE_LIMIT_USER_BURST,
+        settings.LOGIN_RATE_LIMIT_USER_PER_MINUTE, namespace='login:user:'),
+)
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -28,10 +48,10 @@ router = APIRouter(prefix="/auth", tags=["auth"])
     response_model=UserRegistrationResponse,
     summary="Register a new user into the database."
 )
-def register(
+async def register(
     payload: UserRegistrationRequest,
     #_user_id: int = Depends(get_current_user_id)
-    db: Session = Depends(get_db)
+    user_repository_impl=Depends(get_user_repository)
 ):
     # Value object validations:
     validators.validate_username(payload.username)
@@ -39,25 +59,47 @@ def register(
     validators.validate_email(str(payload.email))
 
     # Command creation:
-    user_repository_impl = user_repository.UserRepositoryImpl(db)
-    operation = user_registration.UserRegistration(
+    operation = user_registration.AsyncUserRegistration(
         user_repository=user_repository_impl,
         password_handler=_password_handler
     )
-    cmd = user_registration.UserRegistrationCommand(operation)
+    cmd = user_registration.AsyncUserRegistrationCommand(operation)
     cmd.username = payload.username
     cmd.password = payload.password
     cmd.email = payload.email
 
     cmd.validate()
-    result = cmd.execute()
+    result = await cmd.execute()
 
     response = UserRegistrationResponse(
         username=result.username,
         userid=result.userid,
         created_at=result.created_at,
     )
-    return response
+    return FastJSONResponse(response)
+
+
+async def check_login_rate(username: str, client_ip: str):
+    """
+    Function to throttle the login attempts by client IP and by username
+    from this IP, before any database access or password verification.
+    The username bucket is per client IP so that the attempts of an
+    attacker do not lock the user out of its own logins.
+
+    :raises RateLimitExceededError: When one of the limits is reached.
+    """
+    if not settings.LOGIN_RATE_LIMIT_ENABLED:
+        return
+    ip_limiter, user_limiter = _login_limiters
+    keys = ((ip_limiter, client_ip),
+            (user_limiter, f"{username.lower()}|{client_ip}"))
+    for limiter, key in keys:
+        delay = await limiter.acquire(key)
+        if delay:
+            LOGGER.warning(f"Login throttled for {limiter.namespace}{key}.")
+            raise RateLimitExceededError(
+                message="Too many login attempts, please retry later.",
+                retry_after=math.ceil(delay))
 
 
 @router.post(
@@ -65,22 +107,57 @@ def register(
     response_model=LoginResponse,
     summary="Login the user using its username and password."
 )
-def login_fn(payload: LoginRequest, db: Session = Depends(get_db)):
-    user_repository_impl = user_repository.UserRepositoryImpl(db)
+async def login_fn(
+    payload: LoginRequest,
+    request: Request,
+    user_repository_impl=Depends(get_user_repository)
+):
+    client_ip = request.client.host if request.client else 'unknown'
+    await check_login_rate(payload.username, client_ip)
+
     auth = jwt_auth.JWTAuthImpl()
-    operation = login.Login(
+    operation = login.AsyncLogin(
         user_repository=user_repository_impl,
         password_handler=_password_handler, jwt_service=auth,
     )
-    cmd = login.LoginCommand(operation)
+    cmd = login.AsyncLoginCommand(operation)
     cmd.username = payload.username
     cmd.password = payload.password
 
     cmd.validate()
-    result = cmd.execute()
+    result = await cmd.execute()
 
     response = LoginResponse(
         access_token=result.tokens['access_token'],
         refresh_token=result.tokens['refresh_token'],
     )
-    return response
+    return FastJSONResponse(response)
+
+
+@router.post(
+    path="/refresh",
+    response_model=LoginResponse,
+    summary="Exchange a refresh token against new tokens."
+)
+async def refresh(payload: RefreshRequest):
+    operation = token_refresh.AsyncTokenRefresh(
+        jwt_service=jwt_auth.JWTAuthImpl(),
+        revocation_store=_revocation_store,
+        family_ttl=settings.REFRESH_TOKEN_EXPIRE_MINUTES * 60,
+    )
+    cmd = token_refresh.AsyncTokenRefreshCommand(operation)
+    cmd.refresh_token = payload.refresh_token
+
+    cmd.validate()
+    result = await cmd.execute()
+
+    response = LoginResponse(
+        access_token=result.tokens['access_token'],
+        refresh_token=result.tokens['refresh_token'],
+    )
+    return FastJSONResponse(response)
+
+
+def shutdown():
+    """Release the resources held by the auth routes."""
+    _password_handler.shutdown()
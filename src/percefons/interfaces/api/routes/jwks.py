@@ -0,0 +1,32 @@
+import logging
+
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+
+from percefons.core import settings
+from percefons.infrastructure.services import jwt_keys
+
+LOGGER = logging.getLogger(__name__)
+
+router = APIRouter(tags=["auth"])
+EMPTY_JWKS = b'{"keys":[]}'
+
+
+@router.get(
+    path="/.well-known/jwks.json",
+    summary="Public keys which verify the access tokens."
+)
+def jwks(request: Request):
+    if jwt_keys.uses_key_ring():
+        body, etag = jwt_keys.get_key_ring().jwks()
+    else:
+        # The access tokens are signed with a shared secret:
+        body, etag = EMPTY_JWKS, '"empty"'
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE}",
+        "ETag": etag,
+    }
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json",
+                    headers=headers)
@@ -0,0 +1,69 @@
+import logging
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from percefons.infrastructure import metrics
+from percefons.infrastructure.db import session
+from percefons.infrastructure.db.pool import pool_statistics
+from percefons.infrastructure.repositories import user_perm_repository
+from percefons.interfaces.api.utils import get_token_cache_stats
+
+LOGGER = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/monitoring", tags=["monitoring"])
+metrics_router = APIRouter(tags=["monitoring"])
+
+
+@router.get(
+    path="/db-pool",
+    summary="Live statistics of the database connection pools."
+)
+def db_pool_stats():
+    stats = {"sync": pool_statistics(session.engine)}
+    if session.async_engine is not None:
+        stats["async"] = pool_statistics(session.async_engine.sync_engine)
+    for name, replicas in zip(("replicas", "async_replicas"),
+                              session.get_replica_sets()):
+        if replicas is not None:
+            stats[name] = replicas.statistics()
+    return stats
+
+
+def _pool_metrics(name: str, engine) -> list:
+    stats = pool_statistics(engine)
+    labels = [('engine', name)]
+    lines = []
+    for key in ('checked_out', 'overflow', 'size'):
+        if key in stats:
+            lines.append(f'percefons_db_pool_{key}'
+                         f'{metrics.format_labels(labels)} {stats[key]}')
+    if 'wait_time' in stats:
+        lines.extend(metrics.render_histogram(
+            'percefons_db_pool_wait_seconds', stats['wait_time'], labels))
+    return lines
+
+
+def _cache_metrics(name: str, stats: dict) -> list:
+    labels = metrics.format_labels([('cache', name)])
+    return [f'percefons_cache_hits_total{labels} {stats["hits"]}',
+            f'percefons_cache_misses_total{labels} {stats["misses"]}',
+            f'percefons_cache_size{labels} {stats["size"]}']
+
+
+@metrics_router.get(
+    path="/metrics",
+    response_class=PlainTextResponse,
+    summary="Metrics in the Prometheus text exposition format."
+)
+def prometheus_metrics():
+    lines = _pool_metrics('sync', session.engine)
+    if session.async_engine is not None:
+        lines.extend(_pool_metrics('async', session.async_engine.sync_engine))
+    lines.extend(_cache_metrics('access_token', get_token_cache_stats()))
+    lines.extend(_cache_metrics('permission',
+                                user_perm_repository.permission_cache.stats()))
+    content = metrics.REGISTRY.render() + '\n'.join(lines) + '\n'
+    return PlainTextResponse(
+        content, media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
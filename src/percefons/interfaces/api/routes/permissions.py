@@ -0,0 +1,42 @@
+import typing as t
+
+from fastapi import Depends, APIRouter, Query
+
+from percefons.core import settings
+from percefons.application.utils import await_call
+from percefons.interfaces.api.pagination import encode_cursor, decode_cursor
+from percefons.interfaces.api.responses import FastJSONResponse
+from percefons.interfaces.api.schemas import PermissionItem, PermissionPage
+from percefons.interfaces.api.utils import (
+    get_current_user_id,
+    get_permission_repository
+)
+
+router = APIRouter(prefix="/permissions", tags=["permissions"])
+
+
+@router.get(
+    path="",
+    response_model=PermissionPage,
+    summary="List the permissions, ordered by name."
+)
+async def list_permissions(
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1,
+                       le=settings.LIST_MAX_PAGE_SIZE),
+    cursor: t.Optional[str] = None,
+    _user_id: int = Depends(get_current_user_id),
+    permission_repository_impl=Depends(get_permission_repository)
+):
+    after = decode_cursor(cursor, str, int)
+    permissions = await await_call(permission_repository_impl.list_page,
+                                   limit + 1, after)
+    next_cursor = None
+    if len(permissions) > limit:
+        permissions = permissions[:limit]
+        next_cursor = encode_cursor(permissions[-1].name, permissions[-1].id)
+
+    items = [PermissionItem(id=perm.id, name=perm.name,
+                            code_name=perm.code_name)
+             for perm in permissions]
+    return FastJSONResponse(
+        PermissionPage(items=items, next_cursor=next_cursor))
@@ -0,0 +1,79 @@
+import typing as t
+from datetime import datetime
+
+from fastapi import Depends, APIRouter, Query
+
+from percefons.core import settings
+from percefons.application.utils import await_call
+from percefons.infrastructure.db import session
+from percefons.infrastructure.repositories import user_export
+from percefons.interfaces.api.pagination import encode_cursor, decode_cursor
+from percefons.interfaces.api.responses import (
+    FastJSONResponse,
+    NDJSONResponse
+)
+from percefons.interfaces.api.schemas import UserItem, UserPage
+from percefons.interfaces.api.utils import (
+    get_user_repository,
+    require_permission
+)
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.get(
+    path="",
+    response_model=UserPage,
+    summary="List the users, from the newest to the oldest."
+)
+async def list_users(
+    limit: int = Query(settings.LIST_PAGE_SIZE, ge=1,
+                       le=settings.LIST_MAX_PAGE_SIZE),
+    cursor: t.Optional[str] = None,
+    is_active: t.Optional[bool] = None,
+    is_staff: t.Optional[bool] = None,
+    _user_id: int = Depends(require_permission("VIEW_USER")),
+    user_repository_impl=Depends(get_user_repository)
+):
+    after = decode_cursor(cursor, datetime, int)
+    # One more row than the page tells whether there is a next page:
+    users = await await_call(user_repository_impl.list_page, limit + 1,
+                             after, is_active, is_staff)
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+
+    items = [UserItem(id=user.id, username=user.username, email=user.email,
+                      is_active=user.is_active, is_staff=user.is_staff,
+                      is_superuser=user.is_superuser,
+                      created_at=user.created_at)
+             for user in users]
+    return FastJSONResponse(UserPage(items=items, next_cursor=next_cursor))
+
+
+def _export_batches(batch_size: int):
+    # The session lives as long as the response is streamed:
+    with session.new_session() as db:
+        yield from user_export.iter_user_batches(db, batch_size)
+
+
+async def _async_export_batches(batch_size: int):
+    async with session.get_async_session_factory()() as db:
+        async for batch in user_export.aiter_user_batches(db, batch_size):
+            yield batch
+
+
+@router.get(
+    path="/export",
+    response_class=NDJSONResponse,
+    summary="Export all the users and their permissions in NDJSON."
+)
+async def export_users(
+    _user_id: int = Depends(require_permission("VIEW_USER"))
+):
+    if settings.DATABASE_ASYNC:
+        batches = _async_export_batches(settings.EXPORT_BATCH_SIZE)
+    else:
+        batches = _export_batches(settings.EXPORT_BATCH_SIZE)
+    return NDJSONResponse(batches)
@@ -1,6 +1,9 @@
 from .user_registration_schema import (
     UserRegistrationRequest, UserRegistrationResponse)
-from .login_schemas import LoginRequest, LoginResponse
+from .login_schemas import LoginRequest, LoginResponse, RefreshRequest
+from .listing_schemas import (
+    UserItem, UserPage, PermissionItem, PermissionPage)
 
 __all__ = ['UserRegistrationRequest', 'UserRegistrationResponse',
-           'LoginRequest', 'LoginResponse']
+           'LoginRequest', 'LoginResponse', 'RefreshRequest',
+           'UserItem', 'UserPage', 'PermissionItem', 'PermissionPage']
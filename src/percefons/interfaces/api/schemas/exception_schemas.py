@@ -1,6 +1,6 @@
 import typing as t
 from dataclasses import dataclass
-from fastapi.responses import JSONResponse
+from percefons.interfaces.api.responses import FastJSONResponse
 
 
 @dataclass
@@ -16,8 +16,9 @@ class InvalidFieldResponse:
     field: str = 'field_name'
 
 
+@dataclass
 class InvalidUserPasswordResponse(InvalidFieldResponse):
-    ...
+    errors: list = None
 
 
 @dataclass
@@ -25,15 +26,29 @@ class AuthenticationFailureResponse:
     message: str = "Authentication failed."
 
 
+@dataclass
+class ServiceBusyResponse:
+    message: str = "The server is busy, please retry later."
+    code: str = "service_busy"
+
+
+@dataclass
+class RateLimitExceededResponse:
+    message: str = "Too many attempts, please retry later."
+    code: str = "rate_limited"
+
+
 Response = t.Union[UserIsAlreadyExistsResponse]
 RESPONSE_CLASSES = {
     'UserIsAlreadyExists': (UserIsAlreadyExistsResponse, 403),
     'InvalidUserPasswordError': (InvalidUserPasswordResponse, 400),
     'AuthenticationError': (AuthenticationFailureResponse, 401),
+    'ServiceBusyError': (ServiceBusyResponse, 429),
+    'RateLimitExceededError': (RateLimitExceededResponse, 429),
 }
 
 
-def _make_response(exc: Exception) -> t.Optional[JSONResponse]:
+def _make_response(exc: Exception) -> t.Optional[FastJSONResponse]:
     """
     This function allow to make response if the exc is instance
     of exception_class.
@@ -51,7 +66,24 @@ def _make_response(exc: Exception) -> t.Optional[JSONResponse]:
             value = exc.__dict__[attr_name]
             response.__dict__[attr_name] = value
 
-    return JSONResponse(content=response.__dict__, status_code=code)
+    headers = None
+    retry_after = getattr(exc, 'retry_after', None)
+    if retry_after is not None:
+        headers = {'Retry-After': str(retry_after)}
+
+    return FastJSONResponse(content=response, status_code=code,
+                            headers=headers)
+
+
+def status_code_of(exc: Exception) -> int:
+    """
+    This function returns the HTTP status code of the response made
+    for this exception.
+    """
+    exception_class_name = exc.__class__.__name__
+    if exception_class_name not in RESPONSE_CLASSES:
+        return 500
+    return RESPONSE_CLASSES[exception_class_name][1]
 
 
 def exception_handler(exc: Exception) -> t.Optional[Response]:
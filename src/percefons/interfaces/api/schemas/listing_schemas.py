@@ -0,0 +1,34 @@
+import typing as t
+from datetime import datetime
+from dataclasses import dataclass
+
+
+@dataclass
+class UserItem:
+    id: int
+    username: str
+    email: str = None
+    is_active: bool = False
+    is_staff: bool = False
+    is_superuser: bool = False
+    created_at: datetime = None
+
+
+@dataclass
+class UserPage:
+    items: t.List[UserItem]
+    # Cursor of the next page, None on the last page:
+    next_cursor: t.Optional[str] = None
+
+
+@dataclass
+class PermissionItem:
+    id: int
+    name: str
+    code_name: str
+
+
+@dataclass
+class PermissionPage:
+    items: t.List[PermissionItem]
+    next_cursor: t.Optional[str] = None
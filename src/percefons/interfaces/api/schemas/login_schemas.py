@@ -11,3 +11,8 @@ class LoginRequest:
 class LoginResponse:
     access_token: str
     refresh_token: str
+
+
+@dataclass
+class RefreshRequest:
+    refresh_token: str
@@ -1,17 +1,37 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-# from sqlalchemy.orm import Session
-from percefons.infrastructure.services.jwt_auth import JWTAuthImpl
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from percefons.core import settings
+from percefons.domain.repositories import (
+    UserRepository,
+    AsyncUserRepository,
+    UserPermissionRepository,
+    AsyncUserPermissionRepository,
+    PermissionRepository,
+    AsyncPermissionRepository
+)
+from percefons.application.utils import await_call
+from percefons.infrastructure.db.session import get_db, get_async_db
+from percefons.infrastructure.repositories import (
+    user_repository,
+    user_perm_repository,
+    permission_repository
+)
+from percefons.infrastructure.services.jwt_auth import (
+    JWTAuthImpl,
+    CachedJWTAuthImpl
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
-_auth = JWTAuthImpl()
+_auth = CachedJWTAuthImpl()
 
 
 def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
     """
     This function is used to retrieve the current user ID which is connected.
     """
-    result = _auth.verify_access_token(token)
+    result = _auth.verify_auth(token)
 
     if result.status != JWTAuthImpl.SUCCESS:
         raise HTTPException(
@@ -27,3 +47,89 @@ def get_current_user_id(token: str = Depends(oauth2_scheme)) -> int:
             detail="Invalid payload subject."
         )
     return int(sub)
+
+
+def revoke_access_token(token: str):
+    """
+    This function is used to remove a revoked access token from the
+    verified token cache.
+    """
+    _auth.invalidate(token)
+
+
+def get_token_cache_stats() -> dict:
+    """This function returns the counters of the verified token cache."""
+    return _auth.cache_stats()
+
+
+def _get_user_repository(db: Session = Depends(get_db)) -> UserRepository:
+    return user_repository.UserRepositoryImpl(db)
+
+
+async def _get_async_user_repository(
+    db: AsyncSession = Depends(get_async_db)
+) -> AsyncUserRepository:
+    return user_repository.AsyncUserRepositoryImpl(db)
+
+
+# Dependency which provides the user repository of the configured
+# database engine (synchronous or asyncio):
+get_user_repository = (_get_async_user_repository
+                       if settings.DATABASE_ASYNC else _get_user_repository)
+
+
+def _get_user_permission_repository(
+    db: Session = Depends(get_db)
+) -> UserPermissionRepository:
+    return user_perm_repository.UserPermissionRepositoryImpl(db)
+
+
+async def _get_async_user_permission_repository(
+    db: AsyncSession = Depends(get_async_db)
+) -> AsyncUserPermissionRepository:
+    return user_perm_repository.AsyncUserPermissionRepositoryImpl(db)
+
+
+get_user_permission_repository = (
+    _get_async_user_permission_repository
+    if settings.DATABASE_ASYNC else _get_user_permission_repository)
+
+
+def _get_permission_repository(
+    db: Session = Depends(get_db)
+) -> PermissionRepository:
+    return permission_repository.PermissionRepositoryImpl(db)
+
+
+async def _get_async_permission_repository(
+    db: AsyncSession = Depends(get_async_db)
+) -> AsyncPermissionRepository:
+    return permission_repository.AsyncPermissionRepositoryImpl(db)
+
+
+get_permission_repository = (
+    _get_async_permission_repository
+    if settings.DATABASE_ASYNC else _get_permission_repository)
+
+
+def require_permission(code_name: str):
+    """
+    This function builds a dependency which checks that the current user
+    has the permission with this code name. It returns the user ID.
+
+    Usage: `user_id: int = Depends(require_permission("VIEW_USER"))`.
+    """
+
+    async def check_permission(
+        user_id: int = Depends(get_current_user_id),
+        repository=Depends(get_user_permission_repository)
+    ) -> int:
+        codes = await await_call(repository.get_permission_codes, user_id)
+        if code_name not in codes:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You do not have the permission to do this action."
+            )
+        return user_id
+
+    return check_permission
@@ -1,12 +1,89 @@
-import uvicorn
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from sqlalchemy.util import greenlet_spawn
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from percefons.core import settings
-from percefons.interfaces.api.routes.auth import router as auth_router
+from percefons.infrastructure.bootstrap import bootstrap
+from percefons.infrastructure.db import session
+from percefons.infrastructure.repositories import user_repository
+from percefons.infrastructure.services import jwt_keys
+from percefons.interfaces.api.routes import (
+    auth, jwks, monitoring, users, permissions)
 from percefons.interfaces.api.schemas import exception_schemas
+from percefons.interfaces.api.responses import FastJSONResponse
+from percefons.interfaces.api.middlewares import MetricsMiddleware
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def load_username_filter():
+    """Load the new usernames into the username filter."""
+    with session.new_session() as db:
+        user_repository.username_filter.load(db)
+
+
+async def refresh_username_filter():
+    """Periodically load the usernames created by the other processes."""
+    while True:
+        await asyncio.sleep(settings.USERNAME_FILTER_REFRESH)
+        try:
+            await asyncio.to_thread(load_username_filter)
+        except Exception as e:
+            LOGGER.warning(f"Username filter refresh failed: {e}")
+
+
+async def rotate_signing_keys():
+    """Periodically generate the new signing key and delete the old ones."""
+    while True:
+        await asyncio.sleep(3600)
+        try:
+            await asyncio.to_thread(jwt_keys.get_key_ring().rotate)
+        except Exception as e:
+            LOGGER.warning(f"Signing key rotation failed: {e}")
+
+
+async def check_replicas():
+    """Periodically check the health and the lag of the read replicas."""
+    while True:
+        replicas, async_replicas = session.get_replica_sets()
+        try:
+            if replicas is not None:
+                await asyncio.to_thread(replicas.check)
+            if async_replicas is not None:
+                # The asyncio driver runs the blocking API in a greenlet:
+                await greenlet_spawn(async_replicas.check)
+        except Exception as e:
+            LOGGER.warning(f"Database replica check failed: {e}")
+        await asyncio.sleep(settings.DATABASE_REPLICA_CHECK_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Start up and shut down the application resources."""
+    tasks = []
+    await asyncio.to_thread(bootstrap)
+    if session.replica_urls():
+        tasks.append(asyncio.create_task(check_replicas()))
+    if user_repository.username_filter is not None:
+        await asyncio.to_thread(load_username_filter)
+        tasks.append(asyncio.create_task(refresh_username_filter()))
+    if jwt_keys.uses_key_ring():
+        await asyncio.to_thread(jwt_keys.get_key_ring)
+        tasks.append(asyncio.create_task(rotate_signing_keys()))
+    yield
+    for task in tasks:
+        task.cancel()
+    auth.shutdown()
+    await session.dispose_engines()
+
 
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     title=settings.APP_NAME,
     version="1.0.0",
     description=(
@@ -20,8 +97,16 @@ app = FastAPI(
                 "User registration and login (OAuth2 password)."
             )
         },
+        {
+            "name": "Users",
+            "description": "Paginated listings of the users and permissions."
+        },
         # {"name": "documents", "description": "Upload and manage documents for retrieval."},
         # {"name": "query", "description": "Ask questions to the agentic RAG system."},
+        {
+            "name": "Monitoring",
+            "description": "Runtime statistics of the server."
+        },
         # {"name": "health", "description": "Health check endpoint."},
     ],
 )
@@ -36,7 +121,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(auth_router, prefix=settings.API_V1_PREFIX)
+app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
+app.include_router(jwks.router)
+app.include_router(users.router, prefix=settings.API_V1_PREFIX)
+app.include_router(permissions.router, prefix=settings.API_V1_PREFIX)
+app.include_router(monitoring.router, prefix=settings.API_V1_PREFIX)
+
+if settings.METRICS_ENABLED:
+    from percefons.infrastructure import instrumentation
+    instrumentation.install()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(monitoring.metrics_router)
 
 
 @app.exception_handler(Exception)
@@ -45,20 +140,27 @@ async def global_exception_handler(_request, exc):
     if response is not None:
         return response
     else:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=500,
             content={"message": str(exc), "code": "internal_server_error"}
         )
 
 
 def main():
-    """Main function to start asynchronous server."""
-    # Global exception handler
+    """
+    Main function to start asynchronous server: a single reloading
+    process in debug mode, else the production server.
+    """
+    if not settings.DEBUG:
+        from percefons.server import serve
+        serve()
+        return
+    import uvicorn
     uvicorn.run(
         app="percefons.main:app",
-        host="0.0.0.0",
-        port=8080,
-        reload=settings.DEBUG
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        reload=True
     )
 
 
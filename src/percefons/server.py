@@ -0,0 +1,50 @@
+import os
+import typing as t
+
+from percefons.core import settings
+
+# Import string of the application, imported by each worker process:
+APP = "percefons.main:app"
+
+
+def available_cpus() -> int:
+    """Returns the number of CPUs which this process may run on."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def server_options(**overrides) -> t.Dict[str, t.Any]:
+    """
+    Returns the options of the production uvicorn server, from the
+    settings. Each worker is a process spawned by uvicorn which imports
+    the application, so it creates its own engines and connection pools.
+
+    :param overrides: The options which replace the settings, None
+      values being ignored.
+    """
+    options = {
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "workers": settings.SERVER_WORKERS or available_cpus(),
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "timeout_keep_alive": settings.SERVER_KEEP_ALIVE,
+        "backlog": settings.SERVER_BACKLOG,
+        "timeout_graceful_shutdown": settings.SERVER_GRACEFUL_TIMEOUT,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY or None,
+        "proxy_headers": settings.SERVER_PROXY_HEADERS,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+        "reload": False,
+    }
+    if os.path.isfile(settings.LOGGING_CONFIG):
+        options["log_config"] = settings.LOGGING_CONFIG
+    options.update({name: value for name, value in overrides.items()
+                    if value is not None})
+    return options
+
+
+def serve(**overrides):
+    """Runs the production server until it is stopped."""
+    import uvicorn
+    uvicorn.run(APP, **server_options(**overrides))
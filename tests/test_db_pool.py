@@ -0,0 +1,98 @@
+import time
+import logging
+import tempfile
+import threading
+from unittest import TestCase, mock
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from percefons.core import settings
+from percefons.main import app
+from percefons.infrastructure.db import pool, session
+from percefons.infrastructure.db.pool import (
+    TimedQueuePool,
+    engine_options,
+    install_idle_ping,
+    pool_statistics
+)
+
+
+LOG = logging.getLogger(__name__)
+
+
+class PoolTest(TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.url = f"sqlite:///{tmp_dir.name}/pool.db"
+
+    def create_engine(self, **options):
+        with mock.patch.object(settings, 'DATABASE_POOL_PRE_PING', 'idle'):
+            options = {**engine_options(self.url), **options}
+        engine = create_engine(self.url, **options)
+        self.addCleanup(engine.dispose)
+        self.assertIsInstance(engine.pool, TimedQueuePool)
+        return engine
+
+    def test_idle_connections_are_pinged(self):
+        engine = self.create_engine(pool_size=1, max_overflow=0)
+        install_idle_ping(engine, idle_time=30)
+        now = [1000.0]
+        with mock.patch.object(pool.time, 'monotonic', lambda: now[0]), \
+                mock.patch.object(engine.dialect, 'do_ping',
+                                  return_value=True) as do_ping:
+            # A new connection is not pinged:
+            engine.connect().close()
+            do_ping.assert_not_called()
+            now[0] += 10
+            engine.connect().close()
+            do_ping.assert_not_called()
+            now[0] += 31
+            engine.connect().close()
+            do_ping.assert_called_once()
+
+    def test_dead_idle_connection_is_replaced(self):
+        engine = self.create_engine(pool_size=1, max_overflow=0)
+        install_idle_ping(engine, idle_time=0)
+        with engine.connect() as connection:
+            first = connection.connection.dbapi_connection
+        with mock.patch.object(engine.dialect, 'do_ping',
+                               side_effect=[False, True]):
+            with engine.connect() as connection:
+                second = connection.connection.dbapi_connection
+        self.assertIsNot(second, first)
+
+    def test_checkout_wait_time_is_recorded(self):
+        engine = self.create_engine(pool_size=1, max_overflow=0)
+        connection = engine.connect()
+        waiter = threading.Thread(target=lambda: engine.connect().close())
+        waiter.start()
+        time.sleep(0.1)
+        connection.close()
+        waiter.join()
+
+        stats = pool_statistics(engine)
+        LOG.debug(stats)
+        wait_time = stats["wait_time"]
+        self.assertEqual(wait_time["count"], 2)
+        self.assertGreaterEqual(wait_time["sum"], 0.09)
+        # The second checkout waited for the first connection:
+        self.assertEqual(wait_time["buckets"]["0.05"], 1)
+        self.assertEqual(stats["checked_out"], 0)
+
+    def test_db_pool_route(self):
+        engine = self.create_engine()
+        engine.connect().close()
+        with mock.patch.object(session, '_engine', engine), \
+                mock.patch.object(session, '_replicas', None), \
+                mock.patch.object(settings, 'DATABASE_ASYNC', False):
+            response = TestClient(app).get(
+                settings.API_V1_PREFIX + "/monitoring/db-pool")
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+        self.assertEqual(stats["sync"]["pool"], "TimedQueuePool")
+        self.assertEqual(stats["sync"]["size"], settings.DATABASE_POOL_SIZE)
+        self.assertEqual(stats["sync"]["wait_time"]["count"], 1)
+        self.assertNotIn("async", stats)
@@ -0,0 +1,110 @@
+import json
+import logging
+import tempfile
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase, mock
+
+import bcrypt
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from percefons.domain.exceptions import InvalidFieldError
+from percefons.infrastructure.db.models import BaseModel
+from percefons.infrastructure.managers import import_users
+from percefons.infrastructure.managers.import_users import (
+    ImportReport,
+    parse_record,
+    read_records,
+    import_batch
+)
+from percefons.infrastructure.repositories.user_repository import (
+    UserRepositoryImpl
+)
+
+
+LOG = logging.getLogger(__name__)
+PASSWORD = "aX6/9p6XoY]o4$#"
+HASHED_PASSWORD = bcrypt.hashpw(b"secret", bcrypt.gensalt(4)).decode()
+
+
+class ParseRecordTest(TestCase):
+
+    def test_plain_password(self):
+        user, password = parse_record({
+            "username": " alice ", "email": "alice@email.com",
+            "password": PASSWORD, "is_staff": "yes",
+            "created_at": "2024-05-01T08:00:00"})
+        self.assertEqual(user.username, "alice")
+        self.assertEqual(password, PASSWORD)
+        self.assertIsNone(user.hashed_password)
+        self.assertTrue(user.is_active)
+        self.assertTrue(user.is_staff)
+        self.assertEqual(user.created_at, datetime(2024, 5, 1, 8))
+
+    def test_hashed_password(self):
+        user, password = parse_record({"username": "bob",
+                                       "hashed_password": HASHED_PASSWORD,
+                                       "is_active": "false"})
+        self.assertIsNone(password)
+        self.assertEqual(user.hashed_password, HASHED_PASSWORD)
+        self.assertFalse(user.is_active)
+
+    def test_invalid_records(self):
+        records = [
+            {"password": PASSWORD},
+            {"username": "carol"},
+            {"username": "carol", "hashed_password": "not-a-hash"},
+            {"username": 12, "password": PASSWORD},
+        ]
+        for record in records:
+            with self.assertRaises(InvalidFieldError):
+                parse_record(record)
+
+
+class ImportTest(TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        BaseModel.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.user_repos = UserRepositoryImpl(self.db)
+        self.report = ImportReport()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_bad_lines_are_reported(self):
+        lines = [
+            json.dumps({"username": "alice", "password": PASSWORD}),
+            '{"username": "bob", ',
+            json.dumps(["not", "an", "object"]),
+            '',
+            json.dumps({"username": "carol", "password": PASSWORD}),
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl') as file:
+            file.write("\n".join(lines) + "\n")
+            file.flush()
+            records = list(read_records(file.name, 'jsonl', self.report))
+        self.assertEqual([line for line, _ in records], [1, 5])
+        self.assertEqual(self.report.read, 2)
+        self.assertEqual(self.report.failed, 2)
+
+    def test_existing_users_are_skipped(self):
+        batch = [
+            (1, {"username": "alice", "hashed_password": HASHED_PASSWORD}),
+            (2, {"username": "bob", "password": PASSWORD}),
+            (3, {"username": "alice", "hashed_password": HASHED_PASSWORD}),
+            (4, {"username": "bad name", "password": PASSWORD}),
+        ]
+        with ThreadPoolExecutor(1) as executor, \
+                mock.patch.object(import_users.ph, 'hash_password',
+                                  return_value=HASHED_PASSWORD):
+            import_batch(batch[:2], self.user_repos, executor, self.report)
+            import_batch(batch[2:], self.user_repos, executor, self.report)
+        LOG.debug(str(self.report))
+        self.assertEqual(self.report.read, 4)
+        self.assertEqual(self.report.created, 2)
+        self.assertEqual(self.report.failed, 2)
+        self.assertEqual(self.user_repos.get_by_username("bob")
+                         .hashed_password, HASHED_PASSWORD)
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import logging
+import tempfile
+from unittest import TestCase
+
+import jwt
+from jwt.algorithms import RSAAlgorithm
+
+from percefons.application.services import JWTAuth
+from percefons.infrastructure.services.jwt_auth import JWTAuthImpl
+from percefons.infrastructure.services.jwt_keys import (
+    KeyRing,
+    jwk_thumbprint
+)
+
+
+LOG = logging.getLogger(__name__)
+SECRET = "a-test-secret-which-is-long-enough-for-hs256"
+DAY = 86400
+
+
+class KeyRingTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def key_ring(self, algorithm: str = 'EdDSA') -> KeyRing:
+        directory = os.path.join(self.tmp_dir.name, algorithm)
+        return KeyRing(directory, algorithm, rotation_period=DAY,
+                       activation_delay=60, retention=3600)
+
+    def test_tokens_are_verified_with_the_published_key(self):
+        for algorithm in ('RS256', 'EdDSA'):
+            auth = JWTAuthImpl(SECRET, SECRET, algorithm,
+                               self.key_ring(algorithm))
+            token = auth.get_auth("12")["access_token"]
+            header = jwt.get_unverified_header(token)
+            self.assertEqual(header["alg"], algorithm)
+            self.assertEqual(auth.verify_auth(token).status,
+                             JWTAuth.SUCCESS)
+            jwks = json.loads(auth.key_ring.jwks()[0])
+            kids = [key["kid"] for key in jwks["keys"]]
+            self.assertIn(header["kid"], kids)
+
+    def test_new_key_is_used_after_its_activation_delay(self):
+        key_ring = self.key_ring()
+        first = key_ring.rotate(now=time.time() - DAY)
+        second = key_ring.rotate()
+        self.assertEqual(len(json.loads(key_ring.jwks()[0])["keys"]), 2)
+        os.utime(first.path, (time.time() - DAY, time.time() - DAY))
+        key_ring = self.key_ring()
+        key_ring.load()
+        self.assertEqual(key_ring.current().kid, first.kid)
+        self.assertEqual(key_ring.current(now=time.time() + 61).kid,
+                         second.kid)
+
+    def test_other_instances_load_the_new_keys(self):
+        signer = JWTAuthImpl(SECRET, SECRET, 'EdDSA', self.key_ring())
+        verifier = JWTAuthImpl(SECRET, SECRET, 'EdDSA', self.key_ring())
+        verifier.key_ring.load()
+        signer.key_ring.rotate(now=time.time() + 2 * DAY)
+        token = signer.get_auth("12")["access_token"]
+        time.sleep(1)
+        self.assertEqual(verifier.verify_auth(token).status,
+                         JWTAuth.SUCCESS)
+
+    def test_unknown_key_is_rejected(self):
+        auth = JWTAuthImpl(SECRET, SECRET, 'EdDSA', self.key_ring())
+        token = jwt.encode({"sub": "12"}, SECRET, algorithm='HS256',
+                           headers={"kid": "unknown"})
+        self.assertEqual(auth.verify_auth(token).status, JWTAuth.FAILED)
+
+    def test_retired_keys_are_pruned(self):
+        key_ring = self.key_ring()
+        old = key_ring.rotate(now=time.time() - 2 * DAY)
+        path = old.path
+        os.utime(path, (time.time() - 2 * DAY, time.time() - 2 * DAY))
+        key_ring = self.key_ring()
+        key_ring.load()
+        key_ring.rotate()
+        key_ring.prune(now=time.time() + 3600 + 61)
+        self.assertNotIn(old.kid, key_ring.keys)
+        self.assertFalse(os.path.exists(path))
+
+    def test_key_ids_differ_between_directories(self):
+        # Two servers which do not share their directory:
+        now = time.time()
+        first = self.key_ring().rotate(now)
+        second = KeyRing(os.path.join(self.tmp_dir.name, 'other'), 'EdDSA',
+                         rotation_period=DAY).rotate(now)
+        self.assertEqual(os.path.basename(first.path),
+                         os.path.basename(second.path))
+        self.assertNotEqual(first.kid, second.kid)
+        self.assertEqual(first.to_jwk()["kid"], first.kid)
+
+    def test_thumbprint_of_rfc_7638(self):
+        # The example key of RFC 7638, section 3.1:
+        n = ("0vx7agoebGcQSuuPiLJXZptN9nndrQmbXEps2aiAFbWhM78LhWx4cbbfAAt"
+             "VT86zwu1RK7aPFFxuhDR1L6tSoc_BJECPebWKRXjBZCiFV4n3oknjhMstn6"
+             "4tZ_2W-5JsGY4Hc5n9yBXArwl93lqt7_RN5w6Cf0h4QyQ5v-65YGjQR0_FD"
+             "W2QvzqY368QQMicAtaSqzs8KJZgnYb9c7d0zgdAZHzu6qMQvRL5hajrn1n9"
+             "1CbOpbISD08qNLyrdkt-bFTWhAI4vMQFh6WeZu0fM4lFd2NcRwr3XPksINH"
+             "aQ-G_xBniIqbw0Ls1jF44-csFCur-kEgU8awapJzKnqDKgw")
+        public_key = RSAAlgorithm.from_jwk({"kty": "RSA", "n": n,
+                                            "e": "AQAB"})
+        self.assertEqual(jwk_thumbprint(public_key, 'RS256'),
+                         "NzbLsXh8uDCcd-6MNwXF4W_7noWXFZAfHkxZsRGC9Xs")
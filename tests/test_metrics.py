@@ -0,0 +1,95 @@
+import os
+import sys
+import logging
+import subprocess
+from unittest import TestCase, skipIf
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from percefons.core import settings
+from percefons.infrastructure.metrics import MetricsRegistry, timed
+from percefons.interfaces.api.middlewares import MetricsMiddleware
+
+
+LOG = logging.getLogger(__name__)
+
+# Tells whether the application of a new process serves the metrics:
+METRICS_PROBE = """
+from fastapi.testclient import TestClient
+from percefons.main import app
+from percefons.infrastructure import instrumentation
+from percefons.interfaces.api.middlewares import MetricsMiddleware
+middlewares = [middleware.cls for middleware in app.user_middleware]
+response = TestClient(app).get('/metrics')
+print(response.status_code, MetricsMiddleware in middlewares,
+      instrumentation._installed)
+"""
+
+
+class MetricsMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        def get_item(item_id: int):
+            return {"id": item_id}
+
+        @app.get("/error")
+        def error():
+            raise ValueError("failure")
+
+        app.add_middleware(MetricsMiddleware, registry=self.registry)
+        self.client = TestClient(app, raise_server_exceptions=False)
+
+    def test_requests_are_counted_per_route(self):
+        for item_id in (1, 2):
+            self.assertEqual(self.client.get(f"/items/{item_id}")
+                             .status_code, 200)
+        self.assertEqual(self.client.get("/missing").status_code, 404)
+        self.assertEqual(self.client.get("/error").status_code, 500)
+
+        content = self.registry.render()
+        LOG.debug(content)
+        self.assertIn('percefons_http_requests_total{method="GET",'
+                      'route="/items/{item_id}",status="200"} 2', content)
+        self.assertIn('percefons_http_requests_total{method="GET",'
+                      'route="unmatched",status="404"} 1', content)
+        self.assertIn('percefons_http_requests_total{method="GET",'
+                      'route="/error",status="500"} 1', content)
+        self.assertIn('percefons_http_request_duration_seconds_count'
+                      '{method="GET",route="/items/{item_id}"} 2', content)
+        self.assertIn('percefons_http_request_duration_seconds_bucket'
+                      '{method="GET",route="/items/{item_id}",le="+Inf"} 2',
+                      content)
+
+    def test_timed_stages(self):
+        @timed('test_stage', registry=self.registry)
+        def stage():
+            return 1
+
+        self.assertEqual(stage(), 1)
+        self.assertIn('percefons_stage_duration_seconds_count'
+                      '{stage="test_stage"} 1', self.registry.render())
+
+
+class MetricsEndpointTest(TestCase):
+
+    def probe(self, enabled: bool) -> list:
+        env = dict(os.environ, METRICS_ENABLED=str(enabled).lower())
+        result = subprocess.run([sys.executable, '-c', METRICS_PROBE],
+                                env=env, capture_output=True, text=True,
+                                check=True)
+        return result.stdout.split()
+
+    def test_metrics_are_served_only_when_enabled(self):
+        self.assertEqual(self.probe(True), ['200', 'True', 'True'])
+        self.assertEqual(self.probe(False), ['404', 'False', 'False'])
+
+    @skipIf(settings.METRICS_ENABLED, "the metrics are enabled")
+    def test_metrics_route_is_not_found_when_disabled(self):
+        from percefons.main import app
+        response = TestClient(app).get("/metrics")
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,115 @@
+import logging
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from percefons.domain.entities import User, Permission
+from percefons.infrastructure.db.models import BaseModel
+from percefons.infrastructure.repositories.user_repository import (
+    UserRepositoryImpl,
+    users_page_query
+)
+from percefons.infrastructure.repositories.permission_repository import (
+    PermissionRepositoryImpl
+)
+from percefons.interfaces.api.pagination import encode_cursor, decode_cursor
+
+
+LOG = logging.getLogger(__name__)
+
+
+class KeysetPaginationTest(TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        BaseModel.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.user_repos = UserRepositoryImpl(self.db)
+        # Users created at the same time are ordered by their IDs:
+        start = datetime(2024, 1, 1)
+        self.user_repos.create_many([
+            User(username=f"user{i}", hashed_password="x",
+                 email=f"user{i}@email.com", is_active=i % 2 == 0,
+                 is_staff=i % 5 == 0, created_at=start + timedelta(i // 2))
+            for i in range(10)
+        ])
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+
+    def test_pages_cover_the_users_once(self):
+        usernames = []
+        after = None
+        while True:
+            page = self.user_repos.list_page(3, after)
+            usernames.extend(user.username for user in page)
+            if len(page) < 3:
+                break
+            after = (page[-1].created_at, page[-1].id)
+        self.assertEqual(usernames, [f"user{i}" for i in reversed(range(10))])
+
+    def test_filters(self):
+        page = self.user_repos.list_page(10, is_active=True)
+        self.assertEqual([user.username for user in page],
+                         ["user8", "user6", "user4", "user2", "user0"])
+        page = self.user_repos.list_page(10, is_active=True, is_staff=False)
+        self.assertEqual(len(page), 4)
+        first = page[0]
+        page = self.user_repos.list_page(
+            10, (first.created_at, first.id), is_active=True)
+        self.assertEqual(page[0].username, "user6")
+
+    def query_plan(self, query) -> str:
+        compiled = query.compile(self.engine)
+        params = compiled.construct_params()
+        with self.engine.connect() as connection:
+            plan = connection.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + str(compiled),
+                tuple(str(params[name]) for name in compiled.positiontup)
+            ).all()
+        LOG.debug(plan)
+        return plan[0][-1]
+
+    def test_pages_seek_the_index(self):
+        after = (datetime(2024, 1, 3), 5)
+        self.assertEqual(
+            self.query_plan(users_page_query(3, after, is_active=True)),
+            "SEARCH users USING INDEX ix_users_is_active_created_at_id "
+            "(is_active=? AND created_at<?)")
+        self.assertEqual(
+            self.query_plan(users_page_query(3, after, is_staff=True)),
+            "SEARCH users USING INDEX ix_users_is_staff_created_at_id "
+            "(is_staff=? AND created_at<?)")
+
+    def test_permission_pages(self):
+        repos = PermissionRepositoryImpl(self.db)
+        repos.create_all([Permission(f"Can do {c}", f"DO_{c}")
+                          for c in "dbca"])
+        page = repos.list_page(2)
+        self.assertEqual([perm.code_name for perm in page], ["DO_a", "DO_b"])
+        page = repos.list_page(2, (page[-1].name, page[-1].id))
+        self.assertEqual([perm.code_name for perm in page], ["DO_c", "DO_d"])
+        self.assertEqual(repos.list_page(2, (page[-1].name, page[-1].id)), [])
+
+
+class CursorTest(TestCase):
+
+    def test_round_trip(self):
+        key = (datetime(2024, 5, 1, 8, 30), 42)
+        cursor = encode_cursor(*key)
+        self.assertNotIn("=", cursor)
+        self.assertEqual(decode_cursor(cursor, datetime, int), key)
+        self.assertIsNone(decode_cursor(None, datetime, int))
+
+    def test_invalid_cursors_are_rejected(self):
+        for cursor in ("not a cursor", encode_cursor("x", 1),
+                       encode_cursor(1), encode_cursor("name", True)):
+            with self.assertRaises(HTTPException) as context:
+                decode_cursor(cursor, datetime, int)
+            self.assertEqual(context.exception.status_code, 400)
+        self.assertEqual(decode_cursor(encode_cursor("b", 2), str, int),
+                         ("b", 2))
@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from datetime import datetime
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from passlib.context import CryptContext
+
+from percefons.domain.entities import User
+from percefons.application.services import JWTAuth, PasswordHandler
+from percefons.application.exceptions import ServiceBusyError
+from percefons.application.usecases.login import Login
+from percefons.infrastructure.db.models import BaseModel
+from percefons.infrastructure.repositories.user_repository import (
+    UserRepositoryImpl
+)
+from percefons.infrastructure.services.password_handler import (
+    MIN_BCRYPT_ROUNDS,
+    AsyncPasswordHandlerImpl,
+    build_crypt_context,
+    calibrate
+)
+
+
+LOG = logging.getLogger(__name__)
+
+
+class AsyncPasswordHandlerTest(TestCase):
+
+    def test_hash_and_verify_password(self):
+        handler = AsyncPasswordHandlerImpl(max_workers=1, queue_size=1)
+
+        async def run():
+            hashed = await handler.get_password_hash("aX6/9p6XoY]o4$#")
+            ok = await handler.verify_password("aX6/9p6XoY]o4$#", hashed)
+            ko = await handler.verify_password("wrong password", hashed)
+            return ok, ko
+
+        try:
+            ok, ko = asyncio.run(run())
+        finally:
+            handler.shutdown()
+        self.assertTrue(ok)
+        self.assertFalse(ko)
+
+    def test_reject_when_pool_is_saturated(self):
+        handler = AsyncPasswordHandlerImpl(max_workers=1, queue_size=0,
+                                           backpressure='reject')
+
+        async def run():
+            return await asyncio.gather(
+                *[handler.get_password_hash("secret") for _ in range(3)],
+                return_exceptions=True
+            )
+
+        try:
+            results = asyncio.run(run())
+        finally:
+            handler.shutdown()
+        LOG.debug(str(results))
+        errors = [r for r in results if isinstance(r, ServiceBusyError)]
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(errors[0].code, "too_many_requests")
+
+
+class ContextPasswordHandler(PasswordHandler):
+    def __init__(self, context: CryptContext):
+        self.context = context
+
+    def get_password_hash(self, password: str) -> str:
+        return self.context.hash(password)
+
+    def verify_password(self, plain_password, hashed_password) -> bool:
+        return self.context.verify(plain_password, hashed_password)
+
+    def needs_update(self, hashed_password: str) -> bool:
+        return self.context.needs_update(hashed_password)
+
+
+class StaticJWTAuth(JWTAuth):
+    def get_auth(self, subject: str, family: str = None) -> dict:
+        return {"access_token": subject}
+
+    def verify_auth(self, token: str) -> JWTAuth.Result:
+        return JWTAuth.Result(JWTAuth.SUCCESS)
+
+    def verify_refresh_token(self, token: str) -> JWTAuth.Result:
+        return JWTAuth.Result(JWTAuth.SUCCESS)
+
+    def refresh_auth(self, refresh_token: str) -> dict:
+        return {}
+
+
+class HashingCostTest(TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        BaseModel.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.repos = UserRepositoryImpl(self.db)
+        old_context = build_crypt_context(bcrypt_rounds=4)
+        self.repos.create(User(
+            username="alice", email="alice@email.com",
+            hashed_password=old_context.hash("aX6/9p6XoY]o4$#"),
+            created_at=datetime.now()
+        ))
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_other_cost_needs_update(self):
+        context = build_crypt_context(bcrypt_rounds=5)
+        self.assertFalse(context.needs_update(context.hash("secret")))
+        old_hash = build_crypt_context(bcrypt_rounds=4).hash("secret")
+        self.assertTrue(context.needs_update(old_hash))
+        self.assertTrue(context.verify("secret", old_hash))
+
+    def test_login_rehashes_with_the_current_cost(self):
+        context = build_crypt_context(bcrypt_rounds=5)
+        login = Login(self.repos, ContextPasswordHandler(context),
+                      StaticJWTAuth())
+        login.execute("alice", "aX6/9p6XoY]o4$#")
+        self.db.expire_all()
+        hashed = self.repos.get_by_username("alice").hashed_password
+        self.assertTrue(hashed.startswith("$2b$05$"))
+        self.assertFalse(context.needs_update(hashed))
+        login.execute("alice", "aX6/9p6XoY]o4$#")
+
+    def test_calibration_keeps_the_minimum_cost(self):
+        calibrated, duration = calibrate('bcrypt', target_ms=1, samples=1)
+        LOG.debug(f"bcrypt verification: {duration * 1000:.1f} ms")
+        self.assertEqual(calibrated["PASSWORD_BCRYPT_ROUNDS"],
+                         MIN_BCRYPT_ROUNDS)
@@ -0,0 +1,84 @@
+import logging
+from unittest import TestCase, mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from percefons.domain.entities import Permission
+from percefons.infrastructure.db import bulk
+from percefons.infrastructure.db.models import BaseModel, UserModel
+from percefons.infrastructure.repositories.permission_repository import (
+    PermissionRepositoryImpl
+)
+from percefons.infrastructure.repositories.user_perm_repository import (
+    UserPermissionRepositoryImpl
+)
+
+
+LOG = logging.getLogger(__name__)
+
+
+class PermissionRepositoryTest(TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        BaseModel.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.permission_repos = PermissionRepositoryImpl(self.db)
+        self.user_perm_repos = UserPermissionRepositoryImpl(self.db)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_create_all_is_idempotent(self):
+        first = self.permission_repos.create_all([
+            Permission("Can view user", "VIEW_USER"),
+            Permission("Can create user", "CREATE_USER"),
+        ])
+        second = self.permission_repos.create_all([
+            Permission("Can view users", "VIEW_USER"),
+        ])
+        LOG.debug(str(first) + str(second))
+        self.assertEqual(second[0].id, first[0].id)
+        perm = self.permission_repos.get_by_code_name("VIEW_USER")
+        self.assertEqual(perm.name, "Can view users")
+        self.assertEqual(len(list(self.permission_repos.all())), 2)
+
+    def test_create_all_without_on_conflict(self):
+        # The dialects without `ON CONFLICT` take the insert and select path:
+        with mock.patch.dict(bulk._DIALECT_INSERTS, clear=True):
+            self.assertFalse(bulk.supports_on_conflict('sqlite'))
+            first = self.permission_repos.create_all([
+                Permission("Can view user", "VIEW_USER"),
+            ])
+            second = self.permission_repos.create_all([
+                Permission("Can view users", "VIEW_USER"),
+                Permission("Can create user", "CREATE_USER"),
+                Permission("Can create users", "CREATE_USER"),
+            ])
+        self.assertEqual(second[0].id, first[0].id)
+        self.assertEqual(second[1].id, second[2].id)
+        perm = self.permission_repos.get_by_code_name("VIEW_USER")
+        self.assertEqual(perm.name, "Can view users")
+        perm = self.permission_repos.get_by_code_name("CREATE_USER")
+        self.assertEqual(perm.name, "Can create users")
+        self.assertEqual(len(list(self.permission_repos.all())), 2)
+
+    def test_grant_many_and_revoke_many(self):
+        self.db.add_all([UserModel(username="alice", hashed_password="x"),
+                         UserModel(username="bob", hashed_password="x")])
+        self.db.commit()
+        perms = self.permission_repos.create_all([
+            Permission("Can view user", "VIEW_USER"),
+            Permission("Can create user", "CREATE_USER"),
+        ])
+        pairs = [(user_id, perm.id) for user_id in (1, 2) for perm in perms]
+
+        self.assertEqual(self.user_perm_repos.grant_many(pairs), 4)
+        self.assertEqual(self.user_perm_repos.grant_many(pairs[:1]), 0)
+        self.assertEqual(self.user_perm_repos.get_permission_codes(1),
+                         frozenset({"VIEW_USER", "CREATE_USER"}))
+
+        self.assertEqual(self.user_perm_repos.revoke_many(pairs[:1]), 1)
+        self.assertEqual(self.user_perm_repos.get_permission_codes(1),
+                         frozenset({"CREATE_USER"}))
@@ -0,0 +1,91 @@
+import os
+import asyncio
+import logging
+import tempfile
+from unittest import TestCase, mock
+
+from percefons.infrastructure.services.rate_limiter import (
+    InMemoryRateLimitStore,
+    SQLiteRateLimitStore,
+    TokenBucketRateLimiter
+)
+from percefons.application.exceptions import RateLimitExceededError
+from percefons.interfaces.api.routes import auth
+from percefons.interfaces.api.routes.auth import check_login_rate
+
+
+LOG = logging.getLogger(__name__)
+
+
+class TokenBucketRateLimiterTest(TestCase):
+
+    def test_burst_is_allowed_then_throttled(self):
+        limiter = TokenBucketRateLimiter(InMemoryRateLimitStore(),
+                                         burst=3, per_minute=6)
+
+        async def attempts():
+            return [await limiter.acquire('alice') for _ in range(4)]
+
+        delays = asyncio.run(attempts())
+        self.assertEqual(delays[:3], [0, 0, 0])
+        self.assertAlmostEqual(delays[3], 10, delta=0.5)
+
+    def test_keys_have_their_own_buckets(self):
+        limiter = TokenBucketRateLimiter(InMemoryRateLimitStore(),
+                                         burst=1, per_minute=1)
+
+        async def attempts():
+            return [await limiter.acquire(key) for key in ('a', 'b', 'a')]
+
+        delays = asyncio.run(attempts())
+        self.assertEqual(delays[:2], [0, 0])
+        self.assertGreater(delays[2], 0)
+
+    def test_store_forgets_least_recently_used_keys(self):
+        store = InMemoryRateLimitStore(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            store.consume_sync(key, 1, 0)
+        self.assertEqual(store.consume_sync('a', 1, 0), 0)
+
+    def test_sqlite_store_is_shared_between_instances(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "limits.db")
+            first = SQLiteRateLimitStore(path)
+            second = SQLiteRateLimitStore(path)
+            self.assertEqual(first.consume_sync('alice', 1, 1 / 60), 0)
+            self.assertGreater(second.consume_sync('alice', 1, 1 / 60), 0)
+            first._connection.close()
+            second._connection.close()
+
+    def test_rate_must_be_positive(self):
+        for burst, per_minute in ((0, 5), (10, 0), (10, -1)):
+            with self.assertRaises(ValueError):
+                TokenBucketRateLimiter(InMemoryRateLimitStore(),
+                                       burst=burst, per_minute=per_minute)
+
+
+class CheckLoginRateTest(TestCase):
+
+    def setUp(self):
+        store = InMemoryRateLimitStore()
+        limiters = (
+            TokenBucketRateLimiter(store, burst=100, per_minute=60,
+                                   namespace='login:ip:'),
+            TokenBucketRateLimiter(store, burst=2, per_minute=1,
+                                   namespace='login:user:'),
+        )
+        patcher = mock.patch.object(auth, '_login_limiters', limiters)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_username_is_throttled_per_client_ip(self):
+        async def attempts():
+            for _ in range(2):
+                await check_login_rate('Alice', '10.0.0.1')
+            with self.assertRaises(RateLimitExceededError) as error:
+                await check_login_rate('alice', '10.0.0.1')
+            self.assertGreater(error.exception.retry_after, 0)
+            # The attacker does not lock the user out of another IP:
+            await check_login_rate('alice', '10.0.0.2')
+
+        asyncio.run(attempts())
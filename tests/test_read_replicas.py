@@ -0,0 +1,147 @@
+import os
+import time
+import asyncio
+import logging
+import tempfile
+from datetime import datetime
+from unittest import TestCase, mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from percefons.core import settings
+from percefons.domain.entities import User
+from percefons.infrastructure.db import session
+from percefons.infrastructure.db.models import BaseModel
+from percefons.infrastructure.db.routing import ReplicaSet, RoutingSession
+from percefons.infrastructure.repositories.user_repository import (
+    UserRepositoryImpl,
+    AsyncUserRepositoryImpl
+)
+from percefons.infrastructure.services.token_revocation import (
+    DatabaseTokenRevocationStore,
+    build_revocation_store
+)
+
+
+LOG = logging.getLogger(__name__)
+
+
+def new_user(username: str) -> User:
+    return User(username=username, hashed_password="x",
+                email=username + "@email.com", created_at=datetime.now())
+
+
+class ReadReplicaTest(TestCase):
+    """The primary and the replica are two SQLite files."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.primary = self.engine('primary.db')
+        self.replica = self.engine('replica.db')
+        # A row which only the replica has tells where a read went:
+        with sessionmaker(bind=self.replica)() as db:
+            UserRepositoryImpl(db).create(new_user("bob"))
+        self.replicas = ReplicaSet([self.replica], max_lag=5)
+        self.session_factory = sessionmaker(
+            class_=RoutingSession, primary=self.primary,
+            replicas=self.replicas
+        )
+
+    def engine(self, name: str):
+        path = os.path.join(self.tmp_dir.name, name)
+        engine = create_engine(f"sqlite:///{path}")
+        BaseModel.metadata.create_all(bind=engine)
+        self.addCleanup(engine.dispose)
+        return engine
+
+    def test_reads_go_to_the_replica_and_writes_to_the_primary(self):
+        with self.session_factory() as db:
+            repos = UserRepositoryImpl(db)
+            self.assertIsNotNone(repos.get_by_username("bob"))
+            repos.create(new_user("alice"))
+            # The session reads its own write from the primary:
+            self.assertIsNotNone(repos.get_by_username("alice"))
+            self.assertIsNone(repos.get_by_username("bob"))
+        with sessionmaker(bind=self.primary)() as db:
+            self.assertIsNotNone(
+                UserRepositoryImpl(db).get_by_username("alice"))
+
+    def test_reads_fall_back_to_the_primary(self):
+        self.replicas.mark_failed(self.replicas.replicas[0])
+        with self.session_factory() as db:
+            self.assertIsNone(UserRepositoryImpl(db).get_by_username("bob"))
+        self.replicas.check()
+        self.assertIs(self.replicas.choose(), self.replica)
+
+        lagging = ReplicaSet([self.replica], max_lag=5,
+                             lag_query="SELECT 10")
+        lagging.check()
+        self.assertIsNone(lagging.choose())
+
+    def test_unreachable_replica_is_marked_down(self):
+        path = os.path.join(self.tmp_dir.name, 'missing', 'replica.db')
+        replicas = ReplicaSet([create_engine(f"sqlite:///{path}")],
+                              max_lag=5)
+        session_factory = sessionmaker(class_=RoutingSession,
+                                       primary=self.primary,
+                                       replicas=replicas)
+        with session_factory() as db:
+            with self.assertRaises(OperationalError):
+                UserRepositoryImpl(db).get_by_username("bob")
+        self.assertFalse(replicas.replicas[0].healthy)
+        self.assertIsNone(replicas.choose())
+
+    def test_replicas_are_used_in_turn(self):
+        other = self.engine('replica2.db')
+        replicas = ReplicaSet([self.replica, other], max_lag=5)
+        chosen = [replicas.choose() for _ in range(4)]
+        self.assertEqual(chosen, [self.replica, other, self.replica, other])
+
+    def test_async_session_routes_reads(self):
+        url = "sqlite+aiosqlite:///" + self.tmp_dir.name + "/"
+
+        async def run():
+            primary = create_async_engine(url + "primary.db")
+            replica = create_async_engine(url + "replica.db")
+            session_factory = async_sessionmaker(
+                sync_session_class=RoutingSession,
+                primary=primary.sync_engine,
+                replicas=ReplicaSet([replica.sync_engine], max_lag=5),
+                expire_on_commit=False
+            )
+            try:
+                async with session_factory() as db:
+                    return await AsyncUserRepositoryImpl(
+                        db).get_by_username("bob")
+            finally:
+                await primary.dispose()
+                await replica.dispose()
+
+        self.assertIsNotNone(asyncio.run(run()))
+
+    def test_revocations_are_read_on_the_primary(self):
+        # Two workers with their own stores; the replica does not have
+        # the revocation yet:
+        url = "sqlite:///" + self.tmp_dir.name + "/"
+        with mock.patch.object(settings, 'DATABASE_URL', url + "primary.db"), \
+                mock.patch.object(settings, 'DATABASE_REPLICA_URLS',
+                                  url + "replica.db"), \
+                mock.patch.object(session, '_engine', None), \
+                mock.patch.object(session, '_local_session', None), \
+                mock.patch.object(session, '_primary_session', None), \
+                mock.patch.object(session, '_replicas', None):
+            for engine in [session.get_engine(),
+                           *session.get_replica_sets()[0].engines]:
+                self.addCleanup(engine.dispose)
+            expires_at = time.time() + 60
+            build_revocation_store('database').revoke("fam", expires_at)
+
+            self.assertTrue(build_revocation_store('database')
+                            .is_revoked("fam"))
+            # Through the routing sessions, the read would miss it:
+            routed = DatabaseTokenRevocationStore(session.new_session)
+            self.assertFalse(routed.is_revoked("fam"))
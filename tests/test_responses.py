@@ -0,0 +1,39 @@
+import json
+import logging
+from datetime import datetime
+from unittest import TestCase, mock
+
+from fastapi.encoders import jsonable_encoder
+
+from percefons.application.exceptions import RateLimitExceededError
+from percefons.interfaces.api import responses
+from percefons.interfaces.api.responses import FastJSONResponse
+from percefons.interfaces.api.schemas import UserRegistrationResponse
+from percefons.interfaces.api.schemas import exception_schemas
+
+
+LOG = logging.getLogger(__name__)
+
+
+class FastJSONResponseTest(TestCase):
+
+    def setUp(self):
+        self.content = UserRegistrationResponse(
+            userid=12, username="élise", created_at=datetime(2024, 5, 1, 8))
+
+    def test_body_matches_the_fastapi_encoding(self):
+        expected = jsonable_encoder(self.content)
+        body = FastJSONResponse(self.content).body
+        self.assertEqual(json.loads(body), expected)
+        with mock.patch.object(responses, 'orjson', None):
+            body = FastJSONResponse(self.content).body
+        self.assertEqual(json.loads(body), expected)
+        self.assertIn("élise".encode(), body)
+
+    def test_exception_response(self):
+        response = exception_schemas.exception_handler(
+            RateLimitExceededError("Slow down.", retry_after=3))
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["retry-after"], "3")
+        self.assertEqual(json.loads(response.body),
+                         {"message": "Slow down.", "code": "rate_limited"})
@@ -0,0 +1,61 @@
+import os
+import logging
+import tempfile
+from unittest import TestCase, mock, skipUnless
+
+from percefons.core import settings
+from percefons import main
+from percefons.infrastructure.db import session
+from percefons.server import available_cpus, server_options
+
+
+LOG = logging.getLogger(__name__)
+
+
+class ServerOptionsTest(TestCase):
+
+    def test_workers_default_to_the_cpu_count(self):
+        with mock.patch.object(settings, 'SERVER_WORKERS', 0):
+            options = server_options()
+        self.assertEqual(options["workers"], available_cpus())
+        self.assertFalse(options["reload"])
+
+    def test_overrides_replace_the_settings(self):
+        options = server_options(port=9000, workers=3, host=None)
+        self.assertEqual(options["port"], 9000)
+        self.assertEqual(options["workers"], 3)
+        self.assertEqual(options["host"], settings.SERVER_HOST)
+
+
+class MainTest(TestCase):
+
+    def test_start_runs_the_production_server_by_default(self):
+        with mock.patch.object(settings, 'DEBUG', False), \
+                mock.patch('percefons.server.serve') as serve, \
+                mock.patch('uvicorn.run') as run:
+            main.main()
+        serve.assert_called_once_with()
+        run.assert_not_called()
+
+
+class ForkSafetyTest(TestCase):
+
+    @skipUnless(hasattr(os, 'fork'), "fork is not available")
+    def test_forked_worker_gets_its_own_pool(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                mock.patch.object(settings, 'DATABASE_URL',
+                                  f"sqlite:///{tmp_dir}/fork.db"), \
+                mock.patch.object(session, '_engine', None), \
+                mock.patch.object(session, '_local_session', None):
+            engine = session.get_engine()
+            engine.connect().close()
+            self.assertEqual(engine.pool.checkedin(), 1)
+
+            pid = os.fork()
+            if pid == 0:
+                inherited = session.get_engine().pool.checkedin()
+                os._exit(0 if inherited == 0 else 1)
+            _, status = os.waitpid(pid, 0)
+            self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+            self.assertEqual(engine.pool.checkedin(), 1)
+            engine.dispose()
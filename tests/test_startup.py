@@ -0,0 +1,43 @@
+import os
+import sys
+import json
+import logging
+import tempfile
+import subprocess
+from unittest import TestCase
+
+from percefons.cli import check_startup
+
+
+LOG = logging.getLogger(__name__)
+# Generous limit of the import of the application, in seconds, which
+# catches the work done at import time rather than small regressions:
+IMPORT_BUDGET = 3.0
+
+
+class StartupTest(TestCase):
+
+    def test_import_does_not_touch_the_database(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'startup.db')
+            env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+            script = (
+                "import json, percefons.main\n"
+                "from percefons.infrastructure.db import session\n"
+                "print(json.dumps(session._engine is None))\n"
+            )
+            process = subprocess.run(
+                [sys.executable, '-c', script], cwd=tmp_dir, env=env,
+                capture_output=True, text=True
+            )
+            self.assertEqual(process.returncode, 0, process.stderr)
+            self.assertTrue(json.loads(process.stdout))
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_import_is_within_budget(self):
+        report = check_startup()
+        LOG.info(f"Import of the application: "
+                 f"{report.import_duration * 1000:.1f} ms")
+        modules = [imp.module for imp in report.imports]
+        self.assertEqual(modules[-1], 'percefons.main')
+        self.assertLess(report.import_duration, IMPORT_BUDGET)
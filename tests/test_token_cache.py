@@ -0,0 +1,57 @@
+import time
+import logging
+from unittest import TestCase
+
+from percefons.application.services import JWTAuth
+from percefons.infrastructure.cache import LRUCache
+from percefons.infrastructure.services.jwt_auth import CachedJWTAuthImpl
+
+
+LOG = logging.getLogger(__name__)
+SECRET = "a-test-secret-which-is-long-enough-for-hs256"
+
+
+class LRUCacheTest(TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_entry_expires_at_its_own_deadline(self):
+        cache = LRUCache(maxsize=2, ttl=60)
+        cache.set('a', 1, expires_at=time.time() - 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+
+class CachedJWTAuthTest(TestCase):
+
+    def setUp(self):
+        self.auth = CachedJWTAuthImpl(SECRET, SECRET, cache_size=8)
+
+    def test_verified_token_is_served_from_cache(self):
+        token = self.auth.get_auth("12")["access_token"]
+        first = self.auth.verify_auth(token)
+        second = self.auth.verify_auth(token)
+        LOG.debug(str(self.auth.cache_stats()))
+        self.assertEqual(first.status, JWTAuth.SUCCESS)
+        self.assertEqual(second.payload["sub"], "12")
+        self.assertEqual(self.auth.cache_stats()["hits"], 1)
+        self.assertEqual(self.auth.cache_stats()["misses"], 1)
+
+    def test_invalid_token_is_not_cached(self):
+        result = self.auth.verify_auth("not-a-token")
+        self.assertEqual(result.status, JWTAuth.FAILED)
+        self.assertEqual(self.auth.cache_stats()["size"], 0)
+
+    def test_invalidate_token(self):
+        token = self.auth.get_auth("12")["access_token"]
+        self.auth.verify_auth(token)
+        self.assertTrue(self.auth.invalidate(token))
+        self.assertFalse(self.auth.invalidate(token))
@@ -0,0 +1,129 @@
+import time
+import logging
+from unittest import TestCase, mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from fastapi.testclient import TestClient
+
+from percefons.application.exceptions import AuthenticationError
+from percefons.application.usecases.token_refresh import TokenRefresh
+from percefons.infrastructure.db.models import BaseModel
+from percefons.infrastructure.services.jwt_auth import JWTAuthImpl
+from percefons.infrastructure.services.token_revocation import (
+    InMemoryTokenRevocationStore,
+    DatabaseTokenRevocationStore
+)
+
+
+LOG = logging.getLogger(__name__)
+ACCESS_SECRET = "a-test-access-secret-which-is-long-enough"
+REFRESH_SECRET = "a-test-refresh-secret-which-is-long-enough"
+
+
+class TokenRevocationStoreTest(TestCase):
+
+    def test_expired_entries_are_compacted(self):
+        store = InMemoryTokenRevocationStore(compact_interval=0)
+        self.assertTrue(store.revoke('a', time.time() - 1))
+        self.assertFalse(store.is_revoked('a'))
+        store.revoke('b', time.time() + 60)
+        self.assertEqual(len(store), 1)
+
+    def test_database_store_is_shared(self):
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        BaseModel.metadata.create_all(bind=engine)
+        factory = sessionmaker(bind=engine)
+        first = DatabaseTokenRevocationStore(factory)
+        second = DatabaseTokenRevocationStore(factory)
+        self.assertTrue(first.revoke('a', time.time() + 60))
+        self.assertTrue(second.is_revoked('a'))
+        self.assertFalse(second.revoke('a', time.time() + 60))
+        first.revoke('b', time.time() - 1)
+        self.assertEqual(first.compact(), 1)
+
+
+class TokenRefreshTest(TestCase):
+
+    def setUp(self):
+        self.auth = JWTAuthImpl(ACCESS_SECRET, REFRESH_SECRET)
+        self.refresh = TokenRefresh(self.auth,
+                                    InMemoryTokenRevocationStore(),
+                                    family_ttl=3600)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        tokens = self.auth.get_auth("12")
+        result = self.auth.verify_auth(tokens["refresh_token"])
+        self.assertEqual(result.status, JWTAuthImpl.FAILED)
+
+    def test_token_types_are_checked_with_equal_secrets(self):
+        auth = JWTAuthImpl(ACCESS_SECRET, ACCESS_SECRET)
+        tokens = auth.get_auth("12")
+        self.assertEqual(auth.verify_auth(tokens["refresh_token"]).status,
+                         JWTAuthImpl.FAILED)
+        self.assertEqual(
+            auth.verify_refresh_token(tokens["access_token"]).status,
+            JWTAuthImpl.FAILED)
+        self.assertEqual(auth.verify_auth(tokens["access_token"]).status,
+                         JWTAuthImpl.SUCCESS)
+
+    def test_refresh_token_is_rotated(self):
+        tokens = self.auth.get_auth("12")
+        new_tokens = self.refresh.execute(tokens["refresh_token"]).tokens
+        payload = self.auth.verify_refresh_token(
+            new_tokens["refresh_token"]).payload
+        self.assertEqual(payload["sub"], "12")
+        self.assertNotEqual(new_tokens["refresh_token"],
+                            tokens["refresh_token"])
+
+    def test_reuse_revokes_the_family(self):
+        tokens = self.auth.get_auth("12")
+        new_tokens = self.refresh.execute(tokens["refresh_token"]).tokens
+        with self.assertRaises(AuthenticationError):
+            self.refresh.execute(tokens["refresh_token"])
+        with self.assertRaises(AuthenticationError):
+            self.refresh.execute(new_tokens["refresh_token"])
+
+
+class RefreshRouteTest(TestCase):
+
+    def setUp(self):
+        from percefons.main import app
+        from percefons.interfaces.api.routes import auth
+        patcher = mock.patch.object(auth, '_revocation_store',
+                                    InMemoryTokenRevocationStore())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # The lifespan is not run: the route needs no database.
+        self.client = TestClient(app, raise_server_exceptions=False)
+        self.tokens = JWTAuthImpl().get_auth("12")
+
+    def refresh(self, token: str):
+        return self.client.post("/api/v1/auth/refresh",
+                                json={"refresh_token": token})
+
+    def test_refresh_rotates_the_tokens(self):
+        response = self.refresh(self.tokens["refresh_token"])
+        self.assertEqual(response.status_code, 200)
+        tokens = response.json()
+        self.assertNotEqual(tokens["refresh_token"],
+                            self.tokens["refresh_token"])
+        self.assertEqual(
+            JWTAuthImpl().verify_auth(tokens["access_token"]).status,
+            JWTAuthImpl.SUCCESS)
+
+        # The reuse of the old token revokes the new one:
+        self.assertEqual(self.refresh(self.tokens["refresh_token"])
+                         .status_code, 401)
+        self.assertEqual(self.refresh(tokens["refresh_token"]).status_code,
+                         401)
+
+    def test_tokens_are_not_interchangeable(self):
+        self.assertEqual(self.refresh(self.tokens["access_token"])
+                         .status_code, 401)
+        response = self.client.get(
+            "/api/v1/permissions",
+            headers={"Authorization": "Bearer "
+                     + self.tokens["refresh_token"]})
+        self.assertEqual(response.status_code, 401)
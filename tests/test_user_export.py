@@ -0,0 +1,98 @@
+import json
+import asyncio
+import logging
+import tempfile
+from datetime import datetime
+from unittest import TestCase, mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from percefons.domain.entities import User, Permission
+from percefons.infrastructure.db.models import BaseModel
+from percefons.infrastructure.repositories.user_repository import (
+    UserRepositoryImpl
+)
+from percefons.infrastructure.repositories.permission_repository import (
+    PermissionRepositoryImpl
+)
+from percefons.infrastructure.repositories.user_perm_repository import (
+    UserPermissionRepositoryImpl
+)
+from percefons.infrastructure.repositories.user_export import (
+    iter_user_batches,
+    aiter_user_batches
+)
+from percefons.interfaces.api import responses
+from percefons.interfaces.api.responses import dumps_lines
+
+
+LOG = logging.getLogger(__name__)
+
+
+class UserExportTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = self.tmp_dir.name + "/export.db"
+        engine = create_engine("sqlite:///" + self.path)
+        self.addCleanup(engine.dispose)
+        BaseModel.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+        with self.session_factory() as db:
+            users = UserRepositoryImpl(db).create_many([
+                User(username=f"user{i}", hashed_password="x",
+                     email=f"user{i}@email.com",
+                     created_at=datetime(2024, 1, 1 + i))
+                for i in range(3)
+            ])
+            perms = PermissionRepositoryImpl(db).create_all([
+                Permission("Can view user", "VIEW_USER"),
+                Permission("Can create user", "CREATE_USER"),
+            ])
+            UserPermissionRepositoryImpl(db).grant_many(
+                [(users[0].id, perm.id) for perm in perms]
+                + [(users[2].id, perms[0].id)])
+
+    def check_records(self, records):
+        self.assertEqual([record["username"] for record in records],
+                         ["user0", "user1", "user2"])
+        self.assertEqual([record["permissions"] for record in records],
+                         [["CREATE_USER", "VIEW_USER"], [], ["VIEW_USER"]])
+        self.assertEqual(records[1]["created_at"], datetime(2024, 1, 2))
+
+    def test_permissions_are_grouped_across_batches(self):
+        # With one row per batch, the rows of user0 are in two batches:
+        for batch_size in (1, 2, 1000):
+            with self.session_factory() as db:
+                batches = list(iter_user_batches(db, batch_size))
+            LOG.debug(batches)
+            self.check_records([record for batch in batches
+                                for record in batch])
+
+    def test_async_export(self):
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///" + self.path)
+            try:
+                async with async_sessionmaker(bind=engine)() as db:
+                    return [record async for batch in
+                            aiter_user_batches(db, 2) for record in batch]
+            finally:
+                await engine.dispose()
+
+        self.check_records(asyncio.run(run()))
+
+    def test_ndjson_lines(self):
+        with self.session_factory() as db:
+            records = [record for batch in iter_user_batches(db, 1000)
+                       for record in batch]
+        body = dumps_lines(records)
+        with mock.patch.object(responses, 'orjson', None):
+            self.assertEqual(dumps_lines(records), body)
+        lines = body.decode().splitlines()
+        self.assertTrue(body.endswith(b"\n"))
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(json.loads(lines[0])["created_at"],
+                         "2024-01-01T00:00:00")
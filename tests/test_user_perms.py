@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import tempfile
+from unittest import TestCase, mock
+
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from percefons.domain.entities import Permission
+from percefons.infrastructure.db import bulk
+from percefons.infrastructure.db.models import BaseModel, UserModel
+from percefons.infrastructure.db.models.user_perms import (
+    user_permission_association as association
+)
+from percefons.infrastructure.managers.user_perms import read_pairs
+from percefons.infrastructure.repositories.permission_repository import (
+    PermissionRepositoryImpl
+)
+from percefons.infrastructure.repositories.user_perm_repository import (
+    UserPermissionRepositoryImpl,
+    AsyncUserPermissionRepositoryImpl,
+    permission_cache
+)
+
+
+LOG = logging.getLogger(__name__)
+
+
+class GrantRevokeManyTest(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = self.tmp_dir.name + "/perms.db"
+        engine = create_engine("sqlite:///" + self.path)
+        self.addCleanup(engine.dispose)
+        BaseModel.metadata.create_all(bind=engine)
+        self.statements = []
+        event.listen(engine, 'before_cursor_execute',
+                     lambda *args: self.statements.append(args[2]))
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+        self.db.add_all([UserModel(username=f"user{i}", hashed_password="x")
+                         for i in range(3)])
+        self.db.commit()
+        self.perms = PermissionRepositoryImpl(self.db).create_all([
+            Permission("Can view user", "VIEW_USER"),
+            Permission("Can create user", "CREATE_USER"),
+        ])
+        self.user_perm_repos = UserPermissionRepositoryImpl(self.db)
+        self.addCleanup(permission_cache.clear)
+
+    def granted_pairs(self) -> set:
+        rows = self.db.execute(select(association.c.user_id,
+                                      association.c.perm_id))
+        return set(rows.all())
+
+    def test_duplicates_are_ignored(self):
+        view, create = (perm.id for perm in self.perms)
+        pairs = [(1, view), (1, create), (2, view)]
+        self.statements.clear()
+        # The pairs repeated in the same call count once:
+        self.assertEqual(self.user_perm_repos.grant_many(pairs + pairs), 3)
+        inserts = [stmt for stmt in self.statements
+                   if stmt.startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        # The pairs already granted are skipped:
+        self.assertEqual(self.user_perm_repos.grant_many(
+            [(2, view), (2, create)]), 1)
+        self.assertEqual(self.granted_pairs(),
+                         {(1, view), (1, create), (2, view), (2, create)})
+
+    def test_grant_without_on_conflict(self):
+        view, create = (perm.id for perm in self.perms)
+        pairs = [(1, view), (1, create), (1, view)]
+        with mock.patch.dict(bulk._DIALECT_INSERTS, clear=True):
+            self.assertEqual(self.user_perm_repos.grant_many(pairs), 2)
+            self.assertEqual(self.user_perm_repos.grant_many(
+                pairs + [(2, view)]), 1)
+            self.assertEqual(self.user_perm_repos.grant_many(pairs), 0)
+        self.assertEqual(self.granted_pairs(),
+                         {(1, view), (1, create), (2, view)})
+
+    def test_revoke_deletes_only_the_given_pairs(self):
+        view, create = (perm.id for perm in self.perms)
+        pairs = [(user_id, perm.id) for user_id in (1, 2, 3)
+                 for perm in self.perms]
+        self.user_perm_repos.grant_many(pairs)
+        self.assertEqual(self.user_perm_repos.get_permission_codes(1),
+                         frozenset({"VIEW_USER", "CREATE_USER"}))
+        self.statements.clear()
+        # The pairs cross the users and the permissions, so that a
+        # filter on the columns taken separately would delete them all:
+        revoked = [(1, view), (2, create), (3, 99)]
+        self.assertEqual(self.user_perm_repos.revoke_many(revoked), 2)
+        deletes = [stmt for stmt in self.statements
+                   if stmt.startswith("DELETE")]
+        self.assertEqual(len(deletes), 1)
+        LOG.debug(deletes[0])
+        self.assertEqual(self.granted_pairs(),
+                         {(1, create), (2, view), (3, view), (3, create)})
+        # The cached permissions of the users are invalidated:
+        self.assertEqual(self.user_perm_repos.get_permission_codes(1),
+                         frozenset({"CREATE_USER"}))
+
+    def test_pairs_read_from_csv(self):
+        perm_ids = {perm.code_name: perm.id for perm in self.perms}
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as file:
+            file.write("user_id,perm_id,code_name\n"
+                       f"1,{perm_ids['VIEW_USER']},\n"
+                       "2,,CREATE_USER\n")
+            file.flush()
+            pairs = list(read_pairs(file.name, perm_ids))
+        self.assertEqual(pairs, [(1, perm_ids['VIEW_USER']),
+                                 (2, perm_ids['CREATE_USER'])])
+
+    def test_async_grant_and_revoke(self):
+        view, create = (perm.id for perm in self.perms)
+
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///" + self.path)
+            try:
+                async with async_sessionmaker(bind=engine)() as db:
+                    repos = AsyncUserPermissionRepositoryImpl(db)
+                    granted = await repos.grant_many(
+                        [(1, view), (1, view), (2, create)])
+                    regranted = await repos.grant_many([(1, view)])
+                    revoked = await repos.revoke_many(
+                        [(1, create), (2, create)])
+                    return granted, regranted, revoked
+            finally:
+                await engine.dispose()
+
+        self.assertEqual(asyncio.run(run()), (2, 0, 1))
+        self.assertEqual(self.granted_pairs(), {(1, view)})
+        # (1, view) is already granted:
+        with mock.patch.dict(bulk._DIALECT_INSERTS, clear=True):
+            self.assertEqual(asyncio.run(run()), (1, 0, 1))
+        self.assertEqual(self.granted_pairs(), {(1, view)})
@@ -0,0 +1,75 @@
+import logging
+from datetime import datetime
+from unittest import TestCase
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from percefons.domain.entities import User
+from percefons.application.services import PasswordHandler
+from percefons.application.exceptions import UserIsAlreadyExists
+from percefons.application.usecases.user_registration import (
+    UserRegistration
+)
+from percefons.infrastructure.db.models import BaseModel
+from percefons.infrastructure.repositories.user_repository import (
+    UserRepositoryImpl
+)
+
+
+LOG = logging.getLogger(__name__)
+
+
+class CountingPasswordHandler(PasswordHandler):
+    def __init__(self):
+        self.hashes = 0
+
+    def get_password_hash(self, password: str) -> str:
+        self.hashes += 1
+        return "hashed:" + password
+
+    def verify_password(self, plain_password, hashed_password) -> bool:
+        return hashed_password == "hashed:" + plain_password
+
+    def needs_update(self, hashed_password: str) -> bool:
+        return False
+
+
+class UserRegistrationTest(TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        BaseModel.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.repos = UserRepositoryImpl(self.db)
+        self.password_handler = CountingPasswordHandler()
+        self.registration = UserRegistration(self.repos,
+                                             self.password_handler)
+        self.registration.execute("alice", "password", "alice@email.com")
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_exists_by_username_or_email(self):
+        self.assertTrue(self.repos.exists_by_username_or_email("alice"))
+        self.assertTrue(self.repos.exists_by_username_or_email(
+            "bob", "alice@email.com"))
+        self.assertFalse(self.repos.exists_by_username_or_email(
+            "bob", "bob@email.com"))
+
+    def test_existing_user_is_rejected_before_hashing(self):
+        for username, email in (("alice", "other@email.com"),
+                                ("bob", "alice@email.com")):
+            with self.assertRaises(UserIsAlreadyExists) as context:
+                self.registration.execute(username, "password", email)
+            self.assertEqual(context.exception.code,
+                             "user_registration_error")
+        self.assertEqual(self.password_handler.hashes, 1)
+
+    def test_unique_constraint_violation_is_mapped(self):
+        user = User(username="alice", hashed_password="x",
+                    email="new@email.com", created_at=datetime.now())
+        with self.assertRaises(UserIsAlreadyExists):
+            self.repos.create(user)
+        # The session is still usable after the rollback:
+        self.assertIsNotNone(self.repos.get_by_username("alice"))
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import tempfile
+from unittest import TestCase, mock
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from percefons.domain.entities import Permission, User
+from percefons.infrastructure.db import bulk
+from percefons.infrastructure.db.models import BaseModel, UserModel
+from percefons.infrastructure.repositories.permission_repository import (
+    PermissionRepositoryImpl
+)
+from percefons.infrastructure.repositories.user_perm_repository import (
+    UserPermissionRepositoryImpl
+)
+from percefons.infrastructure.repositories.user_repository import (
+    UserRepositoryImpl,
+    AsyncUserRepositoryImpl
+)
+
+
+LOG = logging.getLogger(__name__)
+USERS = 12
+
+
+def count_selects(engine, statements: list):
+    """Appends the SELECT statements run by the engine to the list."""
+    def before_cursor_execute(_conn, _cursor, statement, *_args):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+class UserPermissionsLoadingTest(TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = tmp_dir.name + "/users.db"
+        engine = create_engine("sqlite:///" + self.path)
+        self.addCleanup(engine.dispose)
+        BaseModel.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+        self.db.add_all([UserModel(username=f"user{i}", hashed_password="x")
+                         for i in range(USERS)])
+        self.db.commit()
+        perms = PermissionRepositoryImpl(self.db).create_all([
+            Permission("Can view user", "VIEW_USER"),
+            Permission("Can create user", "CREATE_USER"),
+        ])
+        # The user i has i % 3 permissions:
+        UserPermissionRepositoryImpl(self.db).grant_many(
+            [(user_id, perm.id) for user_id in range(1, USERS + 1)
+             for perm in perms[:user_id % 3]])
+        self.db.expunge_all()
+        self.statements = []
+        count_selects(engine, self.statements)
+        self.user_repos = UserRepositoryImpl(self.db)
+
+    def check_permissions(self, users):
+        for user in users:
+            self.assertEqual(len(user.permissions), user.id % 3)
+
+    def test_get_with_permissions(self):
+        user = self.user_repos.get_with_permissions(2)
+        self.assertEqual(len(self.statements), 2)
+        self.assertEqual({perm.code_name for perm in user.permissions},
+                         {"VIEW_USER", "CREATE_USER"})
+        self.assertIsNone(self.user_repos.get_with_permissions(USERS + 1))
+
+    def test_list_with_permissions_in_constant_queries(self):
+        few = self.user_repos.list_with_permissions([1, 2])
+        queries = len(self.statements)
+        self.db.expunge_all()
+        self.statements.clear()
+        users = self.user_repos.list_with_permissions(range(1, USERS + 1))
+        LOG.debug(self.statements)
+        self.assertEqual(len(self.statements), queries)
+        self.assertEqual(queries, 2)
+        self.assertEqual(len(few), 2)
+        self.assertEqual([user.id for user in users],
+                         list(range(1, USERS + 1)))
+        self.check_permissions(users)
+        self.assertEqual(self.user_repos.list_with_permissions([]), [])
+
+    def test_unloaded_permissions_are_left_unset(self):
+        user_model = self.db.get(UserModel, 2)
+        self.statements.clear()
+        user = UserRepositoryImpl.convert_to_user_entity(user_model)
+        self.assertIsNone(user.permissions)
+        # No lazy load of the permissions is emitted:
+        self.assertEqual(self.statements, [])
+        users = self.user_repos.list_page(USERS)
+        self.assertTrue(all(user.permissions is None for user in users))
+
+    def test_async_loading(self):
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///" + self.path)
+            statements = []
+            count_selects(engine.sync_engine, statements)
+            try:
+                async with async_sessionmaker(bind=engine)() as db:
+                    user_repos = AsyncUserRepositoryImpl(db)
+                    user = await user_repos.get_with_permissions(2)
+                    single_queries = len(statements)
+                    statements.clear()
+                    users = await user_repos.list_with_permissions(
+                        range(1, USERS + 1))
+                    return user, single_queries, users, len(statements)
+            finally:
+                await engine.dispose()
+
+        user, single_queries, users, queries = asyncio.run(run())
+        self.assertEqual(len(user.permissions), 2)
+        self.assertEqual(single_queries, 2)
+        self.assertEqual(queries, 2)
+        self.assertEqual(len(users), USERS)
+        self.check_permissions(users)
+
+
+class CreateManyTest(TestCase):
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.path = tmp_dir.name + "/users.db"
+        engine = create_engine("sqlite:///" + self.path)
+        self.addCleanup(engine.dispose)
+        BaseModel.metadata.create_all(bind=engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+        self.db.add(UserModel(username="alice", email="alice@email.com",
+                              hashed_password="x"))
+        self.db.commit()
+
+    @staticmethod
+    def new_users() -> list:
+        return [User(username=username, email=email, hashed_password="x")
+                for username, email in (
+                    ("alice", None),
+                    ("bob", "bob@email.com"),
+                    ("carol", "alice@email.com"),
+                    ("bob", "other@email.com"),
+                    ("dave", None))]
+
+    def test_create_many_without_on_conflict(self):
+        # The dialects without `ON CONFLICT` select the taken users:
+        with mock.patch.dict(bulk._DIALECT_INSERTS, clear=True):
+            created = UserRepositoryImpl(self.db).create_many(
+                self.new_users())
+        self.assertEqual([user.username for user in created],
+                         ["bob", "dave"])
+        self.assertTrue(all(user.id for user in created))
+        bob = self.db.get(UserModel, created[0].id)
+        self.assertEqual(bob.email, "bob@email.com")
+
+    def test_async_create_many_without_on_conflict(self):
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite:///" + self.path)
+            try:
+                async with async_sessionmaker(bind=engine)() as db:
+                    user_repos = AsyncUserRepositoryImpl(db)
+                    return [await user_repos.create_many(self.new_users())
+                            for _ in range(2)]
+            finally:
+                await engine.dispose()
+
+        with mock.patch.dict(bulk._DIALECT_INSERTS, clear=True):
+            first, second = asyncio.run(run())
+        self.assertEqual([user.username for user in first], ["bob", "dave"])
+        self.assertEqual(second, [])
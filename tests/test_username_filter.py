@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from unittest import TestCase, mock
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+
+from percefons.domain.entities import User
+from percefons.infrastructure.bloom import BloomFilter
+from percefons.infrastructure.db.models import BaseModel, UserModel
+from percefons.infrastructure.repositories import user_repository
+
+
+LOG = logging.getLogger(__name__)
+
+
+class BloomFilterTest(TestCase):
+
+    def test_added_items_are_always_found(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        names = [f"user{i}" for i in range(1000)]
+        for name in names:
+            bloom.add(name)
+        self.assertTrue(all(name in bloom for name in names))
+
+    def test_false_positive_rate_is_bounded(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"user{i}")
+        false_positives = sum(f"other{i}" in bloom for i in range(10000))
+        LOG.debug(f"False positives: {false_positives}")
+        self.assertLess(false_positives, 300)
+
+
+def record_statements(engine) -> list:
+    """Returns the list of the statements that the engine runs."""
+    statements = []
+    event.listen(engine, 'before_cursor_execute',
+                 lambda _conn, _cursor, statement, *_args:
+                 statements.append(statement))
+    return statements
+
+
+class UsernameFilterTest(TestCase):
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        BaseModel.metadata.create_all(bind=engine)
+        self.statements = record_statements(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.repos = user_repository.UserRepositoryImpl(self.db)
+        self.repos.create(self.new_user("alice"))
+        self.filter = user_repository.UsernameFilter(1000, 0.01)
+        patcher = mock.patch.object(user_repository, 'username_filter',
+                                    self.filter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.db.close()
+
+    @staticmethod
+    def new_user(username: str) -> User:
+        return User(username=username, hashed_password="x" * 60,
+                    email=username + "@email.com", created_at=datetime.now())
+
+    def test_unloaded_filter_does_not_exclude_anything(self):
+        self.assertTrue(self.filter.might_exist("bob"))
+
+    def test_unknown_username_skips_the_database(self):
+        self.filter.load(self.db)
+        self.assertIsNotNone(self.filter.last_created_at)
+        self.statements.clear()
+        for username in ("bob", "carol", "dave"):
+            self.assertIsNone(self.repos.get_by_username(username))
+        self.assertEqual(self.statements, [])
+        self.assertIsNotNone(self.repos.get_by_username("alice"))
+        self.assertEqual(len(self.statements), 1)
+
+    def test_stale_filter_is_loaded_once(self):
+        self.filter.load(self.db)
+        self.statements.clear()
+        self.filter.load_started -= self.filter.max_staleness
+        for username in ("bob", "carol", "dave"):
+            self.assertIsNone(self.repos.get_by_username(username))
+        LOG.debug(self.statements)
+        self.assertEqual(len(self.statements), 1)
+        self.assertIn("created_at >=", self.statements[0])
+
+    def test_created_users_are_added(self):
+        self.filter.load(self.db)
+        self.repos.create(self.new_user("bob"))
+        self.repos.create_many([self.new_user("carol")])
+        self.assertIsNotNone(self.repos.get_by_username("bob"))
+        self.assertIsNotNone(self.repos.get_by_username("carol"))
+
+
+class UsernameFilterWorkersTest(TestCase):
+    """Two workers, each with its own filter, share a database."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.url = "sqlite:///" + self.tmp_dir.name + "/users.db"
+        engine = create_engine(self.url)
+        self.addCleanup(engine.dispose)
+        BaseModel.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+        self.filters = [user_repository.UsernameFilter(1000, 0.01, 60, 30)
+                        for _ in range(2)]
+        self.insert(1, "alice", datetime.now())
+        with self.session_factory() as db:
+            for username_filter in self.filters:
+                username_filter.load(db)
+
+    def insert(self, user_id: int, username: str, created_at: datetime):
+        with self.session_factory() as db:
+            db.add(UserModel(id=user_id, username=username,
+                             hashed_password="x", created_at=created_at))
+            db.commit()
+
+    def lookup(self, username_filter, username: str):
+        with self.session_factory() as db, \
+                mock.patch.object(user_repository, 'username_filter',
+                                  username_filter):
+            return user_repository.UserRepositoryImpl(db).get_by_username(
+                username)
+
+    def test_ids_committed_out_of_order_are_loaded(self):
+        now = datetime.now()
+        # The transaction of bob got its ID first but commits last:
+        self.insert(3, "carol", now)
+        with self.session_factory() as db:
+            self.filters[1].load(db)
+        self.insert(2, "bob", now - timedelta(seconds=1))
+        with self.session_factory() as db:
+            self.filters[1].load(db)
+        self.assertTrue(self.filters[1].might_exist("bob"))
+        self.assertTrue(self.filters[1].might_exist("carol"))
+
+    @staticmethod
+    def make_stale(username_filter):
+        """Makes the last load older than the maximum staleness."""
+        username_filter.load_started -= username_filter.max_staleness
+
+    def test_users_of_the_other_worker_are_found_once_stale(self):
+        self.insert(2, "bob", datetime.now())
+        # A fresh filter is trusted until the next load:
+        self.assertIsNone(self.lookup(self.filters[1], "bob"))
+        self.make_stale(self.filters[1])
+        self.assertIsNotNone(self.lookup(self.filters[1], "bob"))
+        self.assertIsNone(self.lookup(self.filters[1], "nobody"))
+        self.assertTrue(self.filters[1].might_exist("bob"))
+
+    def test_async_lookup_confirms_the_miss(self):
+        self.insert(2, "bob", datetime.now())
+
+        async def run():
+            engine = create_async_engine(
+                self.url.replace("sqlite", "sqlite+aiosqlite"))
+            try:
+                async with AsyncSession(engine) as db:
+                    return [await user_repository.async_certainly_absent(
+                        username, db) for username in ("bob", "nobody")]
+            finally:
+                await engine.dispose()
+
+        with mock.patch.object(user_repository, 'username_filter',
+                               self.filters[0]):
+            self.assertEqual(asyncio.run(run()), [True, True])
+            self.make_stale(self.filters[0])
+            self.assertEqual(asyncio.run(run()), [False, True])
@@ -1,12 +1,12 @@
 import logging
 from unittest import TestCase
-from package_name.utils import get_file_paths_list
+from percefons.utils import get_file_paths_list
 
 
 LOG = logging.getLogger(__name__)
 
 
-class PackageNameTest(TestCase):
+class UtilsTest(TestCase):
 
     def setUp(self):
         ...
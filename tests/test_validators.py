@@ -0,0 +1,96 @@
+import os
+import logging
+import tempfile
+from unittest import TestCase
+
+from percefons.domain import validators
+from percefons.domain.wordlist import SortedWordList
+from percefons.domain.exceptions import (
+    InvalidFieldError,
+    InvalidUserPasswordError
+)
+
+
+LOG = logging.getLogger(__name__)
+
+
+class SortedWordListTest(TestCase):
+
+    def test_words_are_found_by_bisection(self):
+        words = sorted(f"word{i:04d}" for i in range(1000))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "words.txt")
+            with open(path, 'w') as file:
+                file.write("\n".join(words) + "\n")
+            for max_loaded_size in (0, 1 << 20):
+                word_list = SortedWordList(path, max_loaded_size)
+                self.assertTrue(all(word in word_list for word in words))
+                self.assertNotIn("", word_list)
+                self.assertNotIn("word", word_list)
+                self.assertNotIn("word1000", word_list)
+                self.assertNotIn("zzz", word_list)
+            word_list = SortedWordList(path, max_loaded_size=0)
+            word_list._map.close()
+
+
+class PasswordValidatorTest(TestCase):
+
+    def codes(self, password: str) -> list:
+        return [code for code, _ in validators.password_violations(password)]
+
+    def test_valid_password(self):
+        validators.validate_user_password("aX6/9p6XoY]o4$#")
+
+    def test_all_violations_are_reported(self):
+        with self.assertRaises(InvalidUserPasswordError) as context:
+            validators.validate_user_password("abc")
+        codes = [error['code'] for error in context.exception.errors]
+        LOG.debug(str(context.exception))
+        self.assertEqual(codes, ['too_short', 'missing_uppercase_letters',
+                                 'missing_digits',
+                                 'missing_special_characters',
+                                 'sequential_characters'])
+
+    def test_sequences_and_repetitions(self):
+        self.assertIn('sequential_characters', self.codes("xX9#zYX!kq21a"))
+        self.assertIn('sequential_characters', self.codes("xX9#CBA!kq7a"))
+        self.assertIn('repeated_characters', self.codes("xX9#mmm!Kq7a"))
+
+    def test_common_password_variants(self):
+        self.assertIn('common_password', self.codes("P@ssw0rd!!92"))
+        self.assertIn('common_password', self.codes("Welcome1#$92"))
+        self.assertNotIn('common_password', self.codes("aX6/9p6XoY]o4$#"))
+
+
+class BatchValidationTest(TestCase):
+
+    records = [
+        {"username": "alice", "email": "alice@email.com",
+         "password": "aX6/9p6XoY]o4$#"},
+        {"username": "b b", "email": "bob", "password": None},
+        {"username": "carol", "email": 12, "password": "abc"},
+    ]
+
+    def test_rows_and_columns_give_the_same_report(self):
+        report = validators.validate_batch(self.records)
+        columns = {name: [record[name] for record in self.records]
+                   for name in ("username", "email", "password")}
+        self.assertEqual(validators.validate_batch(columns), report)
+        self.assertEqual(report.valid_count, 1)
+        self.assertTrue(report.is_valid(0))
+        self.assertEqual(report.errors[1],
+                         [('username', 'username_with_space'),
+                          ('email', 'invalid_email')])
+        self.assertIn(('email', 'not_a_string'), report.errors[2])
+        self.assertEqual(report.counts()[('password', 'too_short')], 1)
+
+    def test_batch_matches_the_scalar_validators(self):
+        emails = ["alice@email.com", "alice@", "a.b@c.io", "@b.co"]
+        report = validators.validate_batch({"email": emails})
+        for row, email in enumerate(emails):
+            try:
+                validators.validate_email(email)
+                valid = True
+            except InvalidFieldError:
+                valid = False
+            self.assertEqual(report.is_valid(row), valid)